@@ -0,0 +1,91 @@
+"""
+Benchmark the Seq set-algebra operators (&, |, -, ^) against the original list-comprehension
+versions, on random multi-megabase IUPAC sequences.
+
+Both versions are checked to give the same result before they're timed.
+
+Usage:  python examples/benchmark_set_ops.py [--length BASES] [--repeats N]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
+
+from Sequence import Seq
+from Sequence._constants import base_to_bin, bin_to_dna
+
+
+# Every IUPAC code, plus gaps
+ALPHABET = "ACGTRYSWKMBDHVN-"
+GAP      = ord('-')
+
+
+
+### Original Versions ###
+
+# The operators as they were before being vectorized, one pair of bases at a time
+def old_and(seq1, seq2):
+    return Seq([ bin_to_dna[base_to_bin[x] & base_to_bin[y]] for x, y in zip(seq1, seq2) ])
+
+def old_or(seq1, seq2):
+    return Seq([ bin_to_dna[base_to_bin[x] | base_to_bin[y]] for x, y in zip(seq1, seq2) ])
+
+def old_sub(seq1, seq2):
+    return Seq([ bin_to_dna[base_to_bin[x] & ~base_to_bin[y]] for x, y in zip(seq1, seq2) ])
+
+def old_xor(seq1, seq2):
+    return Seq([
+        x if x == y or y == GAP else (y if x == GAP else GAP)
+        for x, y in zip(seq1, seq2)
+    ])
+
+
+OPERATORS = [
+    ( "&", old_and, lambda x, y: x & y ),
+    ( "|", old_or,  lambda x, y: x | y ),
+    ( "-", old_sub, lambda x, y: x - y ),
+    ( "^", old_xor, lambda x, y: x ^ y ),
+]
+
+
+
+### Benchmark ###
+
+# Time a function, returning its result and the best time over several runs
+def best_time(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start  = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--length',  type=int, default=2_000_000, help="Bases in each operand (default 2,000,000).")
+    parser.add_argument('--repeats', type=int, default=3,         help="Runs of each version to take the best of (default 3).")
+    parser.add_argument('--seed',    type=int, default=0,         help="Random seed for the operands.")
+    args = parser.parse_args()
+
+    rng  = random.Random(args.seed)
+    seq1 = Seq("".join(rng.choices(ALPHABET, k=args.length)))
+    seq2 = Seq("".join(rng.choices(ALPHABET, k=args.length + 1000)))
+
+    print(f"{args.length:,} bases, best of {args.repeats}")
+    print(f"{'op':>3}  {'old (s)':>9}  {'new (s)':>9}  {'speedup':>8}")
+
+    for name, old_op, new_op in OPERATORS:
+        expected, old_time = best_time(lambda: old_op(seq1, seq2), args.repeats)
+        actual,   new_time = best_time(lambda: new_op(seq1, seq2), args.repeats)
+
+        assert actual == expected, f"Results of {name} differ from the original version."
+        print(f"{name:>3}  {old_time:9.3f}  {new_time:9.3f}  {old_time / new_time:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
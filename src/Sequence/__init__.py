@@ -1,2 +1,10 @@
-from ._sequence import Seq
-from ._reader   import SeqReader, read_all, read_first
+from ._sequence       import Seq
+from ._sequenceView   import SeqView
+from ._sequencePacked import PackedSeq
+from ._reader         import SeqReader, read_all, read_first
+from ._pairwise       import align_all
+from ._assembly       import assemble
+from ._alignCache     import AlignmentCache
+from ._index          import SeqIndex
+from ._search         import search, SearchHit
+from ._translatedSearch import translated_search, TranslatedHit
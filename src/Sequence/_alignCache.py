@@ -0,0 +1,166 @@
+import hashlib
+from array       import array
+from collections import OrderedDict
+
+
+# Default limits on the size of an AlignmentCache
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES   = 2 ** 26
+
+# Rough size of a cached object (a score, a tuple, an empty Seq, etc.), in bytes
+OBJECT_OVERHEAD = 64
+
+
+
+def digest(seq):
+    """
+    A short digest of the bases in a sequence, for use in cache keys.
+
+    Strings and buffers are digested directly; anything else (a SeqReader, PackedSeq, etc.)
+    is read into a Seq first, like align does.
+    """
+    from ._sequence import Seq, SeqView, _byte_array
+
+    if not isinstance(seq, (str, bytes, bytearray, memoryview, array, SeqView)):
+        seq = Seq(seq)
+    return hashlib.blake2b(_byte_array(seq), digest_size=16).digest()
+
+
+def result_size(result):
+    """
+    Estimate the memory used by an alignment result, in bytes.
+    """
+    if isinstance(result, (list, tuple)):
+        return OBJECT_OVERHEAD + sum( result_size(item) for item in result )
+    try:
+        return OBJECT_OVERHEAD + len(result)
+    except TypeError:
+        return OBJECT_OVERHEAD
+
+
+def copy_result(result):
+    """
+    Copy the sequences in an alignment result, so the cached copy can't be modified.
+    """
+    from ._sequence import Seq
+
+    if isinstance(result, list):
+        return [ copy_result(item) for item in result ]
+    if isinstance(result, tuple):
+        return tuple( copy_result(item) for item in result )
+    if isinstance(result, Seq):
+        return Seq(result)
+    return result
+
+
+
+class AlignmentCache:
+    """
+    A least-recently-used cache of alignment results.
+
+    Holds at most max_entries results, using at most (about) max_bytes of memory. When either
+    limit is reached, the least recently used results are evicted first.
+
+    Results are copied going in and coming out, so callers can modify the sequences they get
+    back without changing the cache.
+    """
+
+
+    ### Initialization ###
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes   = max_bytes
+
+        # Maps each key to a (result, size) pair, from least to most recently used
+        self._entries = OrderedDict()
+        self.nbytes   = 0
+
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+
+
+    ### Lookup ###
+
+    def get(self, key):
+        """
+        Get the result stored for a key, or None if there isn't one.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return copy_result(entry[0])
+
+
+    def put(self, key, result):
+        """
+        Store the result for a key, evicting old results if needed to make room.
+        """
+        size = result_size(result)
+
+        # Results too big for the whole cache aren't stored at all
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+
+        self._entries[key] = ( copy_result(result), size )
+        self.nbytes += size
+
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self.nbytes    -= old_size
+            self.evictions += 1
+
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+
+    ### Statistics ###
+
+    def stats(self):
+        """
+        Get the hit/miss statistics and current size of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits":      self.hits,
+            "misses":    self.misses,
+            "hit_rate":  self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries":   len(self._entries),
+            "nbytes":    self.nbytes,
+        }
+
+    def clear(self):
+        """
+        Remove every result, and reset the statistics.
+        """
+        self._entries.clear()
+        self.nbytes    = 0
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return (
+            f"<AlignmentCache: {len(self)} entries, {self.nbytes} bytes, "
+            f"{self.hits} hits, {self.misses} misses>"
+        )
+
+
+
+# A shared cache, used by align(..., cache=True)
+default_cache = AlignmentCache()
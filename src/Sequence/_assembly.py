@@ -0,0 +1,298 @@
+import warnings
+
+import numpy as np
+
+from .align import align
+
+
+# Default k-mer length for seeding overlaps
+DEFAULT_K = 15
+
+# Default number of bases an overlap can shift by (from indels) when it's aligned
+DEFAULT_BAND = 8
+
+# Map bases to 2-bit codes for k-mer hashing
+# Anything other than A, C, G, T/U maps to 4, and k-mers containing it are skipped
+_kmer_codes = np.full(256, 4, dtype=np.uint64)
+for _code, _bases in enumerate(("Aa", "Cc", "Gg", "TtUu")):
+    for _base in _bases:
+        _kmer_codes[ord(_base)] = _code
+
+
+
+### Seeding ###
+
+def kmer_hashes(seq, k=DEFAULT_K):
+    """
+    Hash every k-mer in a sequence to an integer (2 bits per base, so k can be at most 31).
+
+    Returns two arrays: the hashes, and the positions of the k-mers they came from.
+    """
+    from ._sequence import _byte_array
+
+    codes = _kmer_codes[_byte_array(seq)]
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+
+    # Shift each base into the hashes of all the k-mers it's in, one position at a time
+    n = len(codes) - k + 1
+    hashes = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        hashes <<= np.uint64(2)
+        hashes |= codes[j : j + n] & np.uint64(3)
+
+    # Skip the k-mers containing any other bases
+    invalid = np.concatenate(( [0], np.cumsum(codes == 4) ))
+    valid   = invalid[k:] == invalid[:n]
+    return hashes[valid], np.flatnonzero(valid)
+
+
+def candidate_overlaps(reads, k=DEFAULT_K, min_shared=2, max_occurrences=50):
+    """
+    Find the pairs of reads that share k-mers, and estimate how they overlap.
+
+    K-mers that appear more than max_occurrences times (repeats) are ignored.
+
+    Returns a dict mapping pairs of read indices (i, j), with i < j, to (offset, shared) pairs:
+    the most common offset of read j's start from read i's start over the shared k-mers,
+    and the number of k-mers shared at that offset. Only pairs sharing at least min_shared
+    k-mers at the same offset are included.
+    """
+
+    # Index every k-mer of every read
+    hashes, positions, read_ids = [], [], []
+    for i, read in enumerate(reads):
+        h, p = kmer_hashes(read, k)
+        hashes.append(h)
+        positions.append(p)
+        read_ids.append(np.full(len(h), i, dtype=np.int64))
+
+    if not hashes:
+        return {}
+
+    hashes    = np.concatenate(hashes)
+    positions = np.concatenate(positions)
+    read_ids  = np.concatenate(read_ids)
+
+    # Sort the k-mers, and split them into groups of identical k-mers
+    order     = np.argsort(hashes, kind='stable')
+    hashes    = hashes[order]
+    positions = positions[order]
+    read_ids  = read_ids[order]
+
+    starts = np.flatnonzero(np.concatenate(( [True], hashes[1:] != hashes[:-1] )))
+    sizes  = np.diff(np.append(starts, len(hashes)))
+
+    # Pair up the occurrences within each group, handling all groups of the same size together
+    pair_i, pair_j, diags = [], [], []
+    for size in np.unique(sizes):
+        if size < 2 or size > max_occurrences:
+            continue
+
+        members = starts[sizes == size][:, None] + np.arange(size)
+        a, b    = np.triu_indices(size, 1)
+        first, second = members[:, a].ravel(), members[:, b].ravel()
+
+        # Order each pair by read index, and skip k-mers repeated within one read
+        swap = read_ids[first] > read_ids[second]
+        first, second = np.where(swap, second, first), np.where(swap, first, second)
+        keep = read_ids[first] != read_ids[second]
+
+        pair_i.append(read_ids [first [keep]])
+        pair_j.append(read_ids [second[keep]])
+        diags .append(positions[first [keep]] - positions[second[keep]])
+
+    if not pair_i:
+        return {}
+
+    pair_i = np.concatenate(pair_i)
+    pair_j = np.concatenate(pair_j)
+    diags  = np.concatenate(diags)
+
+    # Count the shared k-mers on each diagonal of each pair
+    keys, counts = np.unique(np.stack(( pair_i, pair_j, diags ), axis=1), axis=0, return_counts=True)
+
+    # Keep the best diagonal for each pair
+    overlaps = {}
+    for (i, j, diag), count in zip(keys.tolist(), counts.tolist()):
+        if count >= min_shared and count > overlaps.get((i, j), (0, 0))[1]:
+            overlaps[i, j] = (diag, count)
+    return overlaps
+
+
+
+### Overlap Graph ###
+
+def overlap_graph(reads, k=DEFAULT_K, min_shared=2, max_occurrences=50):
+    """
+    Build an overlap graph of the reads from their shared k-mers.
+
+    Returns the set of reads contained in other reads, and a list of edges as
+    (overlap, shared, left, right, offset) tuples, where the right read starts offset bases
+    after the left read and overlaps it by about `overlap` bases.
+    """
+    lengths   = [ len(read) for read in reads ]
+    contained = set()
+    edges     = []
+
+    for (i, j), (offset, shared) in candidate_overlaps(reads, k, min_shared, max_occurrences).items():
+
+        # Reads that lie entirely within another read don't extend it
+        if offset >= 0 and offset + lengths[j] <= lengths[i]:
+            contained.add(j)
+            continue
+        if offset <= 0 and lengths[i] - offset <= lengths[j]:
+            contained.add(i)
+            continue
+
+        # Point each edge from the read that starts first
+        if offset > 0:
+            left, right = i, j
+        else:
+            left, right, offset = j, i, -offset
+
+        overlap = lengths[left] - offset
+        edges.append(( overlap, shared, left, right, offset ))
+
+    return contained, edges
+
+
+def greedy_paths(num_reads, contained, edges):
+    """
+    Join the reads into paths, taking the edges with the longest overlaps first.
+
+    Each read can have at most one read before and after it, and no path can loop back on
+    itself. Returns a list of paths, each a list of (read, offset) pairs, where offset is
+    the distance from the start of the previous read (0 for the first read).
+    """
+    succ = {}
+    pred = {}
+
+    # Track which path each read is in, so no path joins itself into a cycle
+    parent = list(range(num_reads))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for overlap, shared, left, right, offset in sorted(edges, reverse=True):
+        if left in contained or right in contained:
+            continue
+        if left in succ or right in pred or find(left) == find(right):
+            continue
+
+        succ[left]  = (right, offset)
+        pred[right] = left
+        parent[find(left)] = find(right)
+
+    # Walk each path from its first read
+    paths = []
+    for start in range(num_reads):
+        if start in contained or start in pred:
+            continue
+
+        path = [ (start, 0) ]
+        while path[-1][0] in succ:
+            path.append(succ[path[-1][0]])
+        paths.append(path)
+
+    return paths
+
+
+
+### Merging ###
+
+def merge_path(reads, path, min_score=None, band=DEFAULT_BAND, **kwargs):
+    """
+    Merge the reads along a path into contigs, combining each overlap with the xor consensus.
+
+    Each overlap is placed using the offset from the overlap graph and aligned globally within
+    a band, so merging a path takes time linear in its length. If min_score is given, the path
+    is split wherever an overlap aligns with a lower score.
+    """
+    from ._sequence import Seq
+
+    contigs = []
+
+    # The finished start of the contig, and the end that the next read can overlap
+    pieces = []
+    first, _ = path[0]
+    tail   = Seq(reads[first])
+    prev   = len(tail)
+
+    for read, offset in path[1:]:
+        read = reads[read]
+
+        # The previous read starts this far from the start of the tail, so the new read should
+        # start offset bases after that
+        start   = max(0, len(tail) - prev) + offset
+        overlap = len(tail) - start
+
+        # Overlaps that match exactly don't need to be aligned
+        merged = None
+        if 0 < overlap <= len(read) and tail.view(start) == read.view(0, overlap):
+            merged = Seq(read)
+
+        elif overlap > 0:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                score, (s1, s2) = align(
+                    tail.view(start), read.view(0, overlap), one_result=True, max_edits=band, **kwargs
+                )
+            if min_score is None or score >= min_score:
+                merged = (s1 ^ s2) + read.view(overlap)
+
+        # Start a new contig if the overlap doesn't hold up
+        if merged is None:
+            contigs.append(Seq.concat(pieces + [tail]))
+            pieces, tail = [], Seq(read)
+        else:
+            pieces.append(tail[:start])
+            tail = merged
+
+        prev = len(read)
+
+    contigs.append(Seq.concat(pieces + [tail]))
+    return contigs
+
+
+def assemble(
+    reads,
+    k               = DEFAULT_K,
+    min_shared      = 2,
+    max_occurrences = 50,
+    min_score       = None,
+    band            = DEFAULT_BAND,
+    score           = (1, -1),
+    gap_penalty     = -2,
+):
+    """
+    Assemble a list of reads (Seqs, strings, or SeqReaders) into contigs.
+
+    Candidate overlaps are found from shared k-mers, so only reads that share seeds are ever
+    compared. The overlap graph is built once, the reads are joined into paths greedily by
+    longest overlap, and each path is merged with banded alignments and the xor consensus.
+
+    Mismatches score higher than pairs of gaps by default, so a base that differs between two
+    reads is left as a gap in the consensus (and filled in by the next read to cover it).
+
+    Returns a list of contigs (Seqs), longest first.
+    """
+    from ._sequence import Seq
+
+    reads = [ Seq(read) for read in reads ]
+    if min_score is None:
+        min_score = k
+
+    contained, edges = overlap_graph(reads, k, min_shared, max_occurrences)
+
+    contigs = []
+    for path in greedy_paths(len(reads), contained, edges):
+        contigs += merge_path(
+            reads, path, min_score=min_score,
+            band=band, is_local=False, score=score, gap_penalty=gap_penalty,
+        )
+
+    return sorted(contigs, key=len, reverse=True)
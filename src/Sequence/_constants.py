@@ -41,7 +41,38 @@ bin_to_dna = {     val  : key for key, val in base_to_bin.items() }
 bin_to_dna[base_to_bin[ord("T")]] = ord("T")
 
 bin_to_rna = {     val  : key for key, val in base_to_bin.items() }
-bin_to_rna[base_to_bin[ord("T")]] = ord("T")
+bin_to_rna[base_to_bin[ord("U")]] = ord("U")
+
+
+# Byte translation tables
+# The same mappings as the dicts above, as 256-byte tables that can be passed to
+# bytes.translate or indexed with numpy arrays. Bytes with no mapping go to INVALID_CODE.
+
+INVALID_CODE = 0xFF
+
+base_to_bin_table = bytes( base_to_bin.get(b, INVALID_CODE) for b in range(256) )
+bin_to_dna_table  = bytes( bin_to_dna.get(b,  INVALID_CODE) for b in range(256) )
+bin_to_rna_table  = bytes( bin_to_rna.get(b,  INVALID_CODE) for b in range(256) )
+
+
+# Complement of each base, as ASCII -> ASCII tables
+# Complementing a 4-bit code swaps its high and low pairs of bits (A <-> T, C <-> G, R <-> Y, ...)
+def _complement_bin(code):
+	return ((code >> 2) & 0b0011) | ((code << 2) & 0b1100)
+
+dna_complement_table = bytes(
+	bin_to_dna[_complement_bin(base_to_bin[b])] if b in base_to_bin else INVALID_CODE for b in range(256)
+)
+rna_complement_table = bytes(
+	bin_to_rna[_complement_bin(base_to_bin[b])] if b in base_to_bin else INVALID_CODE for b in range(256)
+)
+
+
+# 2-bit codes for the four unambiguous bases, indexed by their 4-bit code
+bin_to_2bit = {
+	base_to_bin[ord("A")]: 0b00, base_to_bin[ord("C")]: 0b01,
+	base_to_bin[ord("G")]: 0b10, base_to_bin[ord("T")]: 0b11,
+}
 
 
 
@@ -0,0 +1,167 @@
+import os
+from collections import namedtuple
+
+
+# One record of a FASTA index, with the same five columns as a samtools .fai file
+#   - name:       the sequence ID
+#   - length:     the number of bases in the sequence
+#   - offset:     the byte offset of the first base in the file
+#   - line_bases: the number of bases on each line (except possibly the last)
+#   - line_bytes: the number of bytes on each line, including the line ending
+FaiRecord = namedtuple('FaiRecord', ['name', 'length', 'offset', 'line_bases', 'line_bytes'])
+
+
+
+def fai_filename(filename):
+    return f"{filename}.fai"
+
+
+### Building ###
+
+def scan_fasta(filename):
+    """
+    Read through a FASTA file, indexing each record in it.
+
+    Yields (record, desc, regular) triples. A record is regular if every line but the last has
+    the same number of bases and bytes, with no blank lines in between - only regular records
+    can be read straight from the file using their index.
+
+    Bases are counted the same way copy_record reads them, with the whitespace at either end of
+    each line stripped. Lines with any whitespace besides their line ending (e.g. trailing
+    spaces or tabs) would be read as bases straight from the file, so they make a record irregular.
+    """
+    from ._reader import parse_id_and_desc
+
+    with open(filename, "rb") as file:
+
+        # Ensure first line is a valid FASTA identifier line
+        line = file.readline()
+        if line[:1] != b'>':
+            raise Exception("Invalid FASTA file: First line must begin with '>'.")
+
+        position = 0
+        header   = None
+
+        def finish():
+            name, desc = parse_id_and_desc(header.decode("utf8"))
+            record = FaiRecord(name, length, offset, line_bases or 0, line_bytes or 0)
+            return record, desc, regular
+
+        while line:
+            position += len(line)
+
+            # Start of new sequence - finish the previous one, if there is one
+            if line[:1] == b'>':
+                if header is not None:
+                    yield finish()
+
+                header = line
+                offset = position
+                length = 0
+                regular = True
+                line_bases = line_bytes = None
+                ended   = False     # Whether a short (last) line or a blank line has been seen
+
+            # Content line of the current sequence
+            else:
+                num_bases = len(line.strip())
+
+                # Other whitespace around the bases can't be skipped when reading through the index
+                if len(line.rstrip(b'\r\n')) != num_bases:
+                    regular = False
+
+                if num_bases == 0:
+                    ended = True
+
+                else:
+                    # The first line sets the line length for the rest of the record
+                    if line_bases is None:
+                        line_bases, line_bytes = num_bases, len(line)
+                        regular = not ended
+
+                    # Any line after the last one (or a blank line) is out of place
+                    elif ended or num_bases > line_bases:
+                        regular = False
+
+                    # Only the last line can be shorter (or missing its line ending)
+                    elif (num_bases, len(line)) != (line_bases, line_bytes):
+                        ended = True
+
+                    length += num_bases
+
+            line = file.readline()
+
+        if header is not None:
+            yield finish()
+
+
+
+### Saving and Loading ###
+
+def write_fai(filename, records):
+    """
+    Write a .fai index for a FASTA file, if its directory can be written to.
+    """
+    try:
+        with open(fai_filename(filename), "w") as fai:
+            for record in records:
+                fai.write("\t".join( str(field) for field in record ) + "\n")
+    except OSError:
+        pass
+
+
+def read_fai(filename):
+    """
+    Read the .fai index of a FASTA file, or None if there isn't an up-to-date one.
+    """
+    fai = fai_filename(filename)
+    if not os.path.exists(fai) or os.path.getmtime(fai) < os.path.getmtime(filename):
+        return None
+
+    records = []
+    with open(fai, "r") as file:
+        for line in file:
+            fields = line.rstrip("\r\n").split("\t")
+            if len(fields) < 5:
+                return None
+            records.append(FaiRecord(fields[0], *( int(field) for field in fields[1:5] )))
+    return records
+
+
+def read_desc(file, record):
+    """
+    Read the description from the header line of a record, just before its first base.
+    """
+    from ._reader import parse_id_and_desc
+
+    # Read back from the offset until the start of the header line is found
+    size = 1024
+    while True:
+        start = max(0, record.offset - size)
+        file.seek(start)
+        chunk = file.read(record.offset - start).rstrip()
+
+        line_start = chunk.rfind(b'\n') + 1
+        if line_start > 0 or start == 0:
+            break
+        size *= 2
+
+    return parse_id_and_desc(chunk[line_start:].decode("utf8"))[1]
+
+
+def fasta_records(filename):
+    """
+    Get the (record, desc, regular) triple for every record in a FASTA file.
+
+    An up-to-date .fai index is reused if there is one. Otherwise the file is scanned, and the
+    index is saved next to it (as long as every record is regular, like samtools requires).
+    """
+    records = read_fai(filename)
+    if records is not None:
+        with open(filename, "rb") as file:
+            return [ (record, read_desc(file, record), True) for record in records ]
+
+    scanned = list(scan_fasta(filename))
+    if all( regular for _, _, regular in scanned ):
+        write_fai(filename, [ record for record, _, _ in scanned ])
+    return scanned
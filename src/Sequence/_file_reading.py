@@ -1,104 +1,89 @@
+import mmap
 import os
 
-def byte_file_lines(filename, len_lines, num_lines, reverse=False, offset=0):
+def sequence_length(file, len_lines, num_lines, byte_offset, line_bytes):
     """
-    Read a file as bytes in forward or backward order.
-    
-    Assumes all lines (except potentially the last) are the same length.
+    Compute the number of bases in a file from its size, assuming the sequence runs to the
+    end of the file (with no line ending after the last line).
     """
+    size = os.fstat(file.fileno()).st_size
+    last_line_len = size - byte_offset - line_bytes * (num_lines - 1)
+    return (len_lines * (num_lines - 1)) + last_line_len
 
-    # Open the file in read mode & byte mode
-    file = open(filename, "r+b")
 
-    # Generate the lines in forward order, where offset defines the start
-    if not reverse:
-        file.seek(offset)
-        for line in file:
-            yield line.strip()
-
-    # Generate the lines in reverse order, where offset defines the end
-    else:
-
-        # Make sure to count newlines
-        line_offset = len(b'\n')
-
-        # Start the index at the beginning of the final line
-        line_start_idx = (len_lines + line_offset) * (num_lines - 1)
-
-        # Seek to offset bits before the end, and get the absolute position
-        file.seek(-offset, os.SEEK_END)
-        offset_abs_idx = file.tell()
-
-        # Back up the index to the start of the line containing the start offset
-        while offset_abs_idx < line_start_idx:
-            line_start_idx -= len_lines + line_offset
-
-        # If the offset is in the middle of the line, return the first part of the line
-        if line_start_idx < offset_abs_idx:
-
-            # Seek to the start of the line containing the offset and read it
-            file.seek(line_start_idx)
-            next_line = file.readline().strip()
+def base_position(idx, len_lines, byte_offset, line_bytes):
+    """
+    The position in a file of the base at the given index of a sequence.
+    """
+    line, col = divmod(idx, len_lines)
+    return byte_offset + line * line_bytes + col
 
-            # Cut out everything after the offset
-            yield next_line[0: offset_abs_idx - line_start_idx]
 
-            # Move back to start of previous line
-            line_start_idx -= len_lines + line_offset
+def window_bounds(length, len_lines, window_size=None, reverse=False, offset=0):
+    """
+    Split a sequence into windows of window_size bases, as (first, last) pairs of base indices.
 
-        # Move backwards line by line until no lines are left
-        while line_start_idx >= 0:
-            file.seek(line_start_idx)
+    Forward windows start offset bases from the start; reverse windows run backwards, starting
+    offset bases from the end. With no window size, each window is (the rest of) one line.
+    """
+    if not reverse:
+        first = offset
+        while first < length:
+            if window_size is None:    last = (first // len_lines + 1) * len_lines
+            else:                      last = first + window_size
 
-            # Generate the current line
-            yield file.readline().strip()
+            last = min(last, length)
+            yield first, last
+            first = last
 
-            # Move back to start of previous line
-            line_start_idx -= len_lines + line_offset
+    else:
+        last = length - offset
+        while last > 0:
+            if window_size is None:    first = ((last - 1) // len_lines) * len_lines
+            else:                      first = last - window_size
 
+            first = max(first, 0)
+            yield first, last
+            last = first
 
 
-def read_byte_file(filename, len_lines, num_lines, window_size=None, reverse=False, offset=0):
-    """
-    Read a file in sets of window_size bytes, ignoring line breaks.
 
-    Assumes all lines (except potentially the last) are the same length.
+def read_byte_file(filename, len_lines, num_lines, window_size=None, reverse=False, offset=0, byte_offset=0, line_bytes=None, length=None):
     """
+    Read a file in sets of window_size bytes, ignoring line breaks (or line by line, if no
+    window size is given). In reverse, the bytes of each window are reversed too.
 
-    # If no size specified, yield line-by-line
-    if window_size is None:
-        for line in byte_file_lines(filename, len_lines, num_lines, reverse=reverse, offset=offset):
-            if reverse:    yield line[::-1]
-            else:          yield line
-
-    # Otherwise, yield in chunks of given size
-    else:
+    The file is memory-mapped, so each window is sliced straight out of the mapping, wherever
+    it starts, and the line breaks inside it are removed all at once. Processes reading the
+    same file share its pages, rather than each reading it in separately.
 
-        # Initialize buffer to store unyielded chars from previous line(s)
-        buffer = []
+    The offset is a number of bases, skipped from the start (forward) or end (backward).
 
-        # Loop through each line starting from the offset in the file
-        for line in byte_file_lines(filename, len_lines, num_lines, reverse=reverse, offset=offset):
+    The sequence starts byte_offset bytes into the file, and is length bases long (by default, the
+    rest of the file). Each line holds len_lines bases in line_bytes bytes (by default, with
+    a single newline). Assumes all lines (except potentially the last) are the same length.
+    """
 
-            # Reverse the line, if applicable
-            if reverse:
-                line = line[::-1]
+    # Make sure to count newlines
+    if line_bytes is None:
+        line_bytes = len_lines + len(b'\n')
 
-            # Move into buffer and yield until line runs out
-            while len(line) > 0:
+    with open(filename, "rb") as file:
 
-                # Compute how many more characters we can fit in the buffer
-                num_to_add = window_size - len(buffer)
+        # Compute the total number of bases from the size of the file, if it isn't given
+        if length is None:
+            length = sequence_length(file, len_lines, num_lines, byte_offset, line_bytes)
 
-                # Move that many characters from line to buffer
-                buffer += line[: num_to_add]
-                line    = line[num_to_add :]
+        # Nothing to read (and empty files can't be mapped)
+        if offset >= length:
+            return
 
-                # If buffer is big enough, yield and clear it
-                if len(buffer) >= window_size:
-                    yield buffer
-                    buffer = []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for first, last in window_bounds(length, len_lines, window_size, reverse, offset):
+                start  = base_position(first,    len_lines, byte_offset, line_bytes)
+                stop   = base_position(last - 1, len_lines, byte_offset, line_bytes) + 1
+                window = mapped[start:stop]
+                window = window.translate(None, b'\r\n')
 
-        # If anything is left in the buffer, yield it
-        if len(buffer) > 0:
-            yield buffer
+                if reverse:    yield window[::-1]
+                else:          yield window
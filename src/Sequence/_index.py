@@ -0,0 +1,198 @@
+import numpy as np
+
+
+# Number of BWT positions between each stored row of occurrence counts
+DEFAULT_BLOCK_SIZE = 64
+
+# Marks the end of the indexed text - must sort before every base
+SENTINEL = 0
+
+
+
+def suffix_array(text):
+    """
+    Sort the suffixes of a numpy array of bytes by prefix doubling.
+
+    Each round sorts the suffixes by their first 2k bytes, using the ranks from sorting by the
+    first k bytes, until every suffix has a distinct rank.
+    """
+    n    = len(text)
+    rank = text.astype(np.int64)
+    sa   = np.argsort(rank, kind='stable')
+
+    k = 1
+    while n > 1:
+
+        # Rank of the suffix k positions later (-1 past the end, so shorter suffixes sort first)
+        second = np.full(n, -1, dtype=np.int64)
+        second[:n-k] = rank[k:]
+
+        base = max(int(rank.max()), n) + 2
+        key  = rank * base + (second + 1)
+        sa   = np.argsort(key, kind='stable')
+
+        # Suffixes with the same key share a rank
+        sorted_key = key[sa]
+        rank = np.empty(n, dtype=np.int64)
+        rank[sa] = np.cumsum(np.concatenate(( [0], sorted_key[1:] != sorted_key[:-1] )))
+
+        if rank[sa[-1]] == n - 1 or k >= n:
+            break
+        k *= 2
+
+    return sa
+
+
+
+class SeqIndex:
+    """
+    An FM-index over a sequence, for exact substring search.
+
+    Built from a Seq, SeqView, string, or SeqReader. Stores the text, its suffix array, and
+    its Burrows-Wheeler transform with occurrence counts every block_size positions, so
+    counting a pattern takes time proportional to its length (not the length of the text).
+    """
+
+
+    ### Initialization ###
+
+    def __init__(self, seq=None, block_size=DEFAULT_BLOCK_SIZE):
+        if seq is None:
+            return
+
+        from ._sequence import Seq, _byte_array
+
+        # SeqReaders (and anything else that isn't a buffer) are read into memory first
+        if not isinstance(seq, (str, bytes, bytearray, memoryview, Seq)) and not hasattr(seq, '_buffer'):
+            seq = Seq(seq)
+
+        text = _byte_array(seq)
+        if len(text) > 0 and text.min() == SENTINEL:
+            raise ValueError("Can't index a sequence containing null bytes.")
+
+        self.text = np.append(text, np.uint8(SENTINEL))
+
+        sa = suffix_array(self.text)
+        self.sa = sa.astype(np.int32 if len(sa) < 2 ** 31 else np.int64)
+
+        self.block_size = block_size
+        self._build_fm()
+
+
+    def _build_fm(self):
+        """
+        Compute the BWT, symbol counts, and occurrence checkpoints from the text and suffix array.
+        """
+        self.bwt = self.text[self.sa - 1]
+
+        # Map each byte to its index in the sorted alphabet (or -1 if it isn't in the text)
+        symbols    = np.unique(self.text)
+        self._code = np.full(256, -1, dtype=np.int64)
+        self._code[symbols] = np.arange(len(symbols))
+
+        # Number of characters in the text smaller than each symbol
+        counts  = np.array([ np.count_nonzero(self.text == s) for s in symbols ])
+        self._C = np.concatenate(( [0], np.cumsum(counts)[:-1] ))
+
+        # Occurrences of each symbol in bwt[:i], for every i that's a multiple of the block size
+        self._occ = np.zeros((len(self.bwt) // self.block_size + 1, len(symbols)), dtype=np.int64)
+        for s, symbol in enumerate(symbols):
+            totals = np.concatenate(( [0], np.cumsum(self.bwt == symbol) ))
+            self._occ[:, s] = totals[::self.block_size]
+
+        self._symbols = symbols
+
+
+    def _rank(self, s, i):
+        """
+        Number of occurrences of symbol index s in bwt[:i].
+        """
+        block = i // self.block_size
+        start = block * self.block_size
+        return int(self._occ[block, s]) + int(np.count_nonzero(self.bwt[start:i] == self._symbols[s]))
+
+
+
+    ### Saving and Loading ###
+
+    def save(self, filename):
+        """
+        Save the index to a file, in .npz format.
+
+        Written through an open file, so numpy doesn't add a .npz extension to the name.
+        """
+        with open(filename, "wb") as file:
+            np.savez(
+                file, text=self.text, sa=self.sa, bwt=self.bwt, occ=self._occ, code=self._code,
+                C=self._C, symbols=self._symbols, block_size=self.block_size,
+            )
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load an index saved with save().
+        """
+        index = cls()
+        with np.load(filename) as data:
+            index.text       = data["text"]
+            index.sa         = data["sa"]
+            index.bwt        = data["bwt"]
+            index._occ       = data["occ"]
+            index._code      = data["code"]
+            index._C         = data["C"]
+            index._symbols   = data["symbols"]
+            index.block_size = int(data["block_size"])
+        return index
+
+
+
+    ### Searching ###
+
+    def _sa_range(self, pattern):
+        """
+        Find the range of the suffix array whose suffixes start with the pattern (backward search).
+        """
+        from ._sequence import _byte_array
+
+        lo, hi = 0, len(self.bwt)
+        for byte in _byte_array(pattern)[::-1]:
+            s = self._code[byte]
+            if s < 0:
+                return 0, 0
+
+            lo = int(self._C[s]) + self._rank(s, lo)
+            hi = int(self._C[s]) + self._rank(s, hi)
+            if lo >= hi:
+                return 0, 0
+
+        return lo, hi
+
+    def count(self, pattern):
+        """
+        Count the occurrences of a pattern in the sequence (including overlapping ones).
+        """
+        lo, hi = self._sa_range(pattern)
+        return hi - lo
+
+    def locate(self, pattern):
+        """
+        Find the start position of every occurrence of a pattern, in increasing order.
+        """
+        lo, hi = self._sa_range(pattern)
+        return np.sort(self.sa[lo:hi])
+
+    def contains(self, pattern):
+        """
+        Check whether a pattern occurs in the sequence.
+        """
+        lo, hi = self._sa_range(pattern)
+        return hi > lo
+
+    def __contains__(self, pattern):
+        return self.contains(pattern)
+
+    def __len__(self):
+        return len(self.text) - 1
+
+    def __repr__(self):
+        return f"<SeqIndex: {len(self)} bases>"
@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+import numpy as np
+
+from ._constants import INVALID_CODE, base_to_bin_table
+
+
+# The default number of bases to read from a file at once when searching it
+DEFAULT_WINDOW_SIZE = 2 ** 20
+
+# Number of motif positions checked against the whole text in an exact search
+FULL_SCAN_POSITIONS = 3
+
+# Most bytes a position can match before it's checked with a lookup table instead
+MAX_COMPARISONS = 4
+
+# 4-bit code of every byte (INVALID_CODE for anything that isn't a base)
+_codes = np.frombuffer(base_to_bin_table, dtype=np.uint8).astype(np.int64)
+
+
+
+@lru_cache(maxsize=256)
+def motif_tables(motif):
+    """
+    Build a 256-entry lookup table for each position of a motif (given as bytes).
+
+    Each base in the motif is a character class, given by its 4-bit code: a base in the text
+    matches it if every base the text could be is allowed by the motif. So R (A or G) in the
+    motif matches A, G, and R in the text, but N in the text only matches N in the motif.
+    Gaps and anything that isn't a base never match.
+
+    Returns an (m x 256) boolean array, and the order to check the positions in (fewest
+    matching bytes first).
+    """
+    masks = _codes[np.frombuffer(motif, dtype=np.uint8)]
+    if len(masks) == 0:
+        raise ValueError("Can't search for an empty motif.")
+    if (masks == INVALID_CODE).any() or (masks == 0).any():
+        bad = motif[int(np.argmax((masks == INVALID_CODE) | (masks == 0)))]
+        raise ValueError(f"Can't search for '{chr(bad)}': not a base or IUPAC code.")
+
+    valid  = (_codes != INVALID_CODE) & (_codes != 0)
+    tables = valid & ((_codes[None, :] & ~masks[:, None]) == 0)
+
+    order = np.argsort(tables.sum(axis=1), kind='stable')
+    tables.flags.writeable = False
+    return tables, order
+
+
+def match_positions(motif, text, mismatches=0):
+    """
+    Find every position in a numpy array of bytes where the motif starts, allowing up to the
+    given number of mismatches. Returns a numpy array of positions, in increasing order.
+
+    Each position of the motif is checked against the whole text at once. With no mismatches
+    allowed, only the most selective positions are checked against the whole text, and the
+    rest only check the surviving candidates.
+    """
+    tables, order = motif_tables(bytes(motif))
+    m = len(tables)
+    n = len(text) - m + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Exact matches - check the most selective positions against the whole text, then narrow
+    # down the candidates one position at a time
+    if mismatches == 0:
+        hits = np.ones(n, dtype=bool)
+        for j in order[:FULL_SCAN_POSITIONS]:
+            hits &= position_hits(tables[j], text[j : j + n])
+
+        candidates = np.flatnonzero(hits)
+        for j in order[FULL_SCAN_POSITIONS:]:
+            if len(candidates) == 0:
+                break
+            candidates = candidates[tables[j][text[candidates + j]]]
+        return candidates
+
+    # Approximate matches - count the mismatches at every position
+    misses = np.zeros(n, dtype=np.uint8 if m < 256 else np.int64)
+    for j in range(m):
+        misses += ~position_hits(tables[j], text[j : j + n])
+    return np.flatnonzero(misses <= mismatches)
+
+
+def position_hits(table, text):
+    """
+    Check every byte of the text against one position's lookup table.
+
+    Comparing against each matching byte is much faster than a table lookup, so positions
+    that only match a few bytes (plain bases) are checked that way.
+    """
+    matching = np.flatnonzero(table).astype(np.uint8)
+    if len(matching) > MAX_COMPARISONS:
+        return table[text]
+
+    hits = text == matching[0]
+    for byte in matching[1:]:
+        hits |= text == byte
+    return hits
+
+
+
+def finditer_blocks(motif, blocks, mismatches=0):
+    """
+    Find every occurrence of a motif in a stream of blocks of a sequence, yielding their start
+    positions in increasing order.
+
+    The last (m - 1) bases of each block are carried over to the next, so matches that span
+    two blocks are found exactly once.
+    """
+    from ._sequence import _byte_array
+
+    motif    = _byte_array(motif).tobytes()
+    m        = len(motif)
+    carry    = np.zeros(0, dtype=np.uint8)
+    position = 0
+
+    for block in blocks:
+        text = np.concatenate(( carry, _byte_array(block) ))
+
+        for start in match_positions(motif, text, mismatches).tolist():
+            yield position + start
+
+        # Keep the bases of any match that might continue into the next block
+        keep = min(m - 1, len(text))
+        position += len(text) - keep
+        carry     = text[len(text) - keep:]
+
+
+def find(seq, motif, start=0, end=None, mismatches=0):
+    """
+    Find the first position of a motif in seq[start:end], or -1 if it isn't there.
+    """
+    for position in finditer(seq, motif, start, end, mismatches):
+        return position
+    return -1
+
+
+def finditer(seq, motif, start=0, end=None, mismatches=0):
+    """
+    Find every position of a motif in seq[start:end] (including overlapping matches).
+    """
+    from ._sequence import _byte_array
+
+    text   = _byte_array(seq)
+    bounds = range(len(text))[start:end]
+    text   = text[bounds.start : bounds.stop]
+
+    return iter( (match_positions(_byte_array(motif), text, mismatches) + bounds.start).tolist() )
@@ -1,95 +1,282 @@
 import os
 import time
+import warnings
 from functools       import partial
 from multiprocessing import Pool
 
+import numpy as np
+
 from ._constants import frame_values
+from ._transform import all_codon_indices, codon_lookup
+
+
+# The default number of bases to read from the file at once
+DEFAULT_BLOCK_SIZE = 2 ** 20
 
+# Amino acids marking the start and end of an ORF
+START_CODE = ord('M')
+STOP_CODE  = ord('*')
 
 
-def find_orfs(self, frame=None, min_length=3, processes=6, verbose=False, verbose_output=False):
+
+def strand_orfs(blocks, frames, min_length=3):
     """
-    Find all open reading frames in a given sequence.
+    Find the ORFs in one strand of a sequence, reading it as a stream of blocks.
 
-    If a reading frame is provided, searches that frame only.
+    The frames argument maps the codon offsets to search (0, 1 or 2 bases from the start of
+    the strand) to their frame values. All the offsets are searched in the same pass.
 
-    If not, searches all six reading frames in parallel.
+    Returns a dict mapping each frame value to a list of (frame, start, stop) tuples, where
+    start and stop are indices into the translated protein for that frame.
     """
+    orfs, _, _ = scan_strand(blocks, frames, min_length)
+    return orfs
 
-    # Search all frames
-    if frame is None:
 
-        # Start timer
-        start_time = time.time()
+def scan_strand(blocks, frames, min_length=3, position=0):
+    """
+    Search a stream of blocks from one strand for ORFs, starting at the given strand position.
 
-        # Initialize empty list to track ORFs
-        orfs = []
+    Returns three values:
+      - A dict mapping each frame value to the ORFs found, as in strand_orfs
+      - A dict mapping each codon offset to the starts left open at the end (protein indices)
+      - A dict mapping each codon offset to the first stop found (or None if there wasn't one)
+    """
+    lookup = codon_lookup()
 
-        # Initialize var to sum time of each computation
-        sum_time = 0
+    # ORFs found so far, and starts that haven't been closed by a stop yet, for each frame
+    orfs        = { frame:  [] for frame in frames.values() }
+    pending     = { offset: np.zeros(0, dtype=np.int64) for offset in frames }
+    first_stops = { offset: None for offset in frames }
 
-        # Protect the temp file from garbage collection (???)
-        # Honestly I have no idea why this happens but without this the whole thing breaks
-        f = open(self.filename)
+    # The last two bases of each block are carried over, so codons spanning two blocks are read
+    carry = b''
 
-        # Spawn processes to read frames concurrently
-        with Pool(processes=processes) as pool:
+    for block in blocks:
+        buffer = carry + bytes(block)
 
-            # Loop through frame values, assigning a new process to read each one
-            for frame, orf_list, t in pool.imap_unordered(
-                partial(find_orfs, self, min_length=min_length, verbose_output=True),
-                frame_values
-            ):
-                if verbose:
-                    print(f"  - Read frame {frame:2} in {t} seconds.")
-                orfs.extend(orf_list)
-                sum_time += t
+        # Translate the codon starting at every position, and find the starts and stops
+        aminos = lookup[ all_codon_indices(buffer) ]
+        starts = np.flatnonzero(aminos == START_CODE) + position
+        stops  = np.flatnonzero(aminos == STOP_CODE)  + position
 
-        # Safe to close the temporary handle now (for some reason)
-        f.close()
+        for offset, frame in frames.items():
 
-        # Stop timer
-        end_time = time.time()
+            # Convert the strand positions in this frame to protein indices
+            frame_starts = (starts[starts % 3 == offset] - offset) // 3
+            frame_stops  = (stops[stops   % 3 == offset] - offset) // 3
 
-        if verbose:
-            print("")
-            print(f"Total computing time: ~{sum_time} seconds.")
-            print(f"Actual elapsed time:   {end_time - start_time} seconds.")
+            if first_stops[offset] is None and len(frame_stops) > 0:
+                first_stops[offset] = int(frame_stops[0])
 
-        # Return the built up list of ORFs
-        return orfs
+            # Add in the starts left open from previous blocks
+            frame_starts = np.concatenate(( pending[offset], frame_starts ))
 
+            # Pair each start with the first stop after it
+            next_stop = np.searchsorted(frame_stops, frame_starts)
+            closed    = next_stop < len(frame_stops)
 
-    # Search a specific frame
+            orf_starts = frame_starts[closed]
+            orf_stops  = frame_stops[next_stop[closed]]
+
+            # Keep the ORFs that are long enough
+            keep = orf_stops - orf_starts >= min_length
+            orfs[frame] += [
+                (frame, s, e) for s, e in zip(orf_starts[keep].tolist(), orf_stops[keep].tolist())
+            ]
+
+            # Any starts after the last stop stay open
+            pending[offset] = frame_starts[~closed]
+
+        # Move the window up, keeping the bases of any partial codon at the end
+        carry     = buffer[-2:]
+        position += len(buffer) - len(carry)
+
+    pending = { offset: starts.tolist() for offset, starts in pending.items() }
+    return orfs, pending, first_stops
+
+
+
+### Chunked Search ###
+
+def take_bases(blocks, n):
+    """
+    Cut a stream of blocks off after n bases.
+    """
+    for block in blocks:
+        if n <= 0:
+            break
+        if len(block) > n:
+            block = block[:n]
+        n -= len(block)
+        yield block
+
+
+def scan_chunk(reader, complement, start, stop, frames, min_length, block_size):
+    """
+    Search the codons starting in positions [start, stop) of one strand of a reader.
+
+    Reads two bases past the end of the chunk, so the last codons are complete.
+    """
+    length = stop - start + 2
+    blocks = reader.as_DNA(
+        complement=complement, offset=start, window_size=min(block_size, length), views=True
+    )
+    return scan_strand(take_bases(blocks, length), frames, min_length, position=start)
+
+
+def stitch_chunks(results, frames, min_length):
+    """
+    Combine the results of scan_chunk for consecutive chunks of a strand, in order.
+
+    Starts left open at the end of a chunk are closed by the first stop in a later chunk.
+    """
+    orfs        = { frame:  [] for frame in frames.values() }
+    open_starts = { offset: [] for offset in frames }
+
+    for chunk_orfs, chunk_pending, first_stops in results:
+        for offset, frame in frames.items():
+            stop = first_stops[offset]
+
+            # No stops in this chunk, so its starts stay open along with the earlier ones
+            if stop is None:
+                open_starts[offset] += chunk_pending[offset]
+                continue
+
+            # The first stop closes every start still open from earlier chunks
+            orfs[frame] += [
+                (frame, s, stop) for s in open_starts[offset] if stop - s >= min_length
+            ]
+            orfs[frame] += chunk_orfs[frame]
+            open_starts[offset] = chunk_pending[offset]
+
+    return orfs
+
+
+def find_orfs_chunked(reader, frames, min_length, processes, chunk_size, block_size, verbose=False):
+    """
+    Search the given frames of a reader by splitting each strand into chunks of chunk_size
+    bases and searching the chunks in parallel.
+
+    Returns a dict mapping each frame value to its ORFs, identical to a serial search.
+    """
+
+    # Default to one process per CPU
+    if processes is None:
+        processes = os.cpu_count()
+
+    # Split up the frames for each strand
+    strands = {
+        complement: { abs(f) - 1: f for f in frames if (f < 0) == complement }
+        for complement in (False, True)
+    }
+    strands = { complement: fs for complement, fs in strands.items() if len(fs) > 0 }
+
+    # Split each strand into chunks
+    tasks = [
+        (complement, start, min(start + chunk_size, len(reader)))
+        for complement in strands
+        for start in range(0, len(reader), chunk_size)
+    ]
+
+    worker = partial(_run_chunk, reader, strands, min_length, block_size)
+
+    # Search the chunks in a pool of processes (in order, so they can be stitched together)
+    if processes > 1:
+        with Pool(processes=processes) as pool:
+            results = pool.map(worker, tasks)
     else:
+        results = [ worker(task) for task in tasks ]
+
+    if verbose:
+        print(f"  - Searched {len(tasks)} chunks of up to {chunk_size} bases.")
+
+    # Stitch the chunks of each strand back together
+    orfs = {}
+    for complement, strand_frames in strands.items():
+        orfs.update(stitch_chunks(
+            [ result for (c, _, _), result in zip(tasks, results) if c == complement ],
+            strand_frames, min_length,
+        ))
+    return orfs
 
-        # Start timer
-        start_time = time.time()
 
-        # Create generator for amino acids, reading from specified frame
-        seq = self.translate(frame)
+def _run_chunk(reader, strands, min_length, block_size, task):
+    complement, start, stop = task
+    return scan_chunk(reader, complement, start, stop, strands[complement], min_length, block_size)
 
-        # Initialize loop variables
-        orfs   = []
-        starts = []
 
-        # Loop through amino acids one at a time
-        for idx, char in enumerate(seq):
 
-            # On start marker, add to list of current ORFs
-            if char == 'M':
-                starts.append(idx)
+def find_orfs(self, frame=None, min_length=3, processes=None, verbose=False, verbose_output=False, block_size=DEFAULT_BLOCK_SIZE, chunk_size=None):
+    """
+    Find all open reading frames in a given sequence.
+
+    If a reading frame is provided, searches that frame only.
 
-            # On stop marker, close all open ORFs and clear the list
-            elif char == '*':
-                orfs  += [ (frame, s, idx) for s in starts if idx - s >= min_length ]
-                starts = []
+    If not, searches all six reading frames, reading each strand once.
 
-        # Stop timer
-        end_time = time.time()
+    If a chunk size is provided, each strand is split into chunks of that many bases, which
+    are searched in parallel (by default one process per CPU) and stitched back together.
+
+    Without a chunk size, each strand is read serially in a single process, so processes has
+    no effect - passing more than one process without a chunk size gives a RuntimeWarning.
+    """
+
+    # Only accept valid frame values
+    assert frame is None or frame in frame_values
+
+    frames = frame_values if frame is None else [frame]
+
+    # Only the chunked search uses more than one process
+    if chunk_size is None and processes is not None and processes > 1:
+        warnings.warn(
+            f"find_orfs only uses multiple processes when a chunk_size is given; "
+            f"searching serially instead of with {processes} processes.",
+            RuntimeWarning, stacklevel=2,
+        )
+
+    # Start timer
+    start_time = time.time()
+
+    # Search chunks of each strand in parallel
+    if chunk_size is not None:
+        orfs = find_orfs_chunked(
+            self, frames, min_length, processes, chunk_size, block_size, verbose=verbose
+        )
+
+    # Read each strand once, searching all of its frames at the same time
+    else:
+        orfs = {}
+        for complement in (False, True):
+            strand_frames = { abs(f) - 1: f for f in frames if (f < 0) == complement }
+            if len(strand_frames) == 0:
+                continue
+
+            strand_start = time.time()
+            orfs.update(strand_orfs(
+                self.as_DNA(complement=complement, window_size=block_size, views=True),
+                strand_frames, min_length,
+            ))
+
+            if verbose:
+                strand = "reverse" if complement else "forward"
+                print(f"  - Read {strand} strand in {time.time() - strand_start} seconds.")
+
+    # Stop timer
+    end_time = time.time()
+
+    # Search a specific frame
+    if frame is not None:
 
         # Return the frame (for convenience), all found orfs, and the runtime
         if verbose_output:
-            return frame, orfs, end_time - start_time
+            return frame, orfs[frame], end_time - start_time
         else:
-            return orfs
+            return orfs[frame]
+
+    if verbose:
+        print("")
+        print(f"Actual elapsed time:   {end_time - start_time} seconds.")
+
+    # Return the built up list of ORFs
+    return [ orf for f in frame_values for orf in orfs[f] ]
@@ -0,0 +1,154 @@
+import os
+from functools       import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+from .align import align, align_scores, compiled_matrix, DEFAULT_TYPE, DEFAULT_MATRIX, DEFAULT_PENALTY
+
+
+# The default number of pairs of sequences in each task sent to a worker
+DEFAULT_CHUNK_SIZE = 64
+
+# The sequences being aligned, set once in each worker process by _init_worker
+# Tasks only refer to the sequences by index, so they're never pickled more than once per worker
+_queries = None
+_targets = None
+
+
+
+def _init_worker(queries, targets):
+    global _queries, _targets
+    _queries = queries
+    _targets = targets
+
+
+def _run_task(options, task):
+    """
+    Align one query against a range of targets, returning the scores (and alignments).
+    """
+    with_alignments, kwargs = options
+    i, start, stop = task
+
+    query   = _queries[i]
+    targets = _targets[start:stop]
+
+    # Score all the targets together, without building any matrices
+    if not with_alignments:
+        return i, start, align_scores(query, targets, **kwargs), None
+
+    # Find one alignment for each pair
+    results = [ align(query, target, one_result=True, **kwargs) for target in targets ]
+    return i, start, np.array([ score for score, _ in results ]), [ result for _, result in results ]
+
+
+
+def _as_bytes(seq):
+    """
+    Get the raw bases of a sequence (Seq, SeqView, SeqReader, str, etc.) as bytes.
+    """
+    from ._sequence import Seq
+    if isinstance(seq, bytes):
+        return seq
+    return Seq(seq).tobytes()
+
+
+def is_symmetric(score):
+    """
+    Check whether a scoring matrix gives the same score for each pair of bases in either order.
+    """
+    table = compiled_matrix(score)
+    return np.array_equal(table.scores, table.scores.T) and np.array_equal(table.valid, table.valid.T)
+
+
+def pair_tasks(num_queries, num_targets, chunk_size, symmetric):
+    """
+    Split the pairs of queries and targets into tasks of up to chunk_size pairs each.
+
+    Each task is a (query, start, stop) triple, aligning the query against a range of targets.
+    If symmetric is set, the queries and targets are the same sequences, and only the pairs
+    (i, j) with i < j are included.
+    """
+    for i in range(num_queries):
+        first = i + 1 if symmetric else 0
+        for start in range(first, num_targets, chunk_size):
+            yield i, start, min(start + chunk_size, num_targets)
+
+
+
+def align_all(
+    seqs, targets=None,
+    is_local    = DEFAULT_TYPE,
+    score       = DEFAULT_MATRIX,
+    gap_penalty = DEFAULT_PENALTY,
+    no_mismatch = False,
+    whole_seqs  = False,
+    alignments  = False,
+    processes   = None,
+    chunk_size  = DEFAULT_CHUNK_SIZE,
+):
+    """
+    Align every sequence in seqs against every sequence in targets, across a pool of processes.
+
+    The sequences can be Seq objects, strings, or SeqReaders (e.g. the output of read_all).
+
+    Returns a (len(seqs) x len(targets)) array of scores. If no targets are given, the sequences
+    are aligned all-vs-all, and the diagonal is NaN. With a symmetric scoring matrix, each pair
+    is only aligned once and the score array is symmetric; otherwise both orders are aligned.
+
+    If alignments is set, also returns a dict mapping each pair of indices (i, j) to one
+    optimal alignment of that pair (only with i < j, for all-vs-all with a symmetric matrix).
+    """
+
+    # Read each sequence into memory once, as raw bytes (which are cheap to send to the workers)
+    seqs       = [ _as_bytes(seq) for seq in seqs ]
+    all_vs_all = targets is None
+    targets    = seqs if all_vs_all else [ _as_bytes(seq) for seq in targets ]
+
+    # Swapping the sequences only gives the same score if the matrix is symmetric (the gap
+    # penalty is the same either way), so otherwise every ordered pair has to be aligned
+    symmetric = all_vs_all and is_symmetric(score)
+
+    kwargs = dict(is_local=is_local, score=score, gap_penalty=gap_penalty, no_mismatch=no_mismatch)
+    if alignments:
+        kwargs["whole_seqs"] = whole_seqs
+
+    tasks  = list(pair_tasks(len(seqs), len(targets), chunk_size, symmetric))
+    worker = partial(_run_task, (alignments, kwargs))
+
+    if processes is None:
+        processes = os.cpu_count()
+
+    # Send the sequences to each worker once, then hand out the tasks as workers free up
+    if processes > 1 and len(tasks) > 1:
+        with Pool(processes=processes, initializer=_init_worker, initargs=(seqs, targets)) as pool:
+            results = list(pool.imap_unordered(worker, tasks))
+
+    else:
+        _init_worker(seqs, targets)
+        try:
+            results = [ worker(task) for task in tasks ]
+        finally:
+            _init_worker(None, None)
+
+    # Collect the results into the score matrix
+    scores = np.full((len(seqs), len(targets)), np.nan)
+    found  = {}
+    for i, start, task_scores, task_alignments in results:
+        scores[i, start : start + len(task_scores)] = task_scores
+        if task_alignments is not None:
+            for j, alignment in enumerate(task_alignments, start):
+                found[i, j] = alignment
+
+    if symmetric:
+        upper = np.triu_indices(len(seqs), 1)
+        scores.T[upper] = scores[upper]
+
+    # Sequences aren't compared against themselves
+    elif all_vs_all:
+        np.fill_diagonal(scores, np.nan)
+        found = { pair: alignment for pair, alignment in found.items() if pair[0] != pair[1] }
+
+    if alignments:
+        return scores, found
+    return scores
@@ -1,14 +1,19 @@
 import os
 
 from ._sequence     import Seq
+from ._sequenceView import SeqView
 from ._constants    import protein_codes, frame_values
-from ._file_reading import read_byte_file
-from ._transform    import invert_gen
+from ._file_reading import base_position, read_byte_file
+from ._transform    import invert_gen, translate_buffer
 
 
 # The default window size for a reader
 DEFAULT_WINDOW_SIZE = 100
 
+# The default number of bases to translate at once
+# Must be a multiple of 3, so that every block starts on a codon boundary
+DEFAULT_BLOCK_SIZE = 3 * ((2 ** 20) // 3)
+
 
 
 class SeqCombiner:
@@ -41,16 +46,28 @@ class SeqReader:
 
     ### Initialization and Deletion ###
 
-    def __init__(self, name, desc, filename, num_lines, len_lines, window_size=DEFAULT_WINDOW_SIZE):
+    def __init__(
+        self, name, desc, filename, num_lines, len_lines, window_size=DEFAULT_WINDOW_SIZE,
+        byte_offset=0, line_bytes=None, length=None, owns_file=True,
+    ):
 
         # Set sequence info
         self.name = name
         self.desc = desc
 
-        # Store info about the tempfile where the sequence is stored
-        self.filename  = filename
-        self.num_lines = num_lines
-        self.len_lines = len_lines
+        # Store info about the file where the sequence is stored
+        # By default, this is a tempfile holding just this sequence, in lines of len_lines bases
+        # Sequences read straight from a FASTA file start byte_offset bytes into it instead,
+        # with each line taking up line_bytes bytes (including the line ending)
+        self.filename    = filename
+        self.num_lines   = num_lines
+        self.len_lines   = len_lines
+        self.byte_offset = byte_offset
+        self.line_bytes  = len_lines + len(b'\n') if line_bytes is None else line_bytes
+
+        # Only the original reader deletes the tempfile, not copies sent to other processes
+        # Files the reader didn't create (e.g. the FASTA file itself) are never deleted
+        self._owns_file = owns_file
 
         # Set the default window size
         self.window_size = window_size
@@ -58,18 +75,31 @@ class SeqReader:
         # self.is_local = False
         # self.sequence = None
 
-        # Compute the length of the final line
-        with open(self.filename, "r+b") as f:
-            f.seek((self.len_lines + len(b'\n')) * (self.num_lines - 1))
-            last_line = f.readline()
-            self.last_line_len = len(last_line)
+        # Compute the length of the final line, and of the sequence, if it isn't given
+        if length is None:
+            with open(self.filename, "r+b") as f:
+                f.seek(self.byte_offset + self.line_bytes * (self.num_lines - 1))
+                last_line = f.readline()
+                self.last_line_len = len(last_line)
+            length = ((self.num_lines - 1) * self.len_lines) + self.last_line_len
+        else:
+            self.last_line_len = length - (self.num_lines - 1) * self.len_lines if self.num_lines > 0 else 0
+
+        self.length = length
 
 
     def __del__(self):
         # print(f"Deleting file {self.filename}...")
-        if os.path.exists(self.filename):
+        if getattr(self, '_owns_file', False) and os.path.exists(self.filename):
             os.remove(self.filename)
 
+    def __getstate__(self):
+        # Copies made by pickling (e.g. when sent to a worker process) share the original's
+        # tempfile, so they mustn't delete it when they're garbage collected
+        state = self.__dict__.copy()
+        state['_owns_file'] = False
+        return state
+
 
 
     ### Imported Methods ###
@@ -104,53 +134,159 @@ class SeqReader:
     ### Sequence Length ###
 
     def __len__(self):
-        return ((self.num_lines - 1) * self.len_lines) + self.last_line_len
+        return self.length
+
+
+
+    ### Random Access ###
+
+    def fetch(self, start=None, end=None, strand="+"):
+        """
+        Read the bases in [start, end) of the sequence, seeking straight to them in the file.
+
+        Start and end work like slice indices. On the "-" strand, returns the reverse complement
+        of the same bases.
+        """
+        if strand not in ("+", "-"):
+            raise ValueError(f"Unknown strand '{strand}' (should be '+' or '-').")
+
+        bounds = range(len(self))[start:end]
+        if len(bounds) == 0:
+            return Seq()
+
+        # Position in the file of the first base, and just past the last one
+        first = base_position(bounds.start,    self.len_lines, self.byte_offset, self.line_bytes)
+        last  = base_position(bounds.stop - 1, self.len_lines, self.byte_offset, self.line_bytes) + 1
+        with open(self.filename, "rb") as f:
+            f.seek(first)
+            raw = f.read(last - first)
+
+        # Drop the line endings in between
+        seq = Seq(raw.translate(None, b'\r\n'))
+        return seq if strand == "+" else ~seq
+
+
+
+    ### Indexing ###
+
+    def build_index(self):
+        """
+        Build a SeqIndex over the sequence, for fast repeated substring searches.
+
+        The index holds the whole sequence in memory, and can be saved with SeqIndex.save.
+        """
+        from ._index import SeqIndex
+        return SeqIndex(self)
+
+
+    def finditer(self, motif, mismatches=0, window_size=None):
+        """
+        Find every position of a motif in the sequence (including overlapping matches).
+
+        The motif can use IUPAC codes, and may match with up to `mismatches` differences. The
+        file is searched window_size bases at a time, including matches that span two windows.
+        """
+        from ._motif import DEFAULT_WINDOW_SIZE, finditer_blocks
+
+        if window_size is None:
+            window_size = DEFAULT_WINDOW_SIZE
+
+        return finditer_blocks(motif, self.as_DNA(window_size=window_size, views=True), mismatches)
+
+
+    def search(self, query, **kwargs):
+        """
+        Search for a query in the sequence with seeds and extension, like BLAST.
+
+        The file is streamed, rather than read into memory. Takes the same options as search().
+        """
+        from ._search import search
+        return search(query, self, **kwargs)
+
+
+    def translated_search(self, query, **kwargs):
+        """
+        Search for a protein query in all six reading frames of the sequence, in one pass over
+        the file. Takes the same options as translated_search().
+        """
+        from ._translatedSearch import translated_search
+        return translated_search(query, self, **kwargs)
 
 
 
     ### Transcription and Translation ###
 
-    def as_DNA(self, complement=False, offset=0, window_size=None):
+    def _read_chunks(self, reverse=False, offset=0, window_size=None, views=False):
 
         # Get the default window size, if none is provided
         if window_size is None:
             window_size = self.window_size
 
-        # Read chunks from the temp file and map to Seq objects
-        generator = map( Seq, read_byte_file(
+        # Read chunks from the temp file and map to Seq objects (or wrap them in read-only views,
+        # without copying them again)
+        return map( SeqView if views else Seq, read_byte_file(
             self.filename, self.len_lines, self.num_lines,
-            window_size=window_size, reverse=complement,
-            offset=offset,
+            window_size=window_size, reverse=reverse,
+            offset=offset, byte_offset=self.byte_offset,
+            line_bytes=self.line_bytes, length=self.length,
         ))
 
+
+    # Windows are Seqs, unless views=True - then they're SeqViews of the bytes read from the file,
+    # which saves copying each one (complemented windows are always new Seqs)
+    def as_DNA(self, complement=False, offset=0, window_size=None, views=False):
+
+        generator = self._read_chunks(complement, offset, window_size, views)
+
         # Invert the bases coming out of the generator, if applicable
         if complement:    yield from invert_gen(generator)
         else:             yield from            generator
 
 
     def as_RNA(self, complement=False, offset=0, window_size=None):
-        yield from Seq.dna_to_rna(
-            self.as_DNA(complement, offset, window_size),
-            as_generator=True
-        )
 
-    def translate(self, frame=1):
+        # Complement straight to RNA bases, rather than complementing and then transcribing
+        if complement:
+            yield from invert_gen(
+                self._read_chunks(complement, offset, window_size), is_RNA=True
+            )
+
+        else:
+            yield from Seq.dna_to_rna(
+                self.as_DNA(complement, offset, window_size),
+                as_generator=True
+            )
+
+    def translate(self, frame=1, block_size=DEFAULT_BLOCK_SIZE, as_chunks=False):
+        """
+        Translate the sequence in the given reading frame.
+
+        Reads and translates block_size bases at a time. By default yields one amino acid at a
+        time (None where a codon can't be translated); if as_chunks is set, yields the protein
+        for each block as a string instead (with '?' where a codon can't be translated).
+        """
 
         # Only accept valid frame values
         assert frame in frame_values
 
+        # Blocks have to be whole codons, so no codon is split across two of them
+        assert block_size % 3 == 0, "Block size must be a multiple of 3."
+
         # Offset is one closer to 0 than the frame identifier
         offset = frame - (1 if frame > 0 else -1)
 
-        yield from Seq.translate(
-            self.as_RNA(
-                complement  = frame < 0,
-                offset      = abs(offset),
-                window_size = 3,
-            ),
-            as_generator=True
+        # T and U translate the same, so the blocks can be read as DNA
+        blocks = self.as_DNA(
+            complement  = frame < 0,
+            offset      = abs(offset),
+            window_size = block_size,
         )
 
+        if as_chunks:
+            yield from ( translate_buffer(block) for block in blocks )
+        else:
+            yield from Seq.translate(blocks, as_generator=True)
+
     def __and__(self, other):
         return SeqCombiner( Seq.__and__, self, other )
 
@@ -194,92 +330,65 @@ def read_first(filename, **kwargs):
 
 
 # Produce SeqReaders for all matching sequences in the file
+# Uses the file's .fai index (building and saving one if needed) to read each sequence straight
+# from the file, without copying it
+# Note that the index is written next to the file, as <filename>.fai - if that directory can't be
+# written to, the file is scanned again each time it's read instead
 def read_all(filename, name=None, id_filter=None, size=None):
 
-    from tempfile import NamedTemporaryFile
+    from ._fastaIndex import fasta_records
 
     # Default value for match function is equality
     if id_filter is None:
         id_filter = lambda a, b: b is None or a == b
 
-    # Initialize vars to track most recent Reader and positions in file
-    tempfile  = None
-    num_lines = 0
-    len_lines = 80
+    for record, desc, regular in fasta_records(filename):
+        if not id_filter(record.name, name):
+            continue
+
+        # Records with lines of different lengths can't be read through the index, so they're
+        # copied into a tempfile with regular lines first
+        if not regular:
+            yield copy_record(filename, record, desc)
+            continue
+
+        num_lines = -(-record.length // record.line_bases) if record.length > 0 else 0
+        yield SeqReader(
+            record.name, desc, filename, num_lines, record.line_bases,
+            byte_offset=record.offset, line_bytes=record.line_bytes, length=record.length,
+            owns_file=False,
+        )
 
-    line_buffer = ""
 
-    def reset_loop_vars():
-        nonlocal tempfile, num_lines, line_buffer
+# Copy the bases of one record of a FASTA file into a tempfile, in lines of len_lines bases,
+# and produce a SeqReader for it
+def copy_record(filename, record, desc, len_lines=80):
 
-        tempfile    = None
-        num_lines   = 0
-        line_buffer = ""
+    from tempfile import NamedTemporaryFile
 
+    num_lines   = 0
+    length      = 0
+    line_buffer = b""
 
-    def write_buffer(line):
-        nonlocal tempfile, num_lines, len_lines, line_buffer
+    with open(filename, "rb") as f, NamedTemporaryFile(delete=False) as tempfile:
+        f.seek(record.offset)
 
-        if tempfile is not None:
+        # Copy lines until the next header (or the end of the file), skipping blank space
+        for line in f:
+            if line[:1] == b'>':
+                break
 
             line_buffer += line.strip()
-
+            length      += len(line.strip())
             while len(line_buffer) > len_lines:
-
-                tempfile.write(bytearray(line_buffer[0:len_lines], encoding="utf-8"))
+                tempfile.write(line_buffer[0:len_lines])
                 tempfile.write(b"\n")
 
                 line_buffer = line_buffer[len_lines:]
                 num_lines += 1
 
-
-    def empty_buffer():
-        nonlocal tempfile, num_lines, len_lines, line_buffer
-
         if len(line_buffer) > 0:
-            tempfile.write(bytearray(line_buffer, encoding="utf-8"))
+            tempfile.write(line_buffer)
             num_lines += 1
 
-
-
-    # Read the file
-    with open(filename, "r") as f:
-
-        # Ensure first line is a valid FASTA identifier line
-        line = f.readline()
-        if line[0] != '>':
-            raise Exception("Invalid FASTA file: First line must begin with '>'.")
-
-        # Loop through the lines, skipping blank space
-        while line:
-            if len(line.strip()) == 0: continue
-
-            # Start of new sequence
-            if line[0] == '>':
-
-                # If we were building a previous sequence, finish it and reset
-                if tempfile is not None:
-                    empty_buffer()
-                    # tempfile.seek(0)
-                    yield SeqReader(seq_id, seq_desc, tempfile.name, num_lines, len_lines)
-                    reset_loop_vars()
-
-                # Parse out the sequence ID and description
-                seq_id, seq_desc = parse_id_and_desc(line)
-
-                # If ID matches filter, start building a new sequence
-                if id_filter(seq_id, name):
-                    tempfile = NamedTemporaryFile(delete=False)
-
-            # Content line of existing sequence
-            else:
-                write_buffer(line)
-
-            # Move to next line
-            line = f.readline()
-
-    # Yield the final sequence we were building
-    if tempfile is not None:
-        empty_buffer()
-        # tempfile.seek(0)
-        yield SeqReader(seq_id, seq_desc, tempfile.name, num_lines, len_lines)
+    return SeqReader(record.name, desc, tempfile.name, num_lines, len_lines, length=length)
@@ -0,0 +1,336 @@
+from collections import namedtuple
+
+import numpy as np
+
+from .align     import compiled_matrix, fill_banded_matrices, find_max_idxs, traceback, build_alignment
+from ._assembly import kmer_hashes
+
+
+# Default k-mer length for seeding hits (the same as blastn)
+DEFAULT_K = 11
+
+# Default number of bases to read from a file at once
+DEFAULT_WINDOW_SIZE = 2 ** 20
+
+# Number of low bits of each k-mer hash used to filter the target's k-mers before looking them up
+FILTER_BITS = 22
+
+# Number of query bases on either side of an ungapped hit to start the gapped alignment with
+GAPPED_WINDOW = 64
+
+# Strands to search, as the sign of each
+STRANDS = { "+": (1,), "-": (-1,), "both": (1, -1) }
+
+
+# A hit of the query against the target
+#   - score:  the score of the gapped local alignment
+#   - strand: '+' if the query matches the target, '-' if its reverse complement does
+#   - query_start, query_end:   the aligned part of the query (on the query itself, even for '-' hits)
+#   - target_start, target_end: the aligned part of the target (on its forward strand)
+#   - alignment: the aligned (query, target) Seqs - for '-' hits, the reverse complement of the query
+SearchHit = namedtuple('SearchHit', [
+    'score', 'strand', 'query_start', 'query_end', 'target_start', 'target_end', 'alignment',
+])
+
+
+
+### Scoring ###
+
+def search_table(score):
+    """
+    Get the substitution scores to search with, as a 256 x 256 array.
+
+    Pairs of bytes that aren't in the scoring matrix (e.g. ambiguous bases in the target)
+    score the same as the worst mismatch, rather than stopping the search.
+    """
+    table  = compiled_matrix(score)
+    scores = table.scores.astype(np.float64)
+    return np.where(table.valid, scores, scores[table.valid].min())
+
+
+
+### Seeding ###
+
+def query_kmers(query, k):
+    """
+    Hash the k-mers of the query, sorted so the target's k-mers can be looked up in them.
+
+    Also returns a bitmap of the low bits of every hash, so most of the target's k-mers can be
+    ruled out with a single lookup.
+    """
+    hashes, positions = kmer_hashes(query, k)
+    order = np.argsort(hashes, kind='stable')
+
+    bitmap = np.zeros(1 << FILTER_BITS, dtype=bool)
+    bitmap[hashes & np.uint64((1 << FILTER_BITS) - 1)] = True
+    return hashes[order], positions[order], bitmap
+
+
+def find_seeds(kmers, text, k):
+    """
+    Find every k-mer of the text that's also in the query.
+
+    Returns two arrays, the positions of each seed in the query and in the text, ordered by
+    position in the text.
+    """
+    query_hashes, query_positions, bitmap = kmers
+    hashes, positions = kmer_hashes(text, k)
+
+    # Only look up the k-mers that pass the bitmap
+    maybe     = bitmap[hashes & np.uint64((1 << FILTER_BITS) - 1)]
+    hashes    = hashes[maybe]
+    positions = positions[maybe]
+
+    first = np.searchsorted(query_hashes, hashes, side='left')
+    last  = np.searchsorted(query_hashes, hashes, side='right')
+    count = last - first
+
+    # Pair each k-mer of the text with every occurrence of it in the query
+    text_pos  = np.repeat(positions, count)
+    offsets   = np.arange(len(text_pos)) - np.repeat(np.cumsum(count) - count, count)
+    query_pos = query_positions[np.repeat(first, count) + offsets]
+    return query_pos, text_pos
+
+
+
+### Extension ###
+
+def xdrop_extend(pair_scores, xdrop):
+    """
+    Extend along a diagonal until the score drops more than xdrop below the best so far.
+
+    Returns the number of bases in the best extension, and its score.
+    """
+    if len(pair_scores) == 0:
+        return 0, 0.0
+
+    totals = np.cumsum(pair_scores)
+    best   = np.maximum.accumulate(np.maximum(totals, 0))
+
+    # Stop at the first drop, and take the best point before it
+    drops = np.flatnonzero(totals < best - xdrop)
+    if len(drops) > 0:
+        totals = totals[:drops[0]]
+
+    if len(totals) == 0 or totals.max() <= 0:
+        return 0, 0.0
+    length = int(np.argmax(totals))
+    return length + 1, float(totals[length])
+
+
+def ungapped_extend(sub, query, text, q, t, k, xdrop):
+    """
+    Extend a seed at query[q:q+k] = text[t:t+k] in both directions, without gaps.
+
+    Returns the (query_start, text_start, length, score) of the extended hit.
+    """
+    seed_score = float(sub[query[q : q + k], text[t : t + k]].sum())
+
+    # To the right of the seed
+    n = min(len(query) - q - k, len(text) - t - k)
+    right, right_score = xdrop_extend(sub[query[q + k : q + k + n], text[t + k : t + k + n]], xdrop)
+
+    # To the left of the seed, moving backwards
+    n = min(q, t)
+    left, left_score = xdrop_extend(sub[query[q - n : q][::-1], text[t - n : t][::-1]], xdrop)
+
+    return q - left, t - left, left + k + right, seed_score + left_score + right_score
+
+
+def gapped_extend(sub, query, text, q, t, length, gap_penalty, band):
+    """
+    Find the best local alignment of the query against the text, within a band around the
+    diagonal of the ungapped hit query[q:q+length] = text[t:t+length].
+
+    Only the part of the query around the hit is aligned at first; if the alignment gets close
+    to either end of that part, it's doubled in size and aligned again. So weak hits are cheap to
+    rule out, however long the query is.
+
+    Returns the score, the source and end of the alignment (as (query, text) positions), and
+    the path between them.
+    """
+    diagonal = t - q
+    extra    = GAPPED_WINDOW
+
+    while True:
+        first = max(0, q - extra)
+        last  = min(len(query), q + length + extra)
+
+        # Only align the part of the text the band can reach
+        start = max(0, diagonal + first - band)
+        stop  = min(len(text), diagonal + last + band)
+        segment = text[start:stop]
+
+        # The band is measured from the main diagonal of the matrix (stretched by the
+        # difference in lengths), so widen it to cover the hit's diagonal
+        width = band + abs(diagonal + first - start) + abs(len(segment) - (last - first))
+
+        score_matrix, arrow_matrix = fill_banded_matrices(
+            query[first:last], segment, sub, True, gap_penalty, width
+        )
+
+        end = find_max_idxs(score_matrix)[0]
+        source, path = next(traceback(score_matrix, arrow_matrix, end))
+
+        # Try again with more of the query, if the alignment gets close to either end (a bad
+        # patch just before the end could hide a longer alignment past it)
+        near_first = source[0] < extra // 2                   and first > 0
+        near_last  = end[0] > last - first - extra // 2       and last < len(query)
+        if not (near_first or near_last):
+            break
+        extra *= 2
+
+    score  = float(score_matrix[end])
+    source = ( first + int(source[0]), start + int(source[1]) )
+    end    = ( first + int(end[0]),    start + int(end[1])    )
+    return score, source, end, path
+
+
+
+### Searching ###
+
+def search_strand(
+    query, blocks, kmers, sub, k, gap_penalty, xdrop, gap_trigger, min_score, band
+):
+    """
+    Search one strand of the query against a stream of blocks of the target.
+
+    Yields (score, query_start, query_end, target_start, target_end, alignment) for every
+    gapped hit scoring at least min_score. Hits are found in order of their first seed.
+    """
+    from ._sequence import Seq, _byte_array
+
+    query_seq = Seq(query)
+    query     = _byte_array(query_seq)
+
+    # Bases of context needed on either side of a seed, to extend it as far as it can go
+    margin = len(query) + 2 * band + k
+
+    buffer = np.zeros(0, dtype=np.uint8)
+    offset = 0      # Position of the start of the buffer in the target
+    done   = 0      # Seeds before this position in the target have been searched
+    hits   = []
+
+    def search_buffer(stop):
+        """
+        Extend the seeds starting between done and stop, using the whole buffer as context.
+        """
+        query_pos, text_pos = find_seeds(kmers, buffer[done - offset : stop - offset + k - 1], k)
+        text_pos = text_pos + (done - offset)
+
+        # The furthest point reached along each diagonal, so seeds inside a hit are skipped
+        reached = {}
+
+        for q, t in zip(query_pos.tolist(), text_pos.tolist()):
+            diagonal = t - q
+            if t < reached.get(diagonal, -1):
+                continue
+
+            qs, ts, length, score = ungapped_extend(sub, query, buffer, q, t, k, xdrop)
+            reached[diagonal] = ts + length
+            if score < gap_trigger:
+                continue
+
+            # Skip seeds inside a gapped hit that's already been found
+            if any( hit[1] <= q < hit[2] and hit[3] <= offset + t < hit[4] for hit in hits ):
+                continue
+
+            score, source, end, path = gapped_extend(
+                sub, query, buffer, qs, ts, length, gap_penalty, band
+            )
+            if score < min_score:
+                continue
+
+            aligned = Seq(buffer[source[1] : end[1]].tobytes())
+            hit = (
+                score, source[0], end[0], offset + source[1], offset + end[1],
+                build_alignment(query_seq, aligned, (source[0], 0), path, None, False),
+            )
+
+            # Different seeds can extend to the same alignment
+            if not any( old[1:5] == hit[1:5] for old in hits ):
+                hits.append(hit)
+                yield hit
+
+    for block in blocks:
+        buffer = np.concatenate(( buffer, _byte_array(block) ))
+
+        stop = offset + len(buffer) - margin
+        if stop > done:
+            yield from search_buffer(stop)
+            done = stop
+
+        # Drop the bases that are no longer needed as context
+        drop   = max(0, done - margin - offset)
+        buffer = buffer[drop:]
+        offset += drop
+
+        # Forget the hits that are too far back to overlap a new one
+        hits = [ hit for hit in hits if hit[4] > offset ]
+
+    yield from search_buffer(offset + len(buffer))
+
+
+def search(
+    query, target,
+    k           = DEFAULT_K,
+    score       = (2, -3),
+    gap_penalty = -5,
+    xdrop       = 20,
+    gap_trigger = 40,
+    min_score   = 50,
+    band        = 16,
+    strand      = "both",
+    max_hits    = None,
+    window_size = DEFAULT_WINDOW_SIZE,
+):
+    """
+    Search for a query in a (possibly very long) target sequence, like BLAST.
+
+    The target can be a Seq, SeqView, string, or SeqReader - a SeqReader is streamed
+    window_size bases at a time, so it's never read into memory all at once.
+
+    Exact k-mer seeds shared by the query and the target are extended without gaps until the
+    score drops xdrop below the best so far. Seeds whose ungapped extension scores at least
+    gap_trigger are then aligned with gaps, within a band around their diagonal. Gapped hits
+    scoring at least min_score are kept.
+
+    Returns a list of SearchHits, best first (at most max_hits of them, if given).
+    """
+    from ._sequence import Seq
+
+    if strand not in STRANDS:
+        raise ValueError(f"Unknown strand '{strand}' (should be one of {', '.join(STRANDS)}).")
+
+    query = Seq(query)
+    if len(query) < k:
+        raise ValueError(f"Query is shorter than the seed length ({len(query)} < {k}).")
+
+    if not hasattr(target, 'as_DNA'):
+        target = Seq(target)
+
+    sub = search_table(score)
+
+    results = []
+    for sign in STRANDS[strand]:
+        strand_query = query if sign > 0 else ~query
+        kmers = query_kmers(strand_query, k)
+
+        hits = search_strand(
+            strand_query, target.as_DNA(window_size=window_size, views=True), kmers,
+            sub, k, gap_penalty, xdrop, gap_trigger, min_score, band,
+        )
+
+        for hit_score, query_start, query_end, target_start, target_end, alignment in hits:
+
+            # Coordinates on the reverse complement are flipped back onto the query
+            if sign < 0:
+                query_start, query_end = len(query) - query_end, len(query) - query_start
+
+            results.append(SearchHit(
+                hit_score, "+" if sign > 0 else "-",
+                query_start, query_end, target_start, target_end, alignment,
+            ))
+
+    results.sort(key=lambda hit: (-hit.score, hit.target_start, hit.strand))
+    return results[:max_hits]
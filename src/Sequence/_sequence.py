@@ -1,7 +1,55 @@
 from array import array
 
-from ._transform import _translate
-from ._constants import base_to_bin, bin_to_dna, bin_to_rna
+import numpy as np
+
+from ._transform import _translate, translate_frames
+from ._constants import INVALID_CODE, base_to_bin_table, bin_to_dna_table
+from ._constants import dna_complement_table, rna_complement_table
+
+
+# Numpy versions of the base <-> bin lookup tables, for operating on whole buffers at once
+_to_bin = np.frombuffer(base_to_bin_table, dtype=np.uint8)
+_to_dna = np.frombuffer(bin_to_dna_table,  dtype=np.uint8)
+
+_GAP = ord('-')
+
+
+def _byte_array(seq):
+    """
+    View the raw bytes of a sequence as a numpy array (without copying, where possible).
+    """
+    if isinstance(seq, str):
+        seq = seq.encode('utf8')
+    elif isinstance(seq, SeqView):
+        seq = seq._buffer()
+    return np.frombuffer(seq, dtype=np.uint8)
+
+
+def _zip_arrays(seq1, seq2):
+    """
+    Get the byte arrays of two sequences, cut to the length of the shorter one (like zip).
+    """
+    x = _byte_array(seq1)
+    y = _byte_array(seq2)
+    n = min(len(x), len(y))
+    return x[:n], y[:n]
+
+
+def _combine_bins(seq1, seq2, op):
+    """
+    Apply a bitwise operation to the 4-bit codes of two sequences, and convert back to bases.
+    """
+    x, y = _zip_arrays(seq1, seq2)
+    x, y = _to_bin[x], _to_bin[y]
+
+    # Raise the same error as a failed lookup in base_to_bin
+    for codes, raw in ((x, seq1), (y, seq2)):
+        if len(codes) > 0 and codes.max() == INVALID_CODE:
+            raise KeyError(int(_byte_array(raw)[np.argmax(codes == INVALID_CODE)]))
+
+    return Seq(_to_dna[op(x, y) & 0x0F].tobytes())
+
+
 
 class Seq(array):
 
@@ -11,12 +59,13 @@ class Seq(array):
 
     ### Initialization ###
 
-    def __new__(cls, seq=None):
+    def __new__(cls, seq=None, rna=False):
         return array.__new__(cls, 'B')
 
     def __init__(self, seq=None, rna=False):
 
-        from ._reader import SeqReader
+        from ._reader         import SeqReader
+        from ._sequencePacked import PackedSeq
 
         self._is_rna = rna
 
@@ -32,6 +81,15 @@ class Seq(array):
             elif isinstance(seq, str):
                 super().extend(bytearray(seq, 'utf8'))
 
+            elif isinstance(seq, (bytes, bytearray, memoryview)):
+                self.frombytes(seq)
+
+            elif isinstance(seq, SeqView):
+                self.frombytes(seq._buffer())
+
+            elif isinstance(seq, PackedSeq):
+                self.frombytes(seq.tobytes())
+
             elif isinstance(seq, SeqReader):
                 for subseq in seq.as_DNA():
                     self.extend(subseq)
@@ -59,9 +117,22 @@ class Seq(array):
     from ._transform import base_count
 
 
-    def scan(self, window_size):
+    ### Packed Storage ###
+
+    def pack(self, bits=4):
+        """
+        Convert to a PackedSeq, storing each base in 4 bits (or 2 bits, for mostly-ACGT sequences).
+        """
+        from ._sequencePacked import PackedSeq
+        return PackedSeq(self, bits=bits)
+
+
+    # Split the sequence into windows of window_size bases
+    # The windows are copies, unless views=True - views don't copy any bases, but the Seq can't
+    # change size while any of them are alive
+    def scan(self, window_size, views=False):
         for i in range(0, len(self), window_size):
-            yield self[i : i + window_size]
+            yield self.view(i, i + window_size) if views else self[i : i + window_size]
 
 
 
@@ -82,6 +153,10 @@ class Seq(array):
     # Concatenation (+ operator)
     def __add__(self, other):
 
+        # Views are copied into a Seq first
+        if isinstance(other, SeqView):
+            other = other.copy()
+
         # Concat two Seqs
         if isinstance(other, self.__class__):
             new_seq = Seq()
@@ -102,6 +177,10 @@ class Seq(array):
     # Concatenation (+ operator), where Sequence is the second element
     def __radd__(self, other):
 
+        # Views are copied into a Seq first
+        if isinstance(other, SeqView):
+            other = other.copy()
+
         # Concat two Seqs
         if isinstance(other, self.__class__):
             new_seq = Seq()
@@ -121,6 +200,10 @@ class Seq(array):
     # Concatenation, in-place (+= operator)
     def __iadd__(self, other):
 
+        # Views are copied into a Seq first
+        if isinstance(other, SeqView):
+            other = other.copy()
+
         # Concat two Seqs
         if isinstance(other, self.__class__):
             self.extend(other)
@@ -171,14 +254,10 @@ class Seq(array):
         if isinstance(other, SeqReader):
             return other.__rand__(self)
 
-        if not isinstance(other, Seq):
+        if not isinstance(other, (Seq, SeqView)):
             other = Seq(other)
 
-        return Seq([
-            # x if x == y else ord('-')
-            bin_to_dna[base_to_bin[x] & base_to_bin[y]]
-            for x, y in zip(self, other)
-        ])
+        return _combine_bins(self, other, np.bitwise_and)
 
     def __rand__(self, other):
         return Seq(other) & self
@@ -196,10 +275,10 @@ class Seq(array):
         if isinstance(other, SeqReader):
             return other.__ror__(self)
 
-        return Seq([
-            bin_to_dna[base_to_bin[x] | base_to_bin[y]]
-            for x, y in zip(self, other)
-        ])
+        if not isinstance(other, (Seq, SeqView)):
+            other = Seq(other)
+
+        return _combine_bins(self, other, np.bitwise_or)
 
     def __ror__(self, other):
         return Seq(other) | self
@@ -218,12 +297,14 @@ class Seq(array):
         if isinstance(other, SeqReader):
             return other.__rxor__(self)
 
-        gap = ord('-')
+        if not isinstance(other, (Seq, SeqView)):
+            other = Seq(other)
+
+        x, y = _zip_arrays(self, other)
 
-        return Seq([
-            x if x == y or y == gap else (y if x == gap else gap)
-            for x, y in zip(self, other)
-        ])
+        return Seq(np.where(
+            (x == y) | (y == _GAP), x, np.where(x == _GAP, y, _GAP)
+        ).astype(np.uint8).tobytes())
 
     def __rxor__(self, other):
         return Seq(other) ^ self
@@ -235,10 +316,11 @@ class Seq(array):
 
     # For each position, remove possibility of the base in `other` existing there
     def __sub__(self, other):
-        return Seq([
-            bin_to_dna[base_to_bin[x] & ~base_to_bin[y]]
-            for x, y in zip(self, other)
-        ])
+
+        if not isinstance(other, (Seq, SeqView)):
+            other = Seq(other)
+
+        return _combine_bins(self, other, lambda x, y: x & ~y)
 
     def __rsub__(self, other):
         return Seq(other) - self
@@ -251,16 +333,32 @@ class Seq(array):
 
     ### Complements ###
 
-    # Compute the complement of a sequence
+    # Complement each base, without reversing the sequence
+    # Uses RNA bases (U instead of T) if rna is set, or if rna is None and this is an RNA sequence
+    def complement(self, rna=None):
+
+        if rna is None:
+            rna = getattr(self, '_is_rna', False)
+
+        raw  = self.tobytes()
+        comp = raw.translate(rna_complement_table if rna else dna_complement_table)
+
+        # Raise the same error as a failed lookup in base_to_bin
+        bad = comp.find(INVALID_CODE)
+        if bad >= 0:
+            raise KeyError(raw[bad])
+
+        return Seq(comp, rna=rna)
+
+    # Compute the (reverse) complement of a sequence
     def __invert__(self):
-        return Seq([
-            bin_to_dna[((base_to_bin[b] >> 2) & 0b0011) | ((base_to_bin[b] << 2) & 0b1100)]
-            for b in self[::-1]
-        ])
+        seq = self.complement()
+        seq.reverse()
+        return seq
 
     # Check whether two sequences are complements of one another
     def __mod__(self, other):
-        if isinstance(other, self.__class__):
+        if isinstance(other, (Seq, SeqView)):
             return self == ~other
         elif isinstance(other, str):
             return ~self == other
@@ -289,19 +387,45 @@ class Seq(array):
 
 
 
-    # Perform some functions by just converting to string
-
+    # Hash the raw bytes, without decoding them to a string
     def __hash__(self):
-        return str(self).__hash__()
+        return hash(self.tobytes())
 
+    # Search for a subsequence, comparing as strings (so any type of sequence can be searched for)
+    # For repeated searches of the same sequence, build a SeqIndex instead
     def __contains__(self, other):
         return str(self).__contains__(str(other))
 
+    def build_index(self):
+        """
+        Build a SeqIndex over the sequence, for fast repeated substring searches.
+        """
+        from ._index import SeqIndex
+        return SeqIndex(self)
+
+
+    # Search for a motif, which can use IUPAC codes (e.g. N, R, Y) to match several bases
+    # Allows up to `mismatches` positions that don't match
+    def find(self, motif, start=0, end=None, mismatches=0):
+        from ._motif import find
+        return find(self, motif, start, end, mismatches)
+
+    def finditer(self, motif, start=0, end=None, mismatches=0):
+        from ._motif import finditer
+        return finditer(self, motif, start, end, mismatches)
+
 
 
     ### Replace ###
 
     def replace(self, source, target):
+
+        # Swap a single byte value using a translation table over the whole buffer
+        if isinstance(source, int) and isinstance(target, int):
+            table = bytearray(range(256))
+            table[source] = target
+            return Seq(self.tobytes().translate(table))
+
         return Seq([ target if b == source else b for b in self ])
 
     def transform(self, lookup):
@@ -317,13 +441,14 @@ class Seq(array):
     def to_RNA(self):
         return Seq.dna_to_rna(self)
 
-    def as_DNA(self, complement=False, offset=0, window_size=None):
+    # Windows are copies, unless views=True (see scan)
+    def as_DNA(self, complement=False, offset=0, window_size=None, views=False):
 
         # Get the default window size, if none is provided
         if window_size is None:
-            window_size = len(self)
+            window_size = max(1, len(self))
 
-        yield from self.scan(window_size=window_size)
+        yield from self.scan(window_size=window_size, views=views)
 
     def as_RNA(self, complement=False, offset=0, window_size=None):
 
@@ -344,6 +469,10 @@ class Seq(array):
         kwargs["as_generator"] = False
         return Seq( _translate(self.to_RNA(), **kwargs) )
 
+    # Translate all three forward reading frames from a single pass over the sequence
+    def translate_frames(self, ambiguous=False):
+        return [ Seq(protein) for protein in translate_frames(self, ambiguous=ambiguous) ]
+
 
     ### Indexing ###
 
@@ -353,6 +482,11 @@ class Seq(array):
     def get_raw(self, elem):
         return super().__getitem__(elem)
 
+    # Get a read-only view of part of the sequence, without copying it
+    # The Seq can't change size while any views of it exist
+    def view(self, start=None, stop=None, step=None):
+        return SeqView(self, slice(start, stop, step))
+
     # def __iter__(self):
     #     # print( [ chr(b) for b in iter(super(array, self)) ] )
 
@@ -366,3 +500,6 @@ class Seq(array):
     #     return iter("abc")
     #     # return super().__iter__()
 
+
+
+from ._sequenceView import SeqView
@@ -0,0 +1,335 @@
+import numpy as np
+
+from ._constants import (
+    INVALID_CODE, base_to_bin_table, bin_to_dna_table, bin_to_rna_table, bin_to_2bit,
+)
+
+
+# Numpy versions of the lookup tables
+_to_bin  = np.frombuffer(base_to_bin_table, dtype=np.uint8)
+_to_dna  = np.frombuffer(bin_to_dna_table,  dtype=np.uint8)
+_to_rna  = np.frombuffer(bin_to_rna_table,  dtype=np.uint8)
+
+# Map 4-bit codes to 2-bit codes and back
+# Codes that can't be stored in 2 bits map to INVALID_CODE
+_bin_to_2bit = np.full(16, INVALID_CODE, dtype=np.uint8)
+_2bit_to_bin = np.zeros(4, dtype=np.uint8)
+for _code, _twobit in bin_to_2bit.items():
+    _bin_to_2bit[_code]   = _twobit
+    _2bit_to_bin[_twobit] = _code
+
+# Complement of each 4-bit code: swap the high and low pairs of bits
+# (A <-> T, C <-> G, R <-> Y, etc.)
+_complement = np.array([
+    ((b >> 2) & 0b0011) | ((b << 2) & 0b1100) for b in range(16)
+], dtype=np.uint8)
+
+# Complement of a packed byte holding two 4-bit codes, with the two codes swapped
+# Reversing a packed buffer and translating it with this table gives the reverse complement
+_invert_packed = bytes(
+    (int(_complement[b & 0x0F]) << 4) | int(_complement[b >> 4]) for b in range(256)
+)
+
+
+
+def encode(seq):
+    """
+    Convert a sequence of ASCII bases to a numpy array of 4-bit codes.
+    """
+    if isinstance(seq, str):
+        seq = seq.encode('utf8')
+
+    codes = _to_bin[np.frombuffer(seq, dtype=np.uint8)]
+
+    # Make sure every base is a valid IUPAC code
+    if len(codes) > 0 and codes.max() == INVALID_CODE:
+        bad = bytes(seq)[int(np.argmax(codes == INVALID_CODE))]
+        raise ValueError(f"Can't pack base '{chr(bad)}': not a valid IUPAC code.")
+
+    return codes
+
+
+
+class PackedSeq:
+    """
+    A nucleotide sequence stored in packed binary form.
+
+    With bits=4, each base is stored as its 4-bit IUPAC code (see base_to_bin), two bases
+    per byte. With bits=2, only A, C, G and T are stored, four bases per byte, and runs
+    of any other code (N, ambiguity codes, gaps) are kept in a separate exception list.
+    """
+
+
+    ### Initialization ###
+
+    def __init__(self, seq=None, bits=4, rna=None):
+
+        from ._sequence import Seq
+
+        if bits not in (2, 4):
+            raise ValueError(f"PackedSeq can only store 2 or 4 bits per base, not {bits}.")
+
+        # Inherit the RNA flag from the source sequence, if it has one
+        if rna is None:
+            rna = getattr(seq, '_is_rna', False)
+
+        self.bits    = bits
+        self._is_rna = rna
+
+        # Convert the source sequence to an array of 4-bit codes
+        if seq is None:
+            codes = np.zeros(0, dtype=np.uint8)
+        elif isinstance(seq, PackedSeq):
+            codes = seq.codes()
+        elif isinstance(seq, (str, bytes, bytearray, memoryview, Seq)):
+            codes = encode(seq)
+        else:
+            codes = encode(Seq(seq).tobytes())
+
+        self._pack(codes)
+
+
+    @classmethod
+    def from_codes(cls, codes, bits=4, rna=False):
+        """
+        Construct a PackedSeq directly from an array of 4-bit codes.
+        """
+        packed = cls.__new__(cls)
+        packed.bits    = bits
+        packed._is_rna = rna
+        packed._pack(np.asarray(codes, dtype=np.uint8))
+        return packed
+
+
+
+    ### Packing and Unpacking ###
+
+    def _pack(self, codes):
+        self._len = len(codes)
+
+        if self.bits == 4:
+            self._exceptions = []
+
+            # Pad to an even length, then put the first base of each pair in the high nibble
+            if len(codes) % 2:
+                codes = np.append(codes, np.uint8(0))
+            self._data = ((codes[0::2] << 4) | codes[1::2]).tobytes()
+
+        else:
+            twobit = _bin_to_2bit[codes]
+
+            # Find the runs of bases that can't be stored in 2 bits, and record them as
+            # (start, stop, code) triples
+            invalid = twobit == INVALID_CODE
+            self._exceptions = []
+            if invalid.any():
+                change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+                change = np.concatenate(( [0], change, [len(codes)] ))
+                for start, stop in zip(change[:-1], change[1:]):
+                    if invalid[start]:
+                        self._exceptions.append(( int(start), int(stop), int(codes[start]) ))
+                twobit = np.where(invalid, np.uint8(0), twobit)
+
+            # Pad to a multiple of four, then pack the bases from high bits to low
+            twobit = np.append(twobit, np.zeros(-len(twobit) % 4, dtype=np.uint8))
+            self._data = (
+                (twobit[0::4] << 6) | (twobit[1::4] << 4) | (twobit[2::4] << 2) | twobit[3::4]
+            ).tobytes()
+
+
+    def codes(self):
+        """
+        Unpack the sequence into a numpy array of 4-bit codes.
+        """
+        data = np.frombuffer(self._data, dtype=np.uint8)
+
+        if self.bits == 4:
+            codes = np.empty(len(data) * 2, dtype=np.uint8)
+            codes[0::2] = data >> 4
+            codes[1::2] = data & 0x0F
+
+        else:
+            codes = np.empty(len(data) * 4, dtype=np.uint8)
+            codes[0::4] = data >> 6
+            codes[1::4] = (data >> 4) & 0b11
+            codes[2::4] = (data >> 2) & 0b11
+            codes[3::4] = data & 0b11
+            codes = _2bit_to_bin[codes]
+
+            # Write the exception runs back in
+            for start, stop, code in self._exceptions:
+                codes[start:stop] = code
+
+        return codes[:self._len]
+
+
+    def tobytes(self):
+        """
+        Unpack the sequence into its ASCII bases.
+        """
+        lookup = _to_rna if self._is_rna else _to_dna
+        return lookup[self.codes()].tobytes()
+
+    def unpack(self):
+        """
+        Convert back to an (unpacked) Seq.
+        """
+        from ._sequence import Seq
+        return Seq(self.tobytes(), rna=self._is_rna)
+
+    def pack(self, bits=4):
+        """
+        Repack the sequence with the given number of bits per base.
+        """
+        if bits == self.bits:
+            return self
+        return PackedSeq.from_codes(self.codes(), bits=bits, rna=self._is_rna)
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used to store the packed bases (not counting exceptions).
+        """
+        return len(self._data)
+
+
+    ### Sequence Alignment ###
+    from .align import align as align
+    align = staticmethod(align)
+
+
+
+    ### String Functions ###
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        if len(self) > 10:
+            return f"<{self[:10]}...>"
+        else:
+            return f"<{self}>"
+
+    def __str__(self):
+        return self.tobytes().decode("utf8")
+
+    def __iter__(self):
+        return iter(self.tobytes())
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedSeq):
+            return NotImplemented
+        return len(self) == len(other) and np.array_equal(self.codes(), other.codes())
+
+    def __hash__(self):
+        return hash(self.codes().tobytes())
+
+
+
+    ### Indexing ###
+
+    def __getitem__(self, elem):
+
+        # Single indices give a sequence of length one, like Seq
+        if isinstance(elem, int):
+            elem = range(len(self))[elem]
+            elem = slice(elem, elem + 1)
+
+        # A contiguous slice starting on a byte boundary can be copied straight from the buffer
+        start, stop, step = elem.indices(len(self))
+        per_byte = 8 // self.bits
+        if step == 1 and start % per_byte == 0 and not self._exceptions and stop > start:
+            packed = PackedSeq.__new__(PackedSeq)
+            packed.bits        = self.bits
+            packed._is_rna     = self._is_rna
+            packed._exceptions = []
+            packed._len        = stop - start
+            packed._data       = self._data[start // per_byte : -(-stop // per_byte)]
+            packed._clear_padding()
+            return packed
+
+        return PackedSeq.from_codes(self.codes()[elem], bits=self.bits, rna=self._is_rna)
+
+    def get_raw(self, elem):
+        return self.tobytes()[elem]
+
+    def _clear_padding(self):
+        # Zero out any unused bits in the last byte, so equal sequences have equal buffers
+        extra = (-self._len % (8 // self.bits)) * self.bits
+        if extra:
+            data = bytearray(self._data)
+            data[-1] &= (0xFF << extra) & 0xFF
+            self._data = bytes(data)
+
+
+
+    ### Logical Operations - Matching Sequences Pairwise ###
+
+    def _combine(self, other, op):
+
+        # Anything other than another PackedSeq has to be encoded first
+        if not isinstance(other, PackedSeq):
+            other = PackedSeq(other)
+
+        # Like zip, only compare up to the length of the shorter sequence
+        length = min(len(self), len(other))
+        a = self  if len(self)  == length else self[:length]
+        b = other if len(other) == length else other[:length]
+
+        # Two 4-bit sequences can be combined a whole byte (two bases) at a time
+        if self.bits == 4 and b.bits == 4 and not a._exceptions and not b._exceptions:
+            data = op(
+                np.frombuffer(a._data, dtype=np.uint8), np.frombuffer(b._data, dtype=np.uint8)
+            ).astype(np.uint8)
+            packed = PackedSeq.__new__(PackedSeq)
+            packed.bits        = 4
+            packed._is_rna     = self._is_rna
+            packed._exceptions = []
+            packed._len        = length
+            packed._data       = data.tobytes()
+            packed._clear_padding()
+            return packed
+
+        codes = op(a.codes(), b.codes()).astype(np.uint8) & 0x0F
+        return PackedSeq.from_codes(codes, bits=self.bits, rna=self._is_rna)
+
+    # Bases allowed by both sequences
+    def __and__(self, other):
+        return self._combine(other, np.bitwise_and)
+
+    def __rand__(self, other):
+        return PackedSeq(other, bits=self.bits) & self
+
+    # Bases allowed by either sequence
+    def __or__(self, other):
+        return self._combine(other, np.bitwise_or)
+
+    def __ror__(self, other):
+        return PackedSeq(other, bits=self.bits) | self
+
+    # Bases allowed by this sequence but not the other
+    def __sub__(self, other):
+        return self._combine(other, lambda x, y: x & ~y)
+
+    def __rsub__(self, other):
+        return PackedSeq(other, bits=self.bits) - self
+
+
+
+    ### Complements ###
+
+    def __invert__(self):
+
+        # With an even number of 4-bit codes, reverse the buffer and complement/swap each byte
+        if self.bits == 4 and self._len % 2 == 0:
+            packed = PackedSeq.__new__(PackedSeq)
+            packed.bits        = 4
+            packed._is_rna     = self._is_rna
+            packed._exceptions = []
+            packed._len        = self._len
+            packed._data       = self._data[::-1].translate(_invert_packed)
+            return packed
+
+        return PackedSeq.from_codes(
+            _complement[self.codes()[::-1]], bits=self.bits, rna=self._is_rna
+        )
@@ -0,0 +1,217 @@
+from ._sequence import Seq
+
+
+
+class SeqView:
+    """
+    A read-only window onto part of another sequence, without copying its bases.
+
+    Slicing a view gives another view onto the same buffer. Writing to a view (append,
+    extend, item assignment, etc.) first copies its bases into a Seq of its own, so the
+    parent sequence is never modified.
+
+    While a view is alive, the parent Seq can't change size (array raises a BufferError).
+    """
+
+
+    ### Initialization ###
+
+    def __init__(self, parent, elem=slice(None)):
+
+        self._is_rna = getattr(parent, '_is_rna', False)
+
+        # Views of views share the same buffer
+        if isinstance(parent, SeqView):
+            parent = parent._buffer()
+
+        # View of the parent's bytes - copied into a Seq of our own on the first write
+        self._mv  = memoryview(parent)[elem]
+        self._seq = None
+
+        # Strided slices can't be viewed as a flat buffer, so they're copied straight away
+        if not self._mv.contiguous:
+            self._own()
+
+
+    def _buffer(self):
+        """
+        The underlying bytes: either the view of the parent, or our own copy.
+        """
+        return self._mv if self._seq is None else self._seq
+
+    def _own(self):
+        """
+        Copy the bases out of the parent, so we can safely write to them.
+        """
+        if self._seq is None:
+            self._seq = Seq(self._mv.tobytes(), rna=self._is_rna)
+            self._mv.release()
+            self._mv = None
+        return self._seq
+
+    def copy(self):
+        """
+        Copy the bases into a new (independent) Seq.
+        """
+        return Seq(self._buffer(), rna=self._is_rna)
+
+    def tobytes(self):
+        return bytes(self._buffer())
+
+    def __bytes__(self):
+        return self.tobytes()
+
+
+
+    ### Read-Only Seq API ###
+
+    # These Seq methods only read from their argument, so they work on the view directly
+    align          = staticmethod(Seq.align)
+    base_count     = Seq.base_count
+    pack           = Seq.pack
+    as_DNA         = Seq.as_DNA
+    as_RNA         = Seq.as_RNA
+    to_DNA         = Seq.to_DNA
+    to_RNA         = Seq.to_RNA
+    translate      = Seq._instance_translate
+    translate_frames = Seq.translate_frames
+    replace        = Seq.replace
+    transform      = Seq.transform
+    complement     = Seq.complement
+    build_index    = Seq.build_index
+    find           = Seq.find
+    finditer       = Seq.finditer
+
+    __and__        = Seq.__and__
+    __rand__       = Seq.__rand__
+    __or__         = Seq.__or__
+    __ror__        = Seq.__ror__
+    __xor__        = Seq.__xor__
+    __rxor__       = Seq.__rxor__
+    __sub__        = Seq.__sub__
+    __rsub__       = Seq.__rsub__
+    __invert__     = Seq.__invert__
+    __mod__        = Seq.__mod__
+    __lshift__     = Seq.__lshift__
+    __rshift__     = Seq.__rshift__
+    __hash__       = Seq.__hash__
+    __contains__   = Seq.__contains__
+    __repr__       = Seq.__repr__
+
+    # Anything else in the Seq API is run on a copy
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.copy(), name)
+
+
+
+    ### String Functions ###
+
+    def __len__(self):
+        return len(self._buffer())
+
+    def __str__(self):
+        return self.tobytes().decode("utf8")
+
+    def __iter__(self):
+        return iter(self._buffer())
+
+
+
+    ### Comparisons ###
+
+    def __eq__(self, other):
+        if isinstance(other, (Seq, SeqView)):
+            return self.tobytes() == other.tobytes()
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        return self.tobytes() < other.tobytes()
+
+
+
+    ### Concatenation ###
+
+    def __add__(self, other):
+        return self.copy() + other
+
+    def __radd__(self, other):
+        return other + self.copy()
+
+    def __mul__(self, other):
+        return self.copy() * other
+
+
+
+    ### Indexing ###
+
+    def __getitem__(self, elem):
+
+        # Single indices give a sequence of length one, like Seq
+        if isinstance(elem, int):
+            return Seq(self._buffer()[elem])
+
+        # Contiguous slices of the parent's buffer are views as well
+        if self._seq is None:
+            mv = self._mv[elem]
+            if not mv.contiguous:
+                return Seq(mv.tobytes(), rna=self._is_rna)
+
+            view = SeqView.__new__(SeqView)
+            view._mv     = mv
+            view._seq    = None
+            view._is_rna = self._is_rna
+            return view
+
+        return self._seq[elem]
+
+    def get_raw(self, elem):
+        return self._buffer()[elem]
+
+    # Get a view of part of this view, without copying it
+    def view(self, start=None, stop=None, step=None):
+        return SeqView(self, slice(start, stop, step))
+
+    # Split the view into windows of window_size bases, as copies (or views, if views=True)
+    def scan(self, window_size, views=False):
+        for i in range(0, len(self), window_size):
+            window = self.view(i, i + window_size)
+            yield window if views else window.copy()
+
+
+
+    ### Writing (Copy-on-Write) ###
+
+    def __setitem__(self, elem, value):
+        self._own()[elem] = value
+
+    def __delitem__(self, elem):
+        del self._own()[elem]
+
+    def append(self, value):
+        self._own().append(value)
+
+    def extend(self, values):
+        self._own().extend(values)
+
+    def frombytes(self, values):
+        self._own().frombytes(values)
+
+    def fromlist(self, values):
+        self._own().fromlist(values)
+
+    def insert(self, i, value):
+        self._own().insert(i, value)
+
+    def pop(self, i=-1):
+        return self._own().pop(i)
+
+    def remove(self, value):
+        self._own().remove(value)
+
+    def reverse(self):
+        self._own().reverse()
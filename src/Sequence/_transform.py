@@ -1,20 +1,20 @@
+from functools import lru_cache
+
+import numpy as np
+
 from ._constants import bases_inv, bases_inv_rna, codon_table, protein_codes
+from ._constants import INVALID_CODE, base_to_bin, base_to_bin_table
 
 
 
 def invert_gen(source_gen, is_RNA=False):
     """
     Invert a generator.
-    """
-    # from ._sequence import Seq
 
-    # # Get the desired lookup table
-    # if is_RNA:    lookup = bases_inv_rna
-    # else:         lookup = bases_inv
-
-    # Return transformed generator
-    # return ( seq.transform( lookup ) for seq in source_gen )
-    return ( ~seq[::-1] for seq in source_gen )
+    Complements each chunk without reversing it, since chunks read in reverse order are
+    already reversed.
+    """
+    return ( seq.complement(rna=is_RNA) for seq in source_gen )
 
 
 
@@ -47,6 +47,85 @@ def dna_to_rna(seq, as_generator=False):
 
 ### RNA ----> Amino Acids ###
 
+# Codons are indexed by the 4-bit codes of their three bases (see base_to_bin), giving
+# 16^3 = 4096 possible codons. Bytes that aren't IUPAC codes are treated as gaps, so any
+# codon containing one translates to '?'. T and U share a code, so DNA and RNA translate alike.
+_codon_codes = np.frombuffer(base_to_bin_table, dtype=np.uint8).copy()
+_codon_codes[_codon_codes == INVALID_CODE] = base_to_bin[ord('-')]
+
+
+@lru_cache(maxsize=None)
+def codon_lookup(ambiguous=False):
+    """
+    Build the table mapping each of the 4096 codon indices to an amino acid (as a byte).
+
+    By default only codons of A, C, G and U/T are translated. If ambiguous is set, codons
+    with IUPAC codes are translated too, if every codon they could stand for gives the
+    same amino acid (e.g. 'GGN' -> 'G').
+    """
+    lookup = np.full(16 ** 3, ord('?'), dtype=np.uint8)
+
+    # The RNA bases matching each 4-bit code
+    matches = [ [ b for b in "ACGU" if base_to_bin[ord(b)] & code ] for code in range(16) ]
+
+    for idx in range(16 ** 3):
+        options = [ matches[idx >> 8], matches[(idx >> 4) & 0xF], matches[idx & 0xF] ]
+
+        # Without ambiguity, each code has to match exactly one base
+        if not all( len(opt) == 1 if not ambiguous else len(opt) > 0 for opt in options ):
+            continue
+
+        aminos = set(
+            codon_table[x + y + z] for x in options[0] for y in options[1] for z in options[2]
+        )
+        if len(aminos) == 1:
+            lookup[idx] = ord(aminos.pop())
+
+    return lookup
+
+
+def codon_indices(seq, offset=0):
+    """
+    Compute the index of each codon in a sequence, reading from the given offset.
+    """
+    from ._sequence import _byte_array
+
+    codes = _codon_codes[_byte_array(seq)[offset:]]
+    codes = codes[: (len(codes) // 3) * 3].reshape(-1, 3).astype(np.uint16)
+
+    return (codes[:, 0] << 8) | (codes[:, 1] << 4) | codes[:, 2]
+
+
+def translate_buffer(seq, offset=0, ambiguous=False):
+    """
+    Translate a whole sequence in one step, reading codons from the given offset.
+
+    Any trailing partial codon is dropped, and codons that can't be translated give '?'.
+    """
+    return codon_lookup(ambiguous)[codon_indices(seq, offset)].tobytes().decode("utf8")
+
+
+def all_codon_indices(seq):
+    """
+    Compute the index of the codon starting at every position of a sequence.
+    """
+    from ._sequence import _byte_array
+
+    codes = _codon_codes[_byte_array(seq)].astype(np.uint16)
+    return (codes[:-2] << 8) | (codes[1:-1] << 4) | codes[2:]
+
+
+def translate_frames(seq, ambiguous=False):
+    """
+    Translate all three forward reading frames of a sequence in a single pass.
+    """
+
+    # Translate the codon starting at every position, then pick out every third one for each frame
+    aminos = codon_lookup(ambiguous)[all_codon_indices(seq)]
+
+    return [ aminos[offset::3].tobytes().decode("utf8") for offset in range(3) ]
+
+
 def _translate(seq, as_generator=False, from_DNA=False, frame=1):
 
     # If coming from DNA, insert intermediate transformer to RNA
@@ -55,22 +134,14 @@ def _translate(seq, as_generator=False, from_DNA=False, frame=1):
 
     if as_generator:
 
-        # Take RNA sequence in groups of 3 and map to codons, ignoring if no map exists
+        # Translate each chunk of RNA in bulk, yielding None where no codon exists
         return (
-            codon_table.get(str(codon), None) for codon in seq if len(codon) == 3
+            None if amino == '?' else amino
+            for chunk in seq for amino in translate_buffer(chunk)
         )
 
     else:
-
-        limit = ( (len(seq)) // 3) * 3
-
-        return ''.join([
-            codon_table.get(str(seq[i:i+3]), "?") for i in range(0, limit, 3)
-
-            # codon_table.get(str( seq.subseq(i, i+3) ), None) for i in range(0, len(seq), 3)
-            # str(seq[i:i+3]) for i in range(0, len(seq), 3)
-            # str(seq[i:i+3]) + "-" for i in range(0, len(seq), 3)
-        ])
+        return translate_buffer(seq)
 
 
 
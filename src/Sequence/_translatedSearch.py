@@ -0,0 +1,166 @@
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from ._constants import _complement_bin
+from ._search    import search_table
+from ._transform import _codon_codes, codon_lookup
+
+
+# The default number of bases to read from a file at once
+DEFAULT_WINDOW_SIZE = 2 ** 20
+
+# Complement of each 4-bit base code
+_complement_codes = np.array([ _complement_bin(code) for code in range(16) ], dtype=np.uint16)
+
+
+# A hit of a protein query against one reading frame of a nucleotide sequence
+#   - score:  the total substitution score of the query against the translated bases
+#   - frame:  the reading frame, as in frame_values (negative on the reverse strand)
+#   - strand: '+' or '-'
+#   - start, end: the bases coding for the hit, on the forward strand (so end - start is 3x the
+#     length of the query, whichever strand it's on)
+#   - peptide: the translation of those bases, in the same direction as the query
+TranslatedHit = namedtuple('TranslatedHit', ['score', 'frame', 'strand', 'start', 'end', 'peptide'])
+
+
+
+def query_profile(query, score):
+    """
+    Build the scores of each position of a protein query against every byte, as an (m x 256)
+    array. Bytes that aren't in the scoring matrix (stop codons, untranslatable codons) score
+    the same as the worst mismatch.
+    """
+    from .align     import compiled_matrix
+    from ._sequence import _byte_array
+
+    query = _byte_array(query)
+    if len(query) == 0:
+        raise ValueError("Can't search for an empty query.")
+
+    keys = compiled_matrix(score).keys
+    if not keys[query].all():
+        bad = int(query[np.argmin(keys[query])])
+        raise ValueError(f"Can't search for '{chr(bad)}': not in the scoring matrix.")
+
+    return search_table(score)[query]
+
+
+def codon_aminos(text, ambiguous=False):
+    """
+    Translate the codon starting at every position of a block of bases, on both strands.
+
+    Returns two arrays of amino acids (as bytes): the forward codon text[i:i+3], and the
+    reverse complement of the same three bases.
+    """
+    codes  = _codon_codes[text].astype(np.uint16)
+    lookup = codon_lookup(ambiguous)
+
+    forward = (codes[:-2] << 8) | (codes[1:-1] << 4) | codes[2:]
+
+    codes   = _complement_codes[codes]
+    reverse = (codes[2:] << 8) | (codes[1:-1] << 4) | codes[:-2]
+
+    return lookup[forward], lookup[reverse]
+
+
+def profile_scores(profile, aminos):
+    """
+    Score the query profile against the amino acids every three positions, starting at every
+    position (so all three frames of a strand are scored at once).
+    """
+    m = len(profile)
+    n = len(aminos) - 3 * (m - 1)
+
+    scores = np.zeros(n, dtype=profile.dtype)
+    for j in range(m):
+        scores += profile[j][aminos[3 * j : 3 * j + n]]
+    return scores
+
+
+
+def translated_search(
+    query, target,
+    score       = "blosum62",
+    min_score   = None,
+    max_hits    = None,
+    ambiguous   = False,
+    window_size = DEFAULT_WINDOW_SIZE,
+):
+    """
+    Search for a protein query (e.g. a peptide or motif) in all six reading frames of a
+    nucleotide sequence, without gaps.
+
+    The target can be a Seq, SeqView, string, or SeqReader. All six frames are translated and
+    scored from a single pass over the target, window_size bases at a time, so memory use
+    doesn't depend on its length (as long as max_hits is given).
+
+    Hits are scored with a protein scoring matrix ("blosum62" or "pam250"), and every hit
+    scoring at least min_score is kept (by default, half the score of the query against
+    itself). Returns a list of TranslatedHits, best first.
+    """
+    from ._sequence import Seq, _byte_array
+
+    profile = query_profile(query, score)
+    m       = len(profile)
+    span    = 3 * m
+
+    if min_score is None:
+        min_score = profile[np.arange(m), _byte_array(query)].sum() / 2
+
+    # The reverse strand reads the query backwards along the forward strand
+    reverse_profile = profile[::-1]
+
+    if not hasattr(target, 'as_DNA'):
+        target = Seq(target)
+    length = len(target)
+
+    # The best hits so far - if only keeping the top max_hits, a heap of (score, -start, -frame, hit),
+    # so the worst hit (ties broken the same way as the final sort) is always on top
+    hits = []
+
+    carry    = np.zeros(0, dtype=np.uint8)
+    position = 0
+
+    for block in target.as_DNA(window_size=window_size, views=True):
+        text = np.concatenate(( carry, _byte_array(block) ))
+
+        if len(text) >= span:
+            forward, reverse = codon_aminos(text, ambiguous)
+
+            for sign, strand_profile, aminos in ( (1, profile, forward), (-1, reverse_profile, reverse) ):
+                scores = profile_scores(strand_profile, aminos)
+
+                for start in np.flatnonzero(scores >= min_score).tolist():
+                    begin = position + start
+
+                    # Forward frames count from the start of the sequence, and reverse frames
+                    # from the end
+                    if sign > 0:
+                        frame   = begin % 3 + 1
+                        peptide = aminos[start : start + span : 3]
+                    else:
+                        frame   = -((length - begin - span) % 3 + 1)
+                        peptide = aminos[start : start + span : 3][::-1]
+
+                    hit = TranslatedHit(
+                        float(scores[start]), frame, "+" if sign > 0 else "-",
+                        begin, begin + span, peptide.tobytes().decode("utf8"),
+                    )
+
+                    # Keep the hits in a bounded heap, if only the best few are wanted
+                    entry = ( hit.score, -hit.start, -hit.frame, hit )
+                    if max_hits is None:
+                        hits.append(entry)
+                    elif len(hits) < max_hits:
+                        heapq.heappush(hits, entry)
+                    elif entry[:3] > hits[0][:3]:
+                        heapq.heapreplace(hits, entry)
+
+        # Keep the bases of any hit that might continue into the next block
+        keep = min(span - 1, len(text))
+        position += len(text) - keep
+        carry     = text[len(text) - keep:]
+
+    return [ entry[-1] for entry in sorted(hits, key=lambda entry: entry[:3], reverse=True) ]
@@ -1,7 +1,13 @@
 # Built-in libraries
 import argparse
 import numpy    as np
+import random
 import sys
+import tempfile
+import warnings
+from collections import namedtuple
+from functools   import lru_cache
+from itertools   import accumulate, islice
 
 # Local files
 from ._constants   import BLOSUM62_r, PAM250_r, SIMPLE_r, protein_codes
@@ -37,6 +43,8 @@ def parse_matrix(matrix_name):
     elif matrix_name == "pam250":      return PAM250_r
     elif matrix_name == "simple":      return SIMPLE_r
 
+MATRIX_NAMES = [ "blosum62", "pam250", "simple" ]
+
 
 
 # Define default argument strings and values
@@ -48,6 +56,9 @@ DEF_MATRIX_STR = "simple"
 DEFAULT_TYPE    = parse_type(DEF_TYPE_STR)
 DEFAULT_MATRIX  = parse_matrix(DEF_MATRIX_STR)
 DEFAULT_PENALTY = -1
+
+# The approximate number of bytes of the matrices to fill or search at once
+TILE_SIZE = 2 ** 24
     
     
 # Create the arguments to parse
@@ -86,51 +97,437 @@ parser.add_argument(
 
 
 
+# A substitution matrix compiled into dense 256 x 256 arrays, indexed by pairs of bytes
+#   - scores: the score for each pair, as the smallest integer type that fits (or floats)
+#   - valid:  whether each pair is in the matrix (pairs involving a gap always are, and score 0)
+#   - keys:   whether each byte is a first-level key of the matrix
+SubstitutionMatrix = namedtuple('SubstitutionMatrix', ['scores', 'valid', 'keys'])
+
+
+# Compile a nested dict scoring matrix into a SubstitutionMatrix
+def substitution_table(matrix):
+    scores = np.zeros((256, 256))
+    valid  = np.zeros((256, 256), dtype=bool)
+    keys   = np.zeros(256, dtype=bool)
+
+    for key1, row in matrix.items():
+        key1 = ord(key1) if isinstance(key1, str) else key1
+        keys[key1] = True
+        for key2, val in row.items():
+            key2 = ord(key2) if isinstance(key2, str) else key2
+            scores[key1, key2] = val
+            valid [key1, key2] = True
+
+    scores[ord('-'), :] = 0
+    scores[:, ord('-')] = 0
+    valid [ord('-'), :] = True
+    valid [:, ord('-')] = True
+
+    # Store whole-number scores in the smallest integer type that can hold them
+    if np.array_equal(scores, np.round(scores)):
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= scores.min() and scores.max() <= info.max:
+                scores = scores.astype(dtype)
+                break
+
+    for table in (scores, valid, keys):
+        table.flags.writeable = False
+    return SubstitutionMatrix(scores, valid, keys)
+
+
+# Compile the built-in matrices and (match, mismatch) tuples once, and reuse them
+@lru_cache(maxsize=None)
+def _cached_table(score):
+    matrix = scoring_matrix(score)
+    if matrix is None:
+        raise ValueError(f"Unknown scoring matrix '{score}'.")
+    return substitution_table(matrix)
+
+
+# Get the compiled substitution matrix for the "score" parameter of align
+# Other dict matrices are compiled each time, since they might have changed
+def compiled_matrix(score):
+    if isinstance(score, (str, tuple)):
+        return _cached_table(score)
+    for name in MATRIX_NAMES:
+        if score is parse_matrix(name):
+            return _cached_table(name)
+    return substitution_table(score)
+
+
+# Raise the same KeyError as looking up the first missing pair of bases in the matrix
+def check_substitutions(table, seq1, seq2):
+    missing = ~table.valid[np.ix_(seq1, np.unique(seq2))].all(axis=1)
+    if missing.any():
+        base_1 = int(seq1[np.argmax(missing)])
+        base_2 = int(seq2[np.argmax(~table.valid[base_1, seq2])])
+        raise KeyError(base_1 if not table.keys[base_1] else base_2)
+
+
+# Compute one row of the score matrix, with the left cell prepended
+def score_row(diag, up, left, gap_penalty, is_local):
+
+    # Best score from the diagonal or upward moves (or from starting over, for a local search)
+    best = np.maximum(diag, up)
+    if is_local:
+        best = np.maximum(best, 0)
+
+    # Works along the last axis, so several rows (one per target sequence) can be done at once
+    left = np.broadcast_to(left, best.shape[:-1] + (1,))
+    row  = np.concatenate(( left, best ), axis=-1)
+
+    # Fold in the leftward moves with a running maximum
+    # Subtracting and adding back the steps is only exact for whole numbers - otherwise the
+    # rounding can break ties differently, so the row is filled one cell at a time instead
+    if is_whole(row) and gap_penalty == int(gap_penalty):
+        steps = np.arange(row.shape[-1]) * gap_penalty
+        return np.maximum.accumulate(row - steps, axis=-1) + steps
+    return left_moves(row, gap_penalty)
+
+
+# Check whether every (finite) score in an array is a whole number
+def is_whole(scores):
+    return scores.dtype.kind in 'iu' or np.array_equal(scores, np.round(scores))
+
+
+# Fold the leftward moves into a row of scores one cell at a time, like the recurrence itself:
+# H[j] = max(best[j], H[j-1] + gap)
+def left_moves(row, gap_penalty):
+    if row.ndim == 1:
+        cells = accumulate(row.tolist(), lambda h, best: max(h + gap_penalty, best))
+        return np.array(list(cells), dtype=row.dtype)
+
+    row = row.copy()
+    for j in range(1, row.shape[-1]):
+        np.maximum(row[..., j-1] + gap_penalty, row[..., j], out=row[..., j])
+    return row
+
+
+# Compute one row of the score and arrow matrices
+#   - diag: the score for moving diagonally into each cell
+#   - up:   the score for moving upward into each cell
+#   - left: the score of the cell just before the first one in the row
+#
+# Moving left depends on the cell just computed, so the row is filled with a running maximum:
+# since H[j] = max(best[j], H[j-1] + gap), H[j] - j*gap is the running maximum of best[k] - k*gap
+def fill_row(diag, up, left, gap_penalty, is_local):
+    scores = score_row(diag, up, left, gap_penalty, is_local)
+
+    # Mark each direction that gives the max score
+    score_l   = scores[:-1] + gap_penalty
+    max_score = np.maximum(score_l, np.maximum(up, diag))
+    arrows = (
+          (score_l == max_score) * MOVE_L
+        | (up      == max_score) * MOVE_U
+        | (diag    == max_score) * MOVE_D
+    ).astype(np.uint8)
+
+    # Special case: in a local search, all would-be negative values map to 0
+    if is_local:
+        arrows[max_score < 0] = 0
+
+    return scores[1:], arrows
+
+
+
+# A (rows x cols) matrix that only stores the cells in a band around the diagonal
+# Cell (i, j) is stored in data[i, j - i - lo] if lo <= j - i <= hi; every other cell reads as
+# the fill value. Supports the matrix[row, col] indexing used by the traceback.
+class BandedMatrix:
+
+    def __init__(self, rows, cols, lo, hi, fill, dtype):
+        self.shape = (rows, cols)
+        self.lo    = lo
+        self.hi    = hi
+        self.fill  = fill
+        self.data  = np.full((rows, hi - lo + 1), fill, dtype=dtype)
+
+    # The first and last columns of a row that are inside the band (and the matrix)
+    def row_span(self, row):
+        return max(0, row + self.lo), min(self.shape[1] - 1, row + self.hi)
+
+    def in_band(self, row, col):
+        return self.lo <= col - row <= self.hi and 0 <= col < self.shape[1] and 0 <= row < self.shape[0]
+
+    def __getitem__(self, coords):
+        row, col = coords
+        if self.in_band(row, col):
+            return self.data[row, col - row - self.lo]
+        return self.data.dtype.type(self.fill)
+
+    # Expand to a full (rows x cols) array
+    def to_dense(self):
+        dense = np.full(self.shape, self.fill, dtype=self.data.dtype)
+        for row in range(self.shape[0]):
+            first, last = self.row_span(row)
+            if first <= last:
+                dense[row, first : last + 1] = self.data[row, first - row - self.lo : last - row - self.lo + 1]
+        return dense
+
+    # Check whether a cell is on the edge of the band, and not just the edge of the matrix
+    def on_edge(self, row, col):
+        return (col - row == self.lo and col > 0) or (col - row == self.hi and row > 0)
+
+
+
+# The smallest type that can hold every score in a (rows x cols) matrix
+# No cell can be further from 0 than one of the largest steps for every row and column
+def score_dtype(sub_table, gap_penalty, rows, cols):
+    if (sub_table is not None and sub_table.dtype.kind == 'f') or gap_penalty != int(gap_penalty):
+        return np.float64
+
+    step = abs(int(gap_penalty))
+    if sub_table is not None:
+        step = max(step, int(np.abs(sub_table.astype(np.int64)).max()))
+
+    bound = (rows + cols) * step
+    for dtype in (np.int8, np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+# Estimate the number of bytes needed for the score and arrow matrices
+def table_memory(rows, cols, dtype, band=None):
+    if band is None:
+        return rows * cols * (np.dtype(dtype).itemsize + 1)
+
+    # Banded matrices always store float scores
+    return rows * (2 * band + abs(cols - rows) + 1) * (np.dtype(np.float64).itemsize + 1)
+
+
+# Format a number of bytes for an error message
+def format_bytes(num_bytes):
+    units = [ "bytes", "KB", "MB", "GB", "TB" ]
+    size, unit = float(num_bytes), 0
+    while size >= 1024 and unit < len(units) - 1:
+        size /= 1024
+        unit += 1
+    return f"{size:.1f} {units[unit]}"
+
+
+# Fill in the full score and arrow matrices, one row at a time
+def fill_matrices(bases_1, bases_2, sub_table, is_local, gap_penalty, dtype=np.float64, scratch_dir=None):
+
+    # Compute the number of columns and rows
+    rows = len(bases_1) + 1    # Sequence 1 is vertical
+    cols = len(bases_2) + 1    # Sequence 2 is horizontal
+    
+    # Create the result matrix and the arrow (directions) matrix
+    # The scores are stored in the smallest type that fits them (see score_dtype), and the
+    # directions as bytes, since I only need three bits for each entry
+    score_matrix = new_table((rows, cols), dtype,    scratch_dir)
+    arrow_matrix = new_table((rows, cols), np.uint8, scratch_dir)
+    
+    # Initialize the first row using numpy
+    # If using local alignment, we want the first row/col to be filled with zeroes
+    #    - In the score matrix, this represents a potential start point
+    #    - In the arrow matrix, this represents a location to terminate the traceback
+    # If not, the scores just compound the gap penalty, and the arrows just point left and upward
+    # (keeping the top left corner as a terminating 0)
+    prev = np.zeros(cols) if is_local else np.arange(cols) * gap_penalty
+    score_matrix[0] = prev
+    arrow_matrix[0] = 0
+    if not is_local:
+        arrow_matrix[0, 1:] = MOVE_L
+
+    # Fill in the matrices a tile of rows at a time, so each tile is written out in one
+    # contiguous block (which matters when the matrices are mapped to disk)
+    tile_rows = tile_height(cols, dtype)
+    for start in range(1, rows, tile_rows):
+        stop   = min(rows, start + tile_rows)
+        scores = np.empty((stop - start, cols), dtype=dtype)
+        arrows = np.empty((stop - start, cols), dtype=np.uint8)
+
+        for i in range(start, stop):
+
+            # The first column
+            scores[i - start, 0] = 0 if is_local else i * gap_penalty
+            arrows[i - start, 0] = 0 if is_local else MOVE_U
+
+            # Compute the score from the upper cells (add gap penalty)
+            score_u = prev[1:] + gap_penalty
+
+            # Without mismatches (no substitution table), the diagonal never gives the max score
+            if sub_table is None:
+                score_d = np.full(cols - 1, -np.inf)
+
+            # Compute the score from the diagonal cells (add substitution matrix value)
+            else:
+                score_d = prev[:-1] + sub_table[bases_1[i-1], bases_2]
+
+            scores[i - start, 1:], arrows[i - start, 1:] = fill_row(
+                score_d, score_u, scores[i - start, 0], gap_penalty, is_local
+            )
+            prev = scores[i - start]
+
+        score_matrix[start:stop] = scores
+        arrow_matrix[start:stop] = arrows
+
+    return score_matrix, arrow_matrix
+
+
+# The number of rows of a matrix to work on at once, so each tile takes about TILE_SIZE bytes
+def tile_height(cols, dtype):
+    return max(1, TILE_SIZE // (cols * (np.dtype(dtype).itemsize + 1)))
+
+
+# Allocate a matrix of zeroes, either in memory or mapped to a temporary file in scratch_dir
+# The file is deleted as soon as the matrix is no longer used
+def new_table(shape, dtype, scratch_dir=None):
+    if scratch_dir is None:
+        return np.zeros(shape, dtype=dtype)
+
+    with tempfile.TemporaryFile(dir=scratch_dir) as file:
+        return np.memmap(file, dtype=dtype, mode='w+', shape=shape)
+
+
+# Fill in banded score and arrow matrices, only computing cells within `band` diagonals of
+# the main diagonal (widened to reach the bottom-right corner if the lengths differ)
+def fill_banded_matrices(bases_1, bases_2, sub_table, is_local, gap_penalty, band):
+
+    rows = len(bases_1) + 1
+    cols = len(bases_2) + 1
+
+    # The band covers diagonals (j - i) from lo to hi
+    lo = -band + min(0, cols - rows)
+    hi =  band + max(0, cols - rows)
+
+    # Cells outside the band can never be reached, so they score -inf and have no arrows
+    score_matrix = BandedMatrix(rows, cols, lo, hi, -np.inf, np.float64)
+    arrow_matrix = BandedMatrix(rows, cols, lo, hi, 0,       np.uint8)
+    scores = score_matrix.data
+    arrows = arrow_matrix.data
+
+    for i in range(rows):
+        first, last = score_matrix.row_span(i)
+        if first > last:
+            continue
+
+        # The first row/col are initialized just like the full matrices
+        if first == 0:
+            scores[i, -lo - i] = 0 if is_local else i * gap_penalty
+            arrows[i, -lo - i] = 0 if (is_local or i == 0) else MOVE_U
+            first = 1
+
+        if i == 0:
+            if not is_local:
+                scores[0, 1 - lo : last - lo + 1] = np.arange(1, last + 1) * gap_penalty
+                arrows[0, 1 - lo : last - lo + 1] = MOVE_L
+            else:
+                scores[0, 1 - lo : last - lo + 1] = 0
+            continue
+
+        if first > last:
+            continue
+
+        # Band indices of this row's cells - the diagonal neighbors have the same indices in
+        # the previous row, and the upper neighbors have the next ones
+        k_first, k_last = first - i - lo, last - i - lo
+        prev = np.append(scores[i-1], -np.inf)
+
+        score_u = prev[k_first + 1 : k_last + 2] + gap_penalty
+
+        if sub_table is None:
+            score_d = np.full(k_last - k_first + 1, -np.inf)
+        else:
+            score_d = prev[k_first : k_last + 1] + sub_table[bases_1[i-1], bases_2[first-1 : last]]
+
+        # The cell to the left of the first one, if it's in the band
+        left = scores[i, k_first - 1] if k_first > 0 else -np.inf
+
+        scores[i, k_first : k_last + 1], arrows[i, k_first : k_last + 1] = fill_row(
+            score_d, score_u, left, gap_penalty, is_local
+        )
+
+    return score_matrix, arrow_matrix
+
+
+
 # Find the indices in the matrix with the maximum score, to start the traceback
 def find_max_idxs(matrix):
-    result = np.where(matrix == np.amax(matrix))
-    return list(zip(result[0], result[1]))
+    if isinstance(matrix, BandedMatrix):
+        result = np.where(matrix.data == np.amax(matrix.data))
+        return [ (i, i + matrix.lo + k) for i, k in zip(result[0], result[1]) ]
 
+    # Search a tile of rows at a time, so a matrix mapped to disk isn't read into memory at once
+    step  = tile_height(matrix.shape[1], matrix.dtype)
+    tiles = range(0, matrix.shape[0], step)
+    best  = max( np.amax(matrix[start : start + step]) for start in tiles )
+
+    idxs = []
+    for start in tiles:
+        result = np.where(matrix[start : start + step] == best)
+        idxs  += list(zip(result[0] + start, result[1]))
+    return idxs
+
+
+# Check whether a path through a banded matrix touches the edge of the band
+# If it does, a better alignment might have been found outside the band
+def path_touches_edge(matrix, source, path):
+    i, j = source
+    if matrix.on_edge(i, j):
+        return True
+    for step in path:
+        if step & (MOVE_U | MOVE_D):    i += 1
+        if step & (MOVE_L | MOVE_D):    j += 1
+        if matrix.on_edge(i, j):
+            return True
+    return False
+
+
+
+# The cells the traceback can move to from the given cell, paired with the move that leads
+# back from each one. Only moves marked in the arrow matrix are taken, and of those, only the
+# ones leading to the highest-scoring cells.
+def next_cells(score_matrix, arrow_matrix, coords):
+    row, col = coords
+    curr_val = int(arrow_matrix[row, col])
+
+    # Pair each movement option with the starting coords if we were to take that movement
+    opts = [
+        (move, (row + d[0], col + d[1])) for (move, d) in traceback.OPTIONS if curr_val & move
+    ]
+    if not opts:
+        return []
+
+    # Get the corresponding scores for each possible path, along with the maximum score
+    scores = [
+        score_matrix[new_coords] for (_, new_coords) in opts
+    ]
+    max_score = max(scores)
+
+    return [ opt for opt, score in zip(opts, scores) if score == max_score ]
 
 
 # Generator function that yields valid paths through the matrix
 # Paths are not returned in any particular order, since they all have the same score
 # Paths are already "reversed" - the sequence of steps moves down and rightward
+#
+# The paths are searched depth-first with an explicit stack, so long sequences don't hit the
+# recursion limit. Each partial path is stored as a linked list of (move, rest) pairs, so the
+# branches share their common suffixes instead of copying them.
 def traceback(score_matrix, arrow_matrix, coords):
-    
-    # Unpack current location and value in the matrix
-    row, col = coords
-    curr_val = int(arrow_matrix[row, col])
-    
-    # Base case
-    # On reaching a 0 value, yield the current coordinates as the origin of the alignment
-    # and an empty list to start recursively building up the paths from
-    if curr_val == 0:
-        yield ( coords, [] )
-    
-    # Recursive step
-    # Recursively call traceback from each next possible cell in the path
-    else:
-    
-        # Pair each movement option with the starting coords if we were to take that movement
-        opts = [
-            (move, (row + d[0], col + d[1])) for (move, d) in traceback.OPTIONS if curr_val & move
-        ]
-        
-        # Get the corresponding scores for each possible path, along with the maximum score
-        scores = [
-            score_matrix[new_coords] for (_, new_coords) in opts
-        ]
-        max_score = max(scores)
-
-        # For each move that would go to a max-square cell...
-        for (move, new_coords), score in zip(opts, scores):
-            if score == max_score:
-                
-                # ...recursively call traceback starting from that cell, appending the move that
-                # got us there to the end of the path
-                for ( origin, partial_path ) in traceback( score_matrix, arrow_matrix, new_coords ):
-                    yield ( origin, partial_path + [move] )
+    stack = [ (tuple(coords), None) ]
+
+    while stack:
+        coords, suffix = stack.pop()
+        options = next_cells(score_matrix, arrow_matrix, coords)
+
+        # On reaching a cell with no moves, yield its coordinates as the origin of the
+        # alignment, along with the path from it
+        if not options:
+            path = []
+            while suffix is not None:
+                move, suffix = suffix
+                path.append(move)
+            yield ( coords, path )
+            continue
+
+        # Push the options in reverse, so they're searched in order
+        for move, new_coords in reversed(options):
+            stack.append(( new_coords, (move, suffix) ))
 
 
 
@@ -143,6 +540,211 @@ traceback.OPTIONS = [
 ]
 
 
+# Count the paths from each cell reachable by the traceback back to an origin
+# Every move goes to a cell earlier in row-major order, so the cells can be counted in order
+def count_paths(score_matrix, arrow_matrix, start_idxs):
+
+    # Find every cell reachable from the start cells
+    nexts = {}
+    stack = [ (int(row), int(col)) for row, col in start_idxs ]
+    while stack:
+        coords = stack.pop()
+        if coords not in nexts:
+            nexts[coords] = [ c for _, c in next_cells(score_matrix, arrow_matrix, coords) ]
+            stack.extend(nexts[coords])
+
+    counts = {}
+    for coords in sorted(nexts):
+        counts[coords] = sum( counts[c] for c in nexts[coords] ) if nexts[coords] else 1
+    return counts
+
+
+# Pick one of the keys of a dict of counts, with probability proportional to its count
+def weighted_choice(options, counts, rng):
+    r = rng.randrange(sum( counts[opt] for opt in options ))
+    for opt in options:
+        r -= counts[opt]
+        if r < 0:
+            return opt
+
+
+# Generator function that yields random paths through the matrix, chosen uniformly from all
+# the paths the traceback would produce. Yields (start, source, path) triples.
+def sample_paths(score_matrix, arrow_matrix, start_idxs, num_samples, rng):
+    counts = count_paths(score_matrix, arrow_matrix, start_idxs)
+    starts = [ (int(row), int(col)) for row, col in start_idxs ]
+
+    for _ in range(num_samples):
+
+        # Walk back from a random start, choosing each move in proportion to the number of
+        # paths through it
+        start  = weighted_choice(starts, counts, rng)
+        coords = start
+        path   = []
+        while True:
+            options = dict( (c, move) for move, c in next_cells(score_matrix, arrow_matrix, coords) )
+            if not options:
+                break
+            coords = weighted_choice(list(options), counts, rng)
+            path.append(options[coords])
+
+        yield start, coords, path[::-1]
+
+
+
+# Generate the rows of the score matrix one at a time, only keeping the previous row in memory
+def score_rows(bases_1, bases_2, sub_table, is_local, gap_penalty):
+    cols = len(bases_2) + 1
+
+    row = np.zeros(cols) if is_local else np.arange(cols, dtype=np.float64) * gap_penalty
+    yield row
+
+    for i in range(1, len(bases_1) + 1):
+        score_u = row[1:] + gap_penalty
+        if sub_table is None:
+            score_d = np.full(cols - 1, -np.inf)
+        else:
+            score_d = row[:-1] + sub_table[bases_1[i-1], bases_2]
+
+        row = score_row(score_d, score_u, 0 if is_local else i * gap_penalty, gap_penalty, is_local)
+        yield row
+
+
+# The last row of the score matrix
+def last_score_row(bases_1, bases_2, sub_table, is_local, gap_penalty):
+    for row in score_rows(bases_1, bases_2, sub_table, is_local, gap_penalty):
+        pass
+    return row
+
+
+# The optimal alignment score, computed two rows at a time without any traceback
+def alignment_score(bases_1, bases_2, sub_table, is_local, gap_penalty):
+    if not is_local:
+        return last_score_row(bases_1, bases_2, sub_table, False, gap_penalty)[-1]
+    return max( row.max() for row in score_rows(bases_1, bases_2, sub_table, True, gap_penalty) )
+
+
+# The optimal alignment scores of one sequence against a batch of others, at the same time
+# The targets are padded with gaps to the same length and stacked, so each row of the DP is
+# computed for every target at once. Padding only adds cells after the end of each target, so
+# it doesn't change the cells that are read.
+def batch_scores(bases_1, targets, sub_table, is_local, gap_penalty):
+    lengths = np.array([ len(t) for t in targets ])
+    cols    = lengths.max() + 1 if len(targets) > 0 else 1
+
+    padded = np.full((len(targets), cols - 1), ord('-'), dtype=np.uint8)
+    for k, t in enumerate(targets):
+        padded[k, :len(t)] = t
+
+    # Cells that are part of each target's matrix
+    valid = np.arange(cols) <= lengths[:, None]
+
+    if is_local:
+        row = np.zeros((len(targets), cols))
+    else:
+        row = np.tile(np.arange(cols, dtype=np.float64) * gap_penalty, (len(targets), 1))
+    best = np.where(valid, row, -np.inf).max(axis=1)
+
+    for i in range(1, len(bases_1) + 1):
+        score_u = row[:, 1:] + gap_penalty
+        if sub_table is None:
+            score_d = np.full(score_u.shape, -np.inf)
+        else:
+            score_d = row[:, :-1] + sub_table[bases_1[i-1], padded]
+
+        row = score_row(score_d, score_u, 0 if is_local else i * gap_penalty, gap_penalty, is_local)
+        if is_local:
+            best = np.maximum(best, np.where(valid, row, -np.inf).max(axis=1))
+
+    # A global alignment ends in the bottom-right corner of each target's matrix
+    if not is_local:
+        best = row[np.arange(len(targets)), lengths]
+    return best
+
+
+# Find one optimal global alignment path in linear memory (Hirschberg's algorithm)
+# The first sequence is split in half, and the second is split where the best scores of the
+# top half (read forwards) and bottom half (read backwards) add up to the most. Each half is
+# then aligned recursively.
+def hirschberg(bases_1, bases_2, sub_table, gap_penalty):
+
+    # Base case: one of the sequences is empty, so the other is all gaps
+    if len(bases_1) == 0:
+        return [MOVE_L] * len(bases_2)
+    if len(bases_2) == 0:
+        return [MOVE_U] * len(bases_1)
+
+    # Base case: a single base either lines up with the best base in the other sequence, or
+    # goes against a gap
+    if len(bases_1) == 1:
+        n = len(bases_2)
+        if sub_table is not None:
+            subs = sub_table[bases_1[0], bases_2]
+            j = int(np.argmax(subs))
+            if subs[j] > 2 * gap_penalty:
+                return [MOVE_L] * j + [MOVE_D] + [MOVE_L] * (n - j - 1)
+        return [MOVE_U] + [MOVE_L] * n
+
+    # Find the best column to split the second sequence at
+    mid  = len(bases_1) // 2
+    head = last_score_row(bases_1[:mid], bases_2, sub_table, False, gap_penalty)
+    tail = last_score_row(bases_1[mid:][::-1], bases_2[::-1], sub_table, False, gap_penalty)
+    split = int(np.argmax(head + tail[::-1]))
+
+    return (
+          hirschberg(bases_1[:mid], bases_2[:split], sub_table, gap_penalty)
+        + hirschberg(bases_1[mid:], bases_2[split:], sub_table, gap_penalty)
+    )
+
+
+# Find one optimal alignment in linear memory, returning its source, end, and path
+def linear_alignment(bases_1, bases_2, sub_table, is_local, gap_penalty):
+
+    if not is_local:
+        return (0, 0), (len(bases_1), len(bases_2)), hirschberg(bases_1, bases_2, sub_table, gap_penalty)
+
+    # Find the end of the local alignment: the first max cell in the score matrix
+    best, end = -np.inf, (0, 0)
+    for i, row in enumerate(score_rows(bases_1, bases_2, sub_table, True, gap_penalty)):
+        j = int(np.argmax(row))
+        if row[j] > best:
+            best, end = row[j], (i, j)
+
+    # Find the start by scoring backwards from the end - the first cell that reaches the max
+    # score is the start of a global alignment of the two substrings with that score
+    source = end
+    rows = score_rows(bases_1[:end[0]][::-1], bases_2[:end[1]][::-1], sub_table, False, gap_penalty)
+    for i, row in enumerate(rows):
+        hits = np.flatnonzero(row == best)
+        if len(hits) > 0:
+            source = (end[0] - i, end[1] - int(hits[0]))
+            break
+
+    path = hirschberg(
+        bases_1[source[0] : end[0]], bases_2[source[1] : end[1]], sub_table, gap_penalty
+    )
+    return source, end, path
+
+
+# Add up the score of a path through the matrix
+def path_score(bases_1, bases_2, source, path, sub_table, gap_penalty):
+    moves = np.array(path, dtype=np.uint8)
+    diag  = moves == MOVE_D
+
+    score = np.float64(np.count_nonzero(~diag) * gap_penalty)
+    if sub_table is not None and diag.any():
+
+        # Work out the cell each move starts from
+        step_i = (moves != MOVE_L).astype(np.int64)
+        step_j = (moves != MOVE_U).astype(np.int64)
+        rows = source[0] + np.cumsum(step_i) - step_i
+        cols = source[1] + np.cumsum(step_j) - step_j
+
+        score += sub_table[bases_1[rows[diag]], bases_2[cols[diag]]].sum()
+
+    return score
+
+
 # Generator function that produces pairs of characters from the given sequences
 def path_to_alignment(source, path, seq1, seq2):
 
@@ -173,6 +775,83 @@ def path_to_alignment(source, path, seq1, seq2):
 
 
 
+# Same as path_to_alignment, but builds the bytes of both aligned sequences at once
+def aligned_bases(source, path, seq1, seq2):
+    from ._sequence import _byte_array
+
+    moves  = np.array(path, dtype=np.uint8)
+    result = []
+
+    # Each sequence has a base for every step except the ones moving along the other sequence
+    for seq, start, skip in ( (seq1, source[0], MOVE_L), (seq2, source[1], MOVE_U) ):
+        used = moves != skip
+        idxs = start + np.cumsum(used) - used
+
+        bases = np.full(len(moves), ord('-'), dtype=np.uint8)
+        bases[used] = _byte_array(seq)[idxs[used]]
+        result.append(bases.tobytes())
+
+    return result
+
+
+# Convert a path through the matrix to a pair of aligned sequences
+# If whole sequences are desired, the bases before the source and after the end are included
+def build_alignment(seq1, seq2, source, path, end, whole_seqs):
+    from ._sequence import Seq
+
+    # If whole sequences are desired, add everything before the matching region
+    if whole_seqs:
+        s1 = seq1.view(0, source[0]) >> source[1]
+        s2 = seq2.view(0, source[1]) >> source[0]
+
+    # If not, initialize empty Sequences
+    else:
+        s1 = Seq()
+        s2 = Seq()
+
+    # Convert sequences to an alignment, all at once
+    bases_1, bases_2 = aligned_bases(source, path, seq1, seq2)
+    s1 += Seq(bases_1)
+    s2 += Seq(bases_2)
+
+    # Add the rest of the sequences
+    if whole_seqs:
+        s1 += seq1.view(end[0]) << (len(seq2) - end[1])
+        s2 += seq2.view(end[1]) << (len(seq1) - end[0])
+
+    return s1, s2
+
+
+
+# Create a scoring matrix from the "score" parameter of align
+#   - a string names one of the built-in matrices
+#   - a tuple gives the (match, mismatch) scores
+#   - anything else is used as the matrix itself
+def scoring_matrix(score):
+    if isinstance(score, str):
+        return parse_matrix(score)
+    elif isinstance(score, tuple):
+        keys = "CSTPAGNDEQHRKMILVFYW"
+        return { ord(key1): { ord(key2): score[0] if key1 == key2 else score[1] for key2 in keys } for key1 in keys }
+    else:
+        return score
+
+
+
+# Build the key for an alignment in an AlignmentCache, from digests of both sequences and
+# every option that changes the result
+def cache_key(seq1, seq2, score, options):
+    from ._alignCache import digest
+
+    # Built-in matrices are keyed by name, and other dict matrices by their contents
+    if not isinstance(score, (str, tuple)):
+        names = [ name for name in MATRIX_NAMES if score is parse_matrix(name) ]
+        score = names[0] if names else digest(repr(score))
+
+    return ( digest(seq1), digest(seq2), score, tuple(sorted(options.items())) )
+
+
+
 # The main logic of the program
 def align(
     seq1, seq2,
@@ -183,6 +862,16 @@ def align(
     return_tables = False,
     whole_seqs    = False,
     no_mismatch   = False,
+    band          = None,
+    max_edits     = None,
+    linear_memory = False,
+    score_only    = False,
+    max_results   = None,
+    sample        = None,
+    seed          = None,
+    max_memory    = None,
+    scratch_dir   = None,
+    cache         = None,
 ):
     
     # The arrow matrix uses bit-masked values to determine where to go
@@ -197,86 +886,94 @@ def align(
 
     from ._sequence import Seq
 
-    # Ensure sequences are Seq objects
+    # Ensure sequences are Seq objects (before digesting them for the cache)
     if not isinstance(seq1, Seq):
         seq1 = Seq(seq1)
     if not isinstance(seq2, Seq):
         seq2 = Seq(seq2)
 
-    # Create a scoring matrix from the "score" parameter
-    if isinstance(score, str):
-        matrix = parse_matrix(score)
-    elif isinstance(score, tuple):
-        keys = "CSTPAGNDEQHRKMILVFYW"
-        matrix = { ord(key1): { ord(key2): score[0] if key1 == key2 else score[1] for key2 in keys } for key1 in keys }
-    else:
-        matrix = score
+    # Look the result up in the cache, if one is given (or the shared cache, if cache=True)
+    # Tables are never cached, and neither are unseeded random samples
+    if cache is not None and cache is not False and not return_tables and (sample is None or seed is not None):
+        from ._alignCache import default_cache
+        if cache is True:
+            cache = default_cache
+
+        options = dict(
+            is_local=is_local, gap_penalty=gap_penalty, one_result=one_result, whole_seqs=whole_seqs,
+            no_mismatch=no_mismatch, band=band, max_edits=max_edits, linear_memory=linear_memory,
+            score_only=score_only, max_results=max_results, sample=sample, seed=seed,
+        )
+        key = cache_key(seq1, seq2, score, options)
+
+        result = cache.get(key)
+        if result is None:
+            result = align(
+                seq1, seq2, score=score, max_memory=max_memory, scratch_dir=scratch_dir, **options
+            )
+            cache.put(key, result)
+        return result
 
     # Compute the number of columns and rows
     rows = len(seq1) + 1    # Sequence 1 is vertical
     cols = len(seq2) + 1    # Sequence 2 is horizontal
-    
-    # Create the result matrix and the arrow (directions) matrix
-    # I store the directions as chars rather than ints - it's a bit more space efficient,
-    # since I only need three bits for each entry
-    score_matrix = np.zeros((rows, cols))
-    arrow_matrix = np.full( (rows, cols), '0' )
-    
-    # Initialize the first row and column using numpy
-    # If using local alignment, we want the first row/col to be filled with zeroes
-    #    - In the score matrix, this represents a potential start point
-    #    - In the arrow matrix, this represents a location to terminate the traceback
-    if not is_local:
-        
-        # The scores just compound the gap penalty
-        score_matrix[:, 0] = np.arange(rows) * gap_penalty
-        score_matrix[0, :] = np.arange(cols) * gap_penalty
-        
-        # The arrows just point left and upward
-        # Explicitly slice from 1 to keep the top left corner as a terminating 0
-        arrow_matrix[1:, 0 ] = np.full(rows - 1, MOVE_U)
-        arrow_matrix[0 , 1:] = np.full(cols - 1, MOVE_L)
-
-    # Loop through each cell in the matrices, skipping the first row/col
-    for i in range(1, rows):
-        for j in range(1, cols):
-            
-            # Compute the score from the left and upper cells (add gap penalty)
-            score_l = score_matrix[i  , j-1] + gap_penalty
-            score_u = score_matrix[i-1, j  ] + gap_penalty
-
-            if no_mismatch:
-                score_d = min(score_l, score_u) - 1
 
-            else:
-                # Compute the score from the diagonal cell (add dictionary matrix value)
-                # score_d = score_matrix[i-1, j-1] + matrix[seq1[i-1]][seq2[j-1]]
-                base_1 = seq1.get_raw(i-1)
-                base_2 = seq2.get_raw(j-1)
-                if base_1 == ord('-') or base_2 == ord('-'):
-                    add_score = 0
-                else:
-                    add_score = matrix[base_1][base_2]
-
-                score_d = score_matrix[i-1, j-1] + add_score
-            
-            # Compute the maximum possible score and store it in the result array
-            score_matrix[i, j] = max_score = max(score_l, score_u, score_d)
-            
-            # Special case: in a local search, all would-be negative values map to 0
-            if is_local and max_score < 0:
-                score_matrix[i, j] = 0
-                arrow_matrix[i, j] = 0
-            
-            # For each direction, if that direction would give the max score,
-            # add it to the result with bit masking
-            else:
-                direction = 0
-                if score_l == max_score:    direction |= MOVE_L
-                if score_u == max_score:    direction |= MOVE_U
-                if score_d == max_score:    direction |= MOVE_D
-                arrow_matrix[i, j] = direction
-            
+    # Get the raw bytes of each sequence, and check every pair of bases can be scored
+    from ._sequence import _byte_array
+    bases_1 = _byte_array(seq1)
+    bases_2 = _byte_array(seq2)
+
+    if no_mismatch:
+        sub_table = None
+    else:
+        sub_table = compiled_matrix(score)
+        check_substitutions(sub_table, bases_1, bases_2)
+        sub_table = sub_table.scores
+
+    # Just compute the score, without building the matrices (unless using a band)
+    if score_only and band is None and max_edits is None:
+        return alignment_score(bases_1, bases_2, sub_table, is_local, gap_penalty)
+
+    # Find a single alignment in linear memory, without building the matrices
+    if linear_memory:
+        if not one_result:
+            raise ValueError("Linear-memory alignment only finds one result (set one_result=True).")
+        if return_tables or band is not None or max_edits is not None:
+            raise ValueError("Linear-memory alignment can't return tables or use a band.")
+
+        source, end, path = linear_alignment(bases_1, bases_2, sub_table, is_local, gap_penalty)
+        align_score = path_score(bases_1, bases_2, source, path, sub_table, gap_penalty)
+        return align_score, build_alignment(seq1, seq2, source, path, end, whole_seqs)
+
+    # A maximum number of edits limits how far the alignment can stray from the diagonal
+    if band is None and max_edits is not None:
+        band = max_edits
+
+    # Make sure the matrices will fit in the memory budget before allocating them
+    # Full matrices over the budget can be mapped to files in the scratch directory instead
+    dtype  = score_dtype(sub_table, gap_penalty, rows, cols)
+    needed = table_memory(rows, cols, dtype, band)
+    over_budget = max_memory is not None and needed > max_memory
+    if over_budget and (scratch_dir is None or band is not None):
+        raise MemoryError(
+            f"Aligning {rows - 1} x {cols - 1} bases needs about {format_bytes(needed)} for the "
+            f"score and arrow matrices, over the limit of {format_bytes(max_memory)}."
+        )
+
+    # Matrices within the budget stay in memory - with no budget, a scratch directory means
+    # always mapping them to disk
+    if scratch_dir is not None and max_memory is not None and not over_budget:
+        scratch_dir = None
+
+    # Fill in the score and arrow matrices, either in full or just the band around the diagonal
+    if band is None:
+        score_matrix, arrow_matrix = fill_matrices(
+            bases_1, bases_2, sub_table, is_local, gap_penalty, dtype, scratch_dir
+        )
+    else:
+        score_matrix, arrow_matrix = fill_banded_matrices(
+            bases_1, bases_2, sub_table, is_local, gap_penalty, band
+        )
     
     # Get the start indices
     #   - for a local search, start from the max value(s)
@@ -285,47 +982,48 @@ def align(
     else:           start_idxs = [(rows - 1, cols - 1)]
     
     # Get the total alignment score (will be the same for all possible start idxs)
-    align_score = score_matrix[start_idxs[0]]
+    # Returned as a float, whatever type the matrix stores it as
+    align_score = np.float64(score_matrix[start_idxs[0]])
+    if score_only:
+        return align_score
     
     # Initialize empty list to store alignments
     alignments = []
 
+    # If the user just wants the first result, stop after one path
+    if one_result:
+        max_results = 1
+        if sample is not None:
+            sample = 1
+
+    # Pick random paths, uniformly from all the optimal ones
+    if sample is not None:
+        paths = sample_paths(score_matrix, arrow_matrix, start_idxs, sample, random.Random(seed))
+
     # Loop through all possible starting indices
     # Will only be multiple indices if local search finds multiple cells w max value
-    for start_idx in start_idxs:
-        for (source, path) in traceback(score_matrix, arrow_matrix, start_idx):
+    else:
+        paths = (
+            (start_idx, source, path)
+            for start_idx in start_idxs
+            for (source, path) in traceback(score_matrix, arrow_matrix, start_idx)
+        )
 
-            # If whole sequences are desired, add everything before the matching region
-            if whole_seqs:
-                s1 = seq1[0 : source[0]] >> source[1]
-                s2 = seq2[0 : source[1]] >> source[0]
+    for (start_idx, source, path) in islice(paths, max_results):
 
-            # If not, initialize empty Sequences
-            else:
-                s1 = Seq()
-                s2 = Seq()
-
-            # Convert sequences to an alignment, appending each new pair of chars
-            for (c1, c2) in path_to_alignment(source, path, seq1, seq2):
-                s1 += c1
-                s2 += c2
-
-            # Add the rest of the sequences
-            if whole_seqs:
-                s1 += seq1[start_idx[0] :] << (len(seq2) - start_idx[1])
-                s2 += seq2[start_idx[1] :] << (len(seq1) - start_idx[0])
-
-            # Add the alignment to the list
-            alignments += [(s1, s2)]
-            
-            # If the user just wants the first result, break out of both loops
-            if one_result:
-                alignments = alignments[0]
-                break
-        
-        # Break out of the outer loop if the inner is broken
-        else: continue
-        break
+        # Warn if a banded alignment runs along the edge of the band
+        if band is not None and path_touches_edge(score_matrix, source, path):
+            warnings.warn(
+                f"Alignment reaches the edge of the band ({band}); "
+                "the optimal alignment may lie outside it.",
+                RuntimeWarning,
+            )
+
+        # Add the alignment to the list
+        alignments += [ build_alignment(seq1, seq2, source, path, start_idx, whole_seqs) ]
+
+    if one_result:
+        alignments = alignments[0]
 
     # Return the score and alignment(s), as well as the matrices if requested
     if return_tables:    return align_score, alignments, score_matrix, arrow_matrix
@@ -333,6 +1031,65 @@ def align(
 
 
 
+# Count the optimal alignments of two sequences, without listing them
+def count_alignments(
+    seq1, seq2,
+    is_local    = DEFAULT_TYPE,
+    score       = DEFAULT_MATRIX,
+    gap_penalty = DEFAULT_PENALTY,
+    no_mismatch = False,
+    band        = None,
+    max_edits   = None,
+):
+    _, _, score_matrix, arrow_matrix = align(
+        seq1, seq2, is_local, score, gap_penalty, return_tables=True, no_mismatch=no_mismatch,
+        band=band, max_edits=max_edits, max_results=0,
+    )
+
+    # Get the start indices the same way as align
+    if is_local:    start_idxs = find_max_idxs(score_matrix)
+    else:           start_idxs = [( score_matrix.shape[0] - 1, score_matrix.shape[1] - 1 )]
+
+    counts = count_paths(score_matrix, arrow_matrix, start_idxs)
+    return sum( counts[int(row), int(col)] for row, col in start_idxs )
+
+
+
+# Score one sequence against each of a list of targets, returning a numpy array of scores
+# Targets are scored in batches of similar lengths, to limit the padding needed
+def align_scores(
+    query, targets,
+    is_local    = DEFAULT_TYPE,
+    score       = DEFAULT_MATRIX,
+    gap_penalty = DEFAULT_PENALTY,
+    no_mismatch = False,
+    batch_size  = 256,
+):
+    from ._sequence import _byte_array
+
+    query   = _byte_array(query)
+    targets = [ _byte_array(t) for t in targets ]
+
+    # Build the substitution table once for the whole batch
+    if no_mismatch:
+        sub_table = None
+    else:
+        sub_table = compiled_matrix(score)
+        if len(targets) > 0:
+            check_substitutions(sub_table, query, np.concatenate(targets))
+        sub_table = sub_table.scores
+
+    # Group the targets by length, and score each group together
+    scores = np.zeros(len(targets))
+    order  = sorted(range(len(targets)), key=lambda k: len(targets[k]))
+    for start in range(0, len(order), batch_size):
+        idxs = order[start : start + batch_size]
+        scores[idxs] = batch_scores(query, [ targets[k] for k in idxs ], sub_table, is_local, gap_penalty)
+
+    return scores
+
+
+
 if __name__ == "__main__":
 
     # Parse the command line arguments
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Import the package from the source tree
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from Sequence import Seq
+from Sequence.align import MOVE_D, MOVE_L, MOVE_U, compiled_matrix, count_paths, fill_matrices, find_max_idxs
+
+
+# The original per-cell fill of the score and arrow matrices, to check the vectorized fill against
+def reference_fill(bases_1, bases_2, sub_table, is_local, gap_penalty):
+    rows, cols = len(bases_1) + 1, len(bases_2) + 1
+    score_matrix = np.zeros((rows, cols))
+    arrow_matrix = np.zeros((rows, cols), dtype=np.uint8)
+
+    if not is_local:
+        score_matrix[:, 0] = np.arange(rows) * gap_penalty
+        score_matrix[0, :] = np.arange(cols) * gap_penalty
+        arrow_matrix[1:, 0] = MOVE_U
+        arrow_matrix[0, 1:] = MOVE_L
+
+    for i in range(1, rows):
+        for j in range(1, cols):
+            score_l = score_matrix[i  , j-1] + gap_penalty
+            score_u = score_matrix[i-1, j  ] + gap_penalty
+            score_d = score_matrix[i-1, j-1] + sub_table[bases_1[i-1], bases_2[j-1]]
+
+            score_matrix[i, j] = max_score = max(score_l, score_u, score_d)
+            if is_local and max_score < 0:
+                score_matrix[i, j] = 0
+                arrow_matrix[i, j] = 0
+            else:
+                arrow_matrix[i, j] = (
+                      (score_l == max_score) * MOVE_L
+                    | (score_u == max_score) * MOVE_U
+                    | (score_d == max_score) * MOVE_D
+                )
+
+    return score_matrix, arrow_matrix
+
+
+def random_bases(rng, length):
+    return np.frombuffer("".join( rng.choice("ACGT") for _ in range(length) ).encode(), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("is_local", [False, True])
+@pytest.mark.parametrize("score", [(1, -1), (1.7, -0.9), (2.3, -1.1)])
+def test_fill_matches_reference_with_float_penalties(is_local, score):
+    rng = random.Random(9)
+    sub_table = compiled_matrix(score).scores
+
+    for _ in range(40):
+        bases_1 = random_bases(rng, rng.randint(0, 25))
+        bases_2 = random_bases(rng, rng.randint(0, 25))
+        gap_penalty = round(rng.uniform(-3, -0.1), rng.randint(1, 3))
+
+        expected = reference_fill(bases_1, bases_2, sub_table, is_local, gap_penalty)
+        actual   = fill_matrices(bases_1, bases_2, sub_table, is_local, gap_penalty)
+
+        # Scores must be bit-equal, or ties (and so arrows and path counts) can change
+        assert np.array_equal(actual[0], expected[0])
+        assert np.array_equal(actual[1], expected[1])
+
+        start_idxs = find_max_idxs(expected[0]) if is_local else [(len(bases_1), len(bases_2))]
+        assert count_paths(*actual, start_idxs) == count_paths(*expected, start_idxs)
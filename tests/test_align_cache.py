@@ -0,0 +1,93 @@
+from Sequence import AlignmentCache, PackedSeq, Seq, read_first
+from Sequence.align import align
+from Sequence._alignCache import result_size
+
+
+def write_fasta(path, seq):
+    path.write_text(f">seq1 test\n{seq}\n")
+    return str(path)
+
+
+def test_cache_accepts_readers(tmp_path):
+    reader = read_first(write_fasta(tmp_path / "seq.fasta", "ACGTACGTTT"))
+    cache  = AlignmentCache()
+
+    expected = align("ACGTACGTTT", "ACGTTT", is_local=True, one_result=True)
+    assert align(reader, Seq("ACGTTT"), is_local=True, one_result=True, cache=cache) == expected
+    assert align("ACGTACGTTT", "ACGTTT", is_local=True, one_result=True, cache=cache) == expected
+    assert cache.stats()["hits"] == 1
+
+
+def test_cache_accepts_packed_seqs():
+    cache = AlignmentCache()
+    first = align(PackedSeq("ACGTAC"), "ACGAC", one_result=True, cache=cache)
+    assert align(Seq("ACGTAC"), "ACGAC", one_result=True, cache=cache) == first
+    assert cache.stats()["hits"] == 1
+
+
+
+### Cache Behaviour ###
+
+def test_lru_eviction_order():
+    cache = AlignmentCache(max_entries=3)
+    for key in "abc":
+        cache.put(key, key)
+
+    # Looking up "a" makes "b" the least recently used, so it's evicted first
+    assert cache.get("a") == "a"
+    cache.put("d", "d")
+    assert [ key in cache for key in "abcd" ] == [ True, False, True, True ]
+
+    # Replacing a result also counts as using it
+    cache.put("c", "C")
+    cache.put("e", "e")
+    assert [ key in cache for key in "acde" ] == [ False, True, True, True ]
+    assert cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 2
+
+
+def test_byte_budget():
+    results = { key: (1.0, [ (Seq("ACGT" * n), Seq("ACGA" * n)) ]) for key, n in zip("abcd", (10, 20, 30, 40)) }
+    sizes   = { key: result_size(result) for key, result in results.items() }
+    assert sizes["a"] < sizes["b"] < sizes["c"] < sizes["d"]
+
+    # Room for "c" and "d" together, but not "b" as well
+    cache = AlignmentCache(max_bytes=sizes["c"] + sizes["d"])
+    for key in "abcd":
+        cache.put(key, results[key])
+    assert len(cache) == 2 and "c" in cache and "d" in cache
+    assert cache.nbytes == sizes["c"] + sizes["d"] <= cache.max_bytes
+
+    # A result bigger than the whole budget isn't stored, and doesn't evict anything
+    cache.put("e", (1.0, [ (Seq("A" * cache.max_bytes), Seq("A" * cache.max_bytes)) ]))
+    assert "e" not in cache and len(cache) == 2
+
+
+def test_stats():
+    cache = AlignmentCache()
+    for _ in range(3):
+        align("ACGTACGT", "ACGACGT", cache=cache)
+    align("ACGTACGT", "ACGACGT", is_local=True, cache=cache)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+    assert stats["hit_rate"] == 0.5
+    assert stats["nbytes"] == cache.nbytes > 0
+
+    cache.clear()
+    assert cache.stats() == { "hits": 0, "misses": 0, "hit_rate": 0.0, "evictions": 0, "entries": 0, "nbytes": 0 }
+
+
+def test_results_are_copies():
+    cache    = AlignmentCache()
+    expected = align("ACGTAC", "ACGAC", one_result=True)
+
+    # Changing the sequences that were stored, or that come back from a hit, doesn't change the cache
+    first = align("ACGTAC", "ACGAC", one_result=True, cache=cache)
+    first[1][0][0] = ord("T")
+    second = align("ACGTAC", "ACGAC", one_result=True, cache=cache)
+    assert second == expected
+
+    second[1][1].append(ord("G"))
+    assert align("ACGTAC", "ACGAC", one_result=True, cache=cache) == expected
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,469 @@
+import random
+import warnings
+
+import numpy as np
+import pytest
+
+from Sequence import Seq
+from Sequence.align import align, compiled_matrix
+
+
+SCORES = [ "simple", "blosum62", (2, -3), (1.5, -0.5) ]
+
+
+def random_seq(rng, length, alphabet="ACGT"):
+    return "".join(rng.choices(alphabet, k=length))
+
+
+def mutate(rng, seq, edits, alphabet="ACGT"):
+    """
+    Apply a number of random substitutions, insertions and deletions to a sequence.
+    """
+    seq = list(seq)
+    for _ in range(edits):
+        kind = rng.choice("sid") if seq else "i"
+        pos  = rng.randrange(len(seq) + (kind == "i"))
+        if kind == "s":    seq[pos] = rng.choice(alphabet)
+        if kind == "i":    seq.insert(pos, rng.choice(alphabet))
+        if kind == "d":    del seq[pos]
+    return "".join(seq)
+
+
+def path_score(aligned_1, aligned_2, score, gap_penalty):
+    """
+    Add up the score of a pair of aligned sequences, one column at a time.
+    """
+    table = compiled_matrix(score).scores
+    total = 0.0
+    for x, y in zip(aligned_1.tobytes(), aligned_2.tobytes()):
+        if x == ord('-') or y == ord('-'):    total += gap_penalty
+        else:                                 total += float(table[x, y])
+    return total
+
+
+def check_alignment(seq1, seq2, alignment, align_score, score, gap_penalty, is_local):
+    """
+    Check an alignment is made of the two sequences (or parts of them, for a local alignment),
+    and that it adds up to the reported score.
+    """
+    aligned_1, aligned_2 = alignment
+    assert len(aligned_1) == len(aligned_2)
+
+    bases_1 = str(aligned_1).replace('-', '')
+    bases_2 = str(aligned_2).replace('-', '')
+    if is_local:
+        assert bases_1 in seq1 and bases_2 in seq2
+    else:
+        assert bases_1 == seq1 and bases_2 == seq2
+
+    assert path_score(aligned_1, aligned_2, score, gap_penalty) == pytest.approx(align_score)
+
+
+def alignment_key(alignment):
+    return tuple( str(seq) for seq in alignment )
+
+
+def random_cases(seed, count, max_length=30, alphabet="ACGT"):
+    """
+    Random pairs of related sequences, with random alignment options.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        seq1 = random_seq(rng, rng.randint(0, max_length), alphabet)
+        seq2 = mutate(rng, seq1, rng.randint(0, 6), alphabet) if rng.random() < 0.7 else random_seq(rng, rng.randint(0, max_length), alphabet)
+        yield seq1, seq2, dict(
+            is_local    = rng.random() < 0.5,
+            score       = rng.choice(SCORES),
+            gap_penalty = rng.choice([ -1, -2, -4, -1.5 ]),
+        )
+
+
+
+### Banded Alignment ###
+
+def test_wide_band_matches_full():
+    for seq1, seq2, options in random_cases(10, 150):
+        full_score, full_alignments = align(seq1, seq2, **options)
+
+        # A band as wide as the matrix holds every cell
+        band = max(len(seq1), len(seq2)) + 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            banded_score, banded_alignments = align(seq1, seq2, band=band, **options)
+
+        assert banded_score == full_score
+        assert sorted(map(alignment_key, banded_alignments)) == sorted(map(alignment_key, full_alignments))
+
+
+def test_max_edits_covers_the_edits():
+    rng = random.Random(11)
+    for _ in range(100):
+        seq1  = random_seq(rng, rng.randint(20, 80))
+        edits = rng.randint(0, 5)
+        seq2  = mutate(rng, seq1, edits)
+        options = dict(score=(1, -1), gap_penalty=-1, one_result=True)
+
+        full_score, _ = align(seq1, seq2, **options)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            banded_score, alignment = align(seq1, seq2, max_edits=edits, **options)
+
+        # Every alignment with at most `edits` gaps fits in the band, so the optimum is found
+        assert banded_score == full_score
+        check_alignment(seq1, seq2, alignment, banded_score, (1, -1), -1, False)
+
+
+def test_narrow_band_warns():
+    rng  = random.Random(12)
+    core = random_seq(rng, 60)
+
+    # The same length, but shifted by 8 bases - the best alignment is 8 diagonals off
+    seq1 = random_seq(rng, 8) + core
+    seq2 = core + random_seq(rng, 8)
+
+    full_score, _ = align(seq1, seq2, score=(2, -3), gap_penalty=-2, one_result=True)
+    with pytest.warns(RuntimeWarning, match="edge of the band"):
+        banded_score, _ = align(seq1, seq2, score=(2, -3), gap_penalty=-2, one_result=True, band=2)
+    assert banded_score < full_score
+
+    # Widening the band finds the optimum again, without a warning
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        wide_score, _ = align(seq1, seq2, score=(2, -3), gap_penalty=-2, one_result=True, band=12)
+    assert wide_score == full_score
+
+
+def test_banded_score_only_and_count():
+    from Sequence.align import count_alignments
+
+    for seq1, seq2, options in random_cases(13, 60, max_length=20):
+        band = max(len(seq1), len(seq2)) + 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            assert align(seq1, seq2, band=band, score_only=True, **options) == align(seq1, seq2, score_only=True, **options)
+            assert count_alignments(seq1, seq2, band=band, **options) == count_alignments(seq1, seq2, **options)
+
+
+
+### Linear-Memory Alignment ###
+
+def test_linear_memory_matches_full():
+    for seq1, seq2, options in random_cases(20, 200):
+        full_score, _ = align(seq1, seq2, one_result=True, **options)
+        linear_score, alignment = align(seq1, seq2, one_result=True, linear_memory=True, **options)
+
+        assert linear_score == pytest.approx(full_score)
+        check_alignment(seq1, seq2, alignment, full_score, options["score"], options["gap_penalty"], options["is_local"])
+
+
+def test_linear_memory_whole_seqs():
+    rng = random.Random(21)
+    for _ in range(50):
+        seq1 = random_seq(rng, rng.randint(1, 30))
+        seq2 = mutate(rng, seq1, 3)
+        _, (aligned_1, aligned_2) = align(seq1, seq2, is_local=True, one_result=True, linear_memory=True, whole_seqs=True)
+        assert str(aligned_1).replace('-', '') == seq1
+        assert str(aligned_2).replace('-', '') == seq2
+
+
+def test_linear_memory_long_sequences():
+    rng  = random.Random(22)
+    seq1 = random_seq(rng, 2000)
+    seq2 = mutate(rng, seq1, 100)
+
+    full_score = align(seq1, seq2, score=(2, -3), gap_penalty=-4, score_only=True)
+    linear_score, alignment = align(seq1, seq2, score=(2, -3), gap_penalty=-4, one_result=True, linear_memory=True)
+    assert linear_score == full_score
+    check_alignment(seq1, seq2, alignment, full_score, (2, -3), -4, False)
+
+
+def test_linear_memory_options():
+    with pytest.raises(ValueError):
+        align("ACGT", "ACG", linear_memory=True)
+    with pytest.raises(ValueError):
+        align("ACGT", "ACG", one_result=True, linear_memory=True, band=2)
+
+
+
+### Score-Only and Batched Scoring ###
+
+def test_score_only_matches_full():
+    for seq1, seq2, options in random_cases(30, 200):
+        full_score, _ = align(seq1, seq2, one_result=True, **options)
+        assert align(seq1, seq2, score_only=True, **options) == full_score
+        assert align(seq1, seq2, score_only=True, no_mismatch=True, gap_penalty=-1) == align(seq1, seq2, one_result=True, no_mismatch=True, gap_penalty=-1)[0]
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 256])
+def test_align_scores_matches_align(batch_size):
+    from Sequence.align import align_scores
+
+    rng   = random.Random(31)
+    query = random_seq(rng, 25)
+    targets = [ mutate(rng, query, rng.randint(0, 8)) for _ in range(20) ] + [ "", random_seq(rng, 60) ]
+
+    for options in ( dict(is_local=False, score=(2, -3), gap_penalty=-2), dict(is_local=True, score="blosum62", gap_penalty=-1.5) ):
+        expected = [ align(query, target, score_only=True, **options) for target in targets ]
+        actual   = align_scores(query, targets, batch_size=batch_size, **options)
+
+        assert isinstance(actual, np.ndarray)
+        assert actual.tolist() == pytest.approx(expected)
+
+        # Targets can be any kind of sequence
+        assert align_scores(query, [ Seq(t) for t in targets ], batch_size=batch_size, **options).tolist() == actual.tolist()
+
+
+def test_align_scores_edge_cases():
+    from Sequence.align import align_scores
+
+    assert len(align_scores("ACGT", [])) == 0
+    with pytest.raises(KeyError):
+        align_scores("ACGT", ["ACGT", "ACXT"], score="blosum62")
+
+
+
+### Traceback, Counting, and Sampling ###
+
+# The original recursive traceback, to check the iterative one against
+def reference_traceback(score_matrix, arrow_matrix, coords):
+    from Sequence.align import MOVE_D, MOVE_L, MOVE_U
+
+    row, col = coords
+    curr_val = int(arrow_matrix[row, col])
+    if curr_val == 0:
+        yield ( coords, [] )
+        return
+
+    options = [ (MOVE_D, (-1, -1)), (MOVE_L, (0, -1)), (MOVE_U, (-1, 0)) ]
+    opts   = [ (move, (row + d[0], col + d[1])) for move, d in options if curr_val & move ]
+    scores = [ score_matrix[new_coords] for _, new_coords in opts ]
+    for (move, new_coords), score in zip(opts, scores):
+        if score == max(scores):
+            for origin, partial_path in reference_traceback(score_matrix, arrow_matrix, new_coords):
+                yield ( origin, partial_path + [move] )
+
+
+def start_cells(score_matrix, is_local):
+    from Sequence.align import find_max_idxs
+    if is_local:
+        return [ (int(i), int(j)) for i, j in find_max_idxs(score_matrix) ]
+    return [ (score_matrix.shape[0] - 1, score_matrix.shape[1] - 1) ]
+
+
+def test_traceback_matches_reference():
+    from Sequence.align import traceback
+
+    for seq1, seq2, options in random_cases(40, 150, max_length=15, alphabet="AC"):
+        _, _, score_matrix, arrow_matrix = align(seq1, seq2, return_tables=True, max_results=0, **options)
+
+        for start in start_cells(score_matrix, options["is_local"]):
+            expected = sorted( (tuple(map(int, source)), path) for source, path in reference_traceback(score_matrix, arrow_matrix, start) )
+            actual   = sorted( (tuple(map(int, source)), list(path)) for source, path in traceback(score_matrix, arrow_matrix, start) )
+            assert actual == expected
+
+
+def test_count_alignments_matches_enumeration():
+    from Sequence.align import count_alignments
+
+    for seq1, seq2, options in random_cases(41, 150, max_length=12, alphabet="AC"):
+        _, alignments = align(seq1, seq2, **options)
+        assert count_alignments(seq1, seq2, **options) == len(alignments)
+
+
+def test_max_results_and_sampling():
+    from Sequence.align import count_alignments
+
+    # Repetitive sequences have a huge number of co-optimal alignments
+    seq1, seq2 = "A" * 40, "C" * 30
+    total = count_alignments(seq1, seq2, score=(1, -1), gap_penalty=0)
+    assert total > 10 ** 9
+
+    _, alignments = align(seq1, seq2, score=(1, -1), gap_penalty=0, max_results=25)
+    assert len(alignments) == 25 and len(set(map(alignment_key, alignments))) == 25
+
+    # Seeded samples are reproducible, and each is an optimal alignment
+    score, first  = align(seq1, seq2, score=(1, -1), gap_penalty=0, sample=10, seed=3)
+    _,     second = align(seq1, seq2, score=(1, -1), gap_penalty=0, sample=10, seed=3)
+    assert list(map(alignment_key, first)) == list(map(alignment_key, second))
+    for alignment in first:
+        check_alignment(seq1, seq2, alignment, score, (1, -1), 0, False)
+
+
+def test_sampling_covers_every_alignment():
+    # Ten co-optimal alignments, which should all turn up in enough samples
+    seq1, seq2 = "AAA", "CC"
+    _, alignments = align(seq1, seq2, score=(1, -1), gap_penalty=0)
+    _, samples    = align(seq1, seq2, score=(1, -1), gap_penalty=0, sample=500, seed=0)
+    assert len(alignments) == 10
+    assert set(map(alignment_key, samples)) == set(map(alignment_key, alignments))
+
+
+def test_long_traceback():
+    rng  = random.Random(42)
+    seq1 = random_seq(rng, 3000)
+    seq2 = mutate(rng, seq1, 50)
+
+    score, alignment = align(seq1, seq2, score=(1, -1), gap_penalty=-1, one_result=True)
+    check_alignment(seq1, seq2, alignment, score, (1, -1), -1, False)
+
+
+
+### Compiled Substitution Matrices ###
+
+@pytest.mark.parametrize("score", [ "blosum62", "pam250", "simple", (2, -3), (1.5, -0.5) ])
+def test_compiled_matrix_matches_dict(score):
+    from Sequence.align import scoring_matrix
+
+    matrix = scoring_matrix(score)
+    table  = compiled_matrix(score)
+
+    for key1, row in matrix.items():
+        assert table.keys[key1]
+        for key2, value in row.items():
+            assert table.valid[key1, key2]
+            assert table.scores[key1, key2] == value
+
+    # Pairs with a gap always score 0, and nothing else is in the matrix
+    gap = ord('-')
+    assert (table.scores[gap] == 0).all() and (table.scores[:, gap] == 0).all()
+    assert table.valid.sum() == sum( len(row) for row in matrix.values() ) + 2 * 256 - 1
+
+    # Whole-number scores are stored as small integers
+    if all( float(v).is_integer() for row in matrix.values() for v in row.values() ):
+        assert table.scores.dtype == np.int8
+    else:
+        assert table.scores.dtype.kind == 'f'
+
+
+def test_compiled_matrices_are_cached():
+    from Sequence.align import parse_matrix
+
+    assert compiled_matrix("blosum62") is compiled_matrix("blosum62")
+    assert compiled_matrix((2, -3)) is compiled_matrix((2, -3))
+    assert compiled_matrix(parse_matrix("pam250")) is compiled_matrix("pam250")
+
+    # Compiled tables can't be modified
+    with pytest.raises(ValueError):
+        compiled_matrix("simple").scores[0, 0] = 1
+
+
+def test_custom_dict_matrices():
+    from Sequence.align import scoring_matrix
+
+    # A dict matrix with the same scores as a tuple gives the same alignment
+    matrix = { chr(k1): { chr(k2): v for k2, v in row.items() } for k1, row in scoring_matrix((2, -3)).items() }
+    assert align("ACGTTGCA", "ACGTGCA", score=matrix) == align("ACGTTGCA", "ACGTGCA", score=(2, -3))
+
+    # Dict matrices are compiled each time, so changes to them are picked up
+    before = align("AC", "AC", score=matrix, score_only=True)
+    matrix["A"]["A"] = 10
+    assert align("AC", "AC", score=matrix, score_only=True) == before + 8
+
+    # Pairs missing from the matrix raise a KeyError for the missing base
+    with pytest.raises(KeyError):
+        align("ACGU", "ACGT", score=matrix)
+
+
+
+### Matrix Types and Memory Budget ###
+
+def test_score_dtype():
+    from Sequence.align import score_dtype
+
+    table = compiled_matrix((2, -3)).scores
+    assert score_dtype(table, -1, 10, 10)       == np.int8
+    assert score_dtype(table, -1, 30, 30)       == np.int16
+    assert score_dtype(table, -1, 10 ** 4, 10 ** 4) == np.int32
+    assert score_dtype(table, -1, 10 ** 9, 10 ** 9) == np.int64
+
+    # The bound comes from the largest step, whether it's a gap or a substitution
+    assert score_dtype(table, -100, 10, 10) == np.int16
+    assert score_dtype(None,  -1,   50, 50) == np.int8
+
+    # Anything fractional needs floats
+    assert score_dtype(table, -1.5, 10, 10) == np.float64
+    assert score_dtype(compiled_matrix((1.5, -0.5)).scores, -1, 10, 10) == np.float64
+
+
+def test_compact_tables_match_float_tables():
+    from Sequence.align import fill_matrices, score_dtype
+
+    rng   = random.Random(50)
+    table = compiled_matrix((100, -100)).scores
+
+    # Lengths on both sides of each type's limit, with scores as large as they can get
+    for length in (0, 1, 2, 60, 64, 200, 400):
+        seq1 = np.frombuffer(random_seq(rng, length, "A").encode(), dtype=np.uint8)
+        seq2 = np.frombuffer(random_seq(rng, length + 3, "C").encode(), dtype=np.uint8)
+
+        for is_local in (False, True):
+            dtype = score_dtype(table, -100, len(seq1) + 1, len(seq2) + 1)
+            compact = fill_matrices(seq1, seq2, table, is_local, -100, dtype)
+            full    = fill_matrices(seq1, seq2, table, is_local, -100, np.float64)
+
+            assert compact[0].dtype == dtype
+            assert np.array_equal(compact[0].astype(np.float64), full[0])
+            assert np.array_equal(compact[1], full[1])
+
+
+def test_return_tables_types():
+    score, _, score_matrix, arrow_matrix = align("ACGTTGCA", "ACGTGCA", score=(2, -3), gap_penalty=-2, return_tables=True)
+    assert score_matrix.dtype == np.int8 and arrow_matrix.dtype == np.uint8
+    assert isinstance(score, np.float64) and score == score_matrix[-1, -1]
+
+
+def test_max_memory():
+    from Sequence.align import score_dtype, table_memory
+
+    seq1, seq2 = "ACGT" * 50, "ACGA" * 50
+    needed = table_memory(201, 201, score_dtype(compiled_matrix("simple").scores, -1, 201, 201))
+
+    with pytest.raises(MemoryError, match="needs about"):
+        align(seq1, seq2, max_memory=needed - 1)
+
+    # Within the budget, the result is unchanged
+    assert align(seq1, seq2, max_memory=needed) == align(seq1, seq2)
+
+    # Banded matrices are budgeted by the size of the band
+    with pytest.raises(MemoryError):
+        align(seq1, seq2, band=5, max_memory=1000)
+    assert align(seq1, seq2, band=5, max_memory=table_memory(201, 201, np.float64, band=5), one_result=True)
+
+
+
+### Disk-Backed Matrices ###
+
+@pytest.mark.parametrize("tile_size", [ 1, 1000, 2 ** 24 ])
+def test_scratch_tables_match_memory(tmp_path, monkeypatch, tile_size):
+    import Sequence.align as align_module
+
+    # Small tiles split the fill into many blocks of rows
+    monkeypatch.setattr(align_module, "TILE_SIZE", tile_size)
+
+    rng = random.Random(60)
+    for is_local in (False, True):
+        seq1 = random_seq(rng, 150)
+        seq2 = mutate(rng, seq1, 15)
+        options = dict(is_local=is_local, score=(2, -3), gap_penalty=-2, return_tables=True, max_results=5)
+
+        # A budget smaller than the matrices sends them to the scratch directory
+        mapped = align(seq1, seq2, max_memory=1000, scratch_dir=str(tmp_path), **options)
+        memory = align(seq1, seq2, **options)
+
+        assert isinstance(mapped[2], np.memmap) and isinstance(mapped[3], np.memmap)
+        assert mapped[0] == memory[0]
+        assert list(map(alignment_key, mapped[1])) == list(map(alignment_key, memory[1]))
+        assert np.array_equal(mapped[2], memory[2]) and np.array_equal(mapped[3], memory[3])
+
+
+def test_scratch_only_when_over_budget(tmp_path):
+    _, _, score_matrix, _ = align("ACGT", "ACG", return_tables=True, max_memory=10 ** 6, scratch_dir=str(tmp_path))
+    assert not isinstance(score_matrix, np.memmap)
+
+    # Without a budget, a scratch directory always maps the matrices to disk
+    _, _, score_matrix, _ = align("ACGT", "ACG", return_tables=True, scratch_dir=str(tmp_path))
+    assert isinstance(score_matrix, np.memmap)
+
+    # The mapped files are never left behind in the scratch directory
+    del score_matrix
+    assert list(tmp_path.iterdir()) == []
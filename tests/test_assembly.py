@@ -0,0 +1,66 @@
+import random
+
+from Sequence import Seq, assemble
+from Sequence._assembly import candidate_overlaps, kmer_hashes
+
+
+def tiled_reads(genome, rng, min_len=100, max_len=150, min_overlap=40):
+    """
+    Cut overlapping reads covering every base of the genome, and shuffle them.
+    """
+    reads, start = [], 0
+    while True:
+        length = rng.randint(min_len, max_len)
+        reads.append(( start, genome[start : start + length] ))
+        if start + length >= len(genome):
+            break
+        start += rng.randint(1, length - min_overlap)
+    rng.shuffle(reads)
+    return reads
+
+
+def test_kmer_hashes():
+    seq = "ACGTNACGTAC"
+    hashes, positions = kmer_hashes(seq, k=4)
+
+    # K-mers with an N are skipped, and equal k-mers hash the same
+    kmers = [ seq[p : p + 4] for p in positions.tolist() ]
+    assert kmers == [ "ACGT", "ACGT", "CGTA", "GTAC" ]
+    assert hashes[0] == hashes[1] and len(set(hashes.tolist())) == 3
+
+
+def test_candidate_overlaps():
+    rng    = random.Random(1)
+    genome = "".join(rng.choices("ACGT", k=1000))
+    reads  = tiled_reads(genome, rng)
+
+    # Each overlap found is at the offset between the reads' true starts
+    overlaps = candidate_overlaps([ read for _, read in reads ])
+    assert overlaps
+    for (i, j), (offset, shared) in overlaps.items():
+        assert offset == reads[j][0] - reads[i][0]
+
+
+def test_reassemble_genome():
+    for seed in range(3):
+        rng    = random.Random(seed)
+        genome = "".join(rng.choices("ACGT", k=2000))
+        reads  = tiled_reads(genome, rng)
+
+        contigs = assemble([ read for _, read in reads ])
+        assert [ str(contig) for contig in contigs ] == [ genome ]
+
+        # Reads can be given as Seqs too
+        contigs = assemble([ Seq(read) for _, read in reads ])
+        assert [ str(contig) for contig in contigs ] == [ genome ]
+
+
+def test_separate_genomes():
+    rng     = random.Random(4)
+    genomes = [ "".join(rng.choices("ACGT", k=length)) for length in (1500, 800) ]
+    reads   = [ read for genome in genomes for _, read in tiled_reads(genome, rng) ]
+    rng.shuffle(reads)
+
+    # Reads from unrelated sequences don't overlap, so they give one contig each, longest first
+    assert [ str(contig) for contig in assemble(reads) ] == genomes
+
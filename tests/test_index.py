@@ -0,0 +1,69 @@
+import random
+
+import numpy as np
+import pytest
+
+from Sequence import Seq, SeqIndex, read_first
+
+
+def brute_force_locate(text, pattern):
+    return [ i for i in range(len(text) - len(pattern) + 1) if text[i : i + len(pattern)] == pattern ]
+
+
+def random_text(rng, length, alphabet="ACGT"):
+    return "".join(rng.choices(alphabet, k=length))
+
+
+@pytest.mark.parametrize("block_size", [1, 5, 64])
+def test_locate_matches_brute_force(block_size):
+    rng   = random.Random(block_size)
+    text  = random_text(rng, 2000, "ACGTN")
+    index = SeqIndex(Seq(text), block_size=block_size)
+    assert len(index) == len(text)
+
+    for _ in range(200):
+        length  = rng.randint(1, 8)
+        start   = rng.randint(0, len(text) - length)
+        pattern = text[start : start + length] if rng.random() < 0.7 else random_text(rng, length)
+
+        expected = brute_force_locate(text, pattern)
+        assert index.locate(pattern).tolist() == expected
+        assert index.count(pattern) == len(expected)
+        assert (pattern in index) == bool(expected)
+
+    assert index.count("X") == 0
+
+
+def test_empty_and_null_bytes():
+    assert SeqIndex("").count("A") == 0
+    with pytest.raises(ValueError):
+        SeqIndex(b"AC\x00GT")
+
+
+@pytest.mark.parametrize("name", ["genome.idx", "genome.npz", "genome"])
+def test_save_and_load_keep_the_name(tmp_path, name):
+    rng   = random.Random(20)
+    text  = random_text(rng, 3000)
+    index = SeqIndex(text)
+
+    filename = str(tmp_path / name)
+    index.save(filename)
+    loaded = SeqIndex.load(filename)
+
+    for pattern in [ text[i : i + k] for i, k in ((0, 5), (100, 3), (2990, 10)) ] + ["ACGTACGTAC", "T"]:
+        assert loaded.locate(pattern).tolist() == index.locate(pattern).tolist()
+        assert loaded.count(pattern) == index.count(pattern)
+
+
+def test_reader_index_round_trip(tmp_path):
+    rng  = random.Random(21)
+    text = random_text(rng, 1000)
+    fasta = tmp_path / "seq.fasta"
+    fasta.write_text(">seq\n" + "\n".join( text[i : i + 60] for i in range(0, len(text), 60) ) + "\n")
+
+    index = read_first(str(fasta)).build_index()
+    index.save(str(tmp_path / "seq.idx"))
+    loaded = SeqIndex.load(str(tmp_path / "seq.idx"))
+
+    for pattern in ("ACG", text[500:520], "GGGGGGGG"):
+        assert loaded.locate(pattern).tolist() == brute_force_locate(text, pattern)
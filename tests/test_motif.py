@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from Sequence import Seq, read_first
+from Sequence._constants import base_to_bin
+
+
+IUPAC = "ACGTRYSWKMBDHVN"
+
+
+def base_matches(motif_base, text_base):
+    """
+    A text base matches if every base it could be is allowed by the motif (gaps never match).
+    """
+    code = base_to_bin.get(ord(text_base))
+    return bool(code) and code & ~base_to_bin[ord(motif_base)] == 0
+
+
+def reference_finditer(text, motif, mismatches=0):
+    """
+    Compare the motif against every position of the text, one base at a time.
+    """
+    return [
+        i for i in range(len(text) - len(motif) + 1)
+        if sum( not base_matches(m, t) for m, t in zip(motif, text[i:]) ) <= mismatches
+    ]
+
+
+def test_matches_brute_force():
+    rng = random.Random(21)
+    for _ in range(300):
+        text       = "".join(rng.choices("ACGTN-RY", k=rng.randint(0, 60)))
+        motif      = "".join(rng.choices(IUPAC, k=rng.randint(1, 6)))
+        mismatches = rng.choice([0, 0, 1, 2])
+        expected   = reference_finditer(text, motif, mismatches)
+
+        assert list(Seq(text).finditer(motif, mismatches=mismatches)) == expected
+        assert Seq(text).find(motif, mismatches=mismatches) == (expected + [-1])[0]
+
+        # Searching part of the sequence gives positions in the whole sequence
+        start, end = rng.randint(-10, 10), rng.choice([ None, rng.randint(-10, 70) ])
+        offset     = range(len(text))[start:end].start
+        expected   = [ offset + i for i in reference_finditer(text[start:end], motif, mismatches) ]
+        assert list(Seq(text).view().finditer(motif, start, end, mismatches)) == expected
+
+
+def test_iupac_classes():
+    # R allows A and G (and R itself), but not N, which could be C or T
+    assert list(Seq("ARGNC").finditer("R")) == [ 0, 1, 2 ]
+    assert list(Seq("ACGT").finditer("N")) == [ 0, 1, 2, 3 ]
+    assert list(Seq("A-GT").finditer("N")) == [ 0, 2, 3 ]
+
+
+@pytest.mark.parametrize("motif", [ "", "AXG", "A-G" ])
+def test_invalid_motifs(motif):
+    with pytest.raises(ValueError):
+        Seq("ACGT").find(motif)
+
+
+@pytest.mark.parametrize("window_size", [ 1, 7, 100, None ])
+def test_reader_windows(tmp_path, window_size):
+    rng  = random.Random(5)
+    text = "".join(rng.choices("ACGTN", k=3000))
+
+    # Plant copies of the motif across the ends of the windows
+    for start in (0, 5, 95, 1198, 2994):
+        text = text[:start] + "GAATTC" + text[start + 6 :]
+
+    path = tmp_path / "seq.fasta"
+    path.write_text(">seq\n" + "".join( text[i : i + 60] + "\n" for i in range(0, len(text), 60) ))
+    reader = read_first(str(path))
+
+    for motif, mismatches in [ ("GAATTC", 0), ("TATAWAWR", 0), ("GGNNCC", 0), ("ACGTACGT", 2) ]:
+        expected = reference_finditer(text, motif, mismatches)
+        assert list(reader.finditer(motif, mismatches, window_size=window_size)) == expected
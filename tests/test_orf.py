@@ -0,0 +1,98 @@
+import random
+import warnings
+
+import pytest
+
+from Sequence import Seq, read_all
+from Sequence._constants import frame_values
+
+
+def reference_orfs(protein, frame, min_length):
+    """
+    Pair each start (M) with the next stop (*) in a translated frame, one amino acid at a time.
+    """
+    orfs, starts = [], []
+    for i, amino in enumerate(protein):
+        if amino == "M":
+            starts.append(i)
+        elif amino == "*":
+            orfs += [ (frame, s, i) for s in starts if i - s >= min_length ]
+            starts = []
+    return orfs
+
+
+def random_orf_seq(rng, length):
+    """
+    A random sequence with extra start and stop codons, so every frame has plenty of ORFs.
+    """
+    codons = [ "ATG", "TAA", "TAG", "TGA" ]
+    bases  = []
+    while len(bases) < length:
+        bases += rng.choice(codons) if rng.random() < 0.2 else rng.choice("ACGTN")
+    return "".join(bases[:length])
+
+
+@pytest.fixture(scope="module")
+def readers(tmp_path_factory):
+    rng  = random.Random(7)
+    seqs = [ random_orf_seq(rng, length) for length in (0, 5, 60, 999, 1000, 4001) ]
+
+    path = tmp_path_factory.mktemp("orfs") / "seqs.fasta"
+    path.write_text("".join( f">seq{i}\n" + "".join( seq[j : j + 60] + "\n" for j in range(0, len(seq), 60) ) for i, seq in enumerate(seqs) ))
+    return list(zip(read_all(str(path)), seqs))
+
+
+def expected_orfs(seq, frame, min_length):
+    strand = seq if frame > 0 else str(~Seq(seq))
+    return reference_orfs(str(Seq(strand[abs(frame) - 1 :]).translate()), frame, min_length)
+
+
+
+### Serial Search ###
+
+@pytest.mark.parametrize("block_size", [4, 9, 100, 2 ** 20])
+def test_single_frames(readers, block_size):
+    for reader, seq in readers:
+        for frame in frame_values:
+            assert reader.find_orfs(frame=frame, block_size=block_size) == expected_orfs(seq, frame, 3)
+
+
+@pytest.mark.parametrize("min_length", [0, 3, 10])
+def test_all_frames(readers, min_length):
+    for reader, seq in readers:
+        expected = [ orf for frame in frame_values for orf in expected_orfs(seq, frame, min_length) ]
+        assert reader.find_orfs(min_length=min_length) == expected
+
+
+def test_processes_without_chunks(readers):
+    reader, seq = readers[-1]
+
+    # The serial search can't use more than one process, so asking for more warns
+    with pytest.warns(RuntimeWarning):
+        orfs = reader.find_orfs(frame=1, processes=4)
+    assert orfs == expected_orfs(seq, 1, 3)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        reader.find_orfs(frame=1)
+        reader.find_orfs(frame=1, processes=1)
+
+
+
+### Chunked Search ###
+
+# Chunk sizes that split codons, and that are shorter than most ORFs
+@pytest.mark.parametrize("chunk_size", [1, 7, 30, 301, 10 ** 6])
+def test_chunks_match_serial(readers, chunk_size):
+    for reader, seq in readers:
+        expected = [ orf for frame in frame_values for orf in expected_orfs(seq, frame, 3) ]
+        assert reader.find_orfs(chunk_size=chunk_size, processes=1) == expected
+
+        for frame in (1, -2):
+            assert reader.find_orfs(frame=frame, chunk_size=chunk_size, processes=1, block_size=16) == expected_orfs(seq, frame, 3)
+
+
+def test_chunks_in_parallel(readers):
+    reader, seq = readers[-1]
+    expected = [ orf for frame in frame_values for orf in expected_orfs(seq, frame, 5) ]
+    assert reader.find_orfs(min_length=5, chunk_size=500, processes=2) == expected
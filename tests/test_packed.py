@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from Sequence import PackedSeq, Seq
+
+
+IUPAC = "ACGTRYSWKMBDHVN-"
+
+
+def random_seq(rng, length, alphabet="ACGT"):
+    return "".join(rng.choices(alphabet, k=length))
+
+
+def mostly_acgt(rng, length):
+    """
+    A random sequence of A, C, G and T, with a few runs of other codes.
+    """
+    seq = list(random_seq(rng, length))
+    for _ in range(rng.randint(0, 4)):
+        if length == 0:
+            break
+        start = rng.randrange(length)
+        seq[start : start + rng.randint(1, 6)] = rng.choice(IUPAC[4:]) * rng.randint(1, 6)
+    return "".join(seq)
+
+
+@pytest.mark.parametrize("bits", [2, 4])
+def test_round_trip(bits):
+    rng = random.Random(bits)
+    for length in list(range(10)) + [ 63, 64, 65, 1000 ]:
+        for seq in ( mostly_acgt(rng, length), random_seq(rng, length, IUPAC) ):
+            packed = PackedSeq(seq, bits=bits)
+            assert len(packed) == len(seq)
+            assert str(packed) == seq
+            assert packed.unpack() == Seq(seq)
+            assert PackedSeq(Seq(seq), bits=bits) == packed
+
+
+def test_two_bit_storage():
+    rng = random.Random(3)
+    seq = random_seq(rng, 1001)
+
+    # Four bases per byte, with no exceptions for plain bases
+    packed = PackedSeq(seq, bits=2)
+    assert packed.nbytes == 251 and packed._exceptions == []
+    assert PackedSeq(seq, bits=4).nbytes == 501
+
+    # Other codes are kept as (start, stop, code) runs
+    packed = PackedSeq("ACGTNNNNACRRGT--A", bits=2)
+    assert [ (start, stop) for start, stop, _ in packed._exceptions ] == [ (4, 8), (10, 12), (14, 16) ]
+    assert str(packed) == "ACGTNNNNACRRGT--A"
+
+
+def test_repack():
+    seq = "ACGTNNRYACGT"
+    for bits, other in ( (2, 4), (4, 2) ):
+        packed = PackedSeq(seq, bits=bits)
+        assert packed.pack(bits) is packed
+        assert str(packed.pack(other)) == seq and packed.pack(other).bits == other
+
+
+def test_rna_and_invalid_bases():
+    packed = PackedSeq(Seq("ACGUN", rna=True), bits=2)
+    assert str(packed) == "ACGUN" and packed.unpack()._is_rna
+    assert str(PackedSeq("ACGUN")) == "ACGTN"
+
+    with pytest.raises(ValueError):
+        PackedSeq("ACXT")
+    with pytest.raises(ValueError):
+        PackedSeq("ACGT", bits=3)
+
+
+@pytest.mark.parametrize("bits", [2, 4])
+def test_indexing_matches_seq(bits):
+    rng = random.Random(10 + bits)
+    seq = mostly_acgt(rng, 50)
+    packed = PackedSeq(seq, bits=bits)
+
+    for elem in [ 0, 7, -1, slice(None), slice(4, 20), slice(3, 21), slice(8, 8), slice(-10, None), slice(None, None, 3), slice(None, None, -1) ]:
+        assert str(packed[elem]) == str(Seq(seq)[elem])
+
+    # Slices that start on a byte boundary share the same bytes as a fresh pack
+    assert packed[8:24] == PackedSeq(seq[8:24], bits=bits)
+    assert hash(packed[8:24]) == hash(PackedSeq(seq[8:24], bits=bits))
+
+
+@pytest.mark.parametrize("bits", [2, 4])
+def test_operators_match_seq(bits):
+    rng = random.Random(20 + bits)
+    for _ in range(100):
+        seq1 = random_seq(rng, rng.randint(0, 30), IUPAC[:-1])
+        seq2 = random_seq(rng, rng.randint(0, 30), IUPAC[:-1])
+        packed = PackedSeq(seq1, bits=bits)
+
+        assert str(packed & seq2) == str(Seq(seq1) & Seq(seq2))
+        assert str(packed | seq2) == str(Seq(seq1) | Seq(seq2))
+        assert str(packed - seq2) == str(Seq(seq1) - Seq(seq2))
+        assert str(~packed)       == str(~Seq(seq1))
+        assert str(PackedSeq(seq2, bits=bits) & packed) == str(Seq(seq2) & Seq(seq1))
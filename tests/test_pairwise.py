@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pytest
+
+from Sequence import align_all
+from Sequence.align import align
+
+
+# A scoring matrix that rewards aligning A (in the first sequence) against C (in the second),
+# but not the other way round
+ASYMMETRIC = {
+    x: { y: (1 if x == y else 3 if (x, y) == ("A", "C") else -2) for y in "ACGT" }
+    for x in "ACGT"
+}
+
+
+def random_seqs(seed, count):
+    rng = random.Random(seed)
+    return [ "".join(rng.choices("ACGT", k=rng.randint(1, 30))) for _ in range(count) ]
+
+
+def expected_scores(seqs, targets, **kwargs):
+    return np.array([ [ align(s, t, one_result=True, **kwargs)[0] for t in targets ] for s in seqs ])
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("is_local", [False, True])
+def test_against_targets(processes, is_local):
+    seqs, targets = random_seqs(1, 5), random_seqs(2, 4)
+    scores = align_all(seqs, targets, is_local=is_local, processes=processes, chunk_size=3)
+    assert np.array_equal(scores, expected_scores(seqs, targets, is_local=is_local))
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("score", [(1, -1), ASYMMETRIC])
+def test_all_vs_all(processes, score):
+    seqs     = random_seqs(3, 6)
+    expected = expected_scores(seqs, seqs, score=score)
+    np.fill_diagonal(expected, np.nan)
+
+    scores = align_all(seqs, score=score, processes=processes, chunk_size=2)
+    assert np.array_equal(scores, expected, equal_nan=True)
+
+
+def test_asymmetric_matrix():
+    seqs   = [ "AAAA", "CCCC" ]
+    scores = align_all(seqs, score=ASYMMETRIC, gap_penalty=-5, processes=1)
+
+    # Each order is aligned separately, rather than mirroring one into the other
+    assert scores[0, 1] == 12
+    assert scores[1, 0] == -8
+
+
+def test_alignments():
+    seqs = random_seqs(4, 4)
+
+    # With a symmetric matrix, only the pairs above the diagonal are aligned
+    scores, found = align_all(seqs, alignments=True, processes=1)
+    assert sorted(found) == [ (i, j) for i in range(4) for j in range(i + 1, 4) ]
+    for (i, j), alignment in found.items():
+        assert alignment == align(seqs[i], seqs[j], one_result=True)[1]
+        assert scores[i, j] == scores[j, i] == align(seqs[i], seqs[j], one_result=True)[0]
+
+    # Otherwise, every pair of different sequences is
+    scores, found = align_all(seqs, score=ASYMMETRIC, alignments=True, processes=1)
+    assert sorted(found) == [ (i, j) for i in range(4) for j in range(4) if i != j ]
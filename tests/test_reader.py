@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from Sequence import Seq, read_all
+
+
+# Write a FASTA file with one record per sequence, wrapping each at the given line length
+def write_fasta(path, seqs, line_len, newline="\n"):
+    with open(path, "w", newline="") as file:
+        for i, seq in enumerate(seqs):
+            file.write(f">seq{i} record {i}{newline}")
+            for start in range(0, len(seq), line_len):
+                file.write(seq[start : start + line_len] + newline)
+    return str(path)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("line_len", [1, 7, 60])
+def test_windows_match_sequence(tmp_path, line_len, newline):
+    rng  = random.Random(line_len)
+    seqs = [ "".join( rng.choice("ACGTN") for _ in range(length) ) for length in (0, 1, 59, 60, 61, 250) ]
+    filename = write_fasta(tmp_path / "seqs.fasta", seqs, line_len, newline)
+
+    for reader, seq in zip(read_all(filename), seqs):
+        assert len(reader) == len(seq)
+
+        for window_size in (None, 1, 5, 64, 1000):
+            for offset in (0, 3, len(seq)):
+                forward = "".join( str(block) for block in reader.as_DNA(offset=offset, window_size=window_size) )
+                assert forward == seq[offset:]
+
+                reverse = "".join( str(block) for block in reader.as_DNA(True, offset, window_size) )
+                assert reverse == str(~Seq(seq[: len(seq) - offset]))
+
+            # Windows have the requested size, apart from the last one
+            if window_size is not None and len(seq) > 0:
+                sizes = [ len(block) for block in reader.as_DNA(window_size=window_size) ]
+                assert all( size == window_size for size in sizes[:-1] )
+
+
+def test_fetch(tmp_path):
+    rng = random.Random(25)
+    seq = "".join( rng.choice("ACGT") for _ in range(500) )
+    reader = next(read_all(write_fasta(tmp_path / "seq.fasta", [seq], 70)))
+
+    for start, end in [ (0, 500), (69, 71), (140, 141), (-30, None), (10, 5), (None, 1000) ]:
+        assert str(reader.fetch(start, end)) == seq[start:end]
+        assert str(reader.fetch(start, end, strand="-")) == str(~Seq(seq[start:end]))
+
+
+
+### FASTA Index ###
+
+# Records laid out in ways that can and can't be read straight through the index
+LAYOUTS = {
+    "regular":          lambda seq: "".join( seq[i : i + 60] + "\n" for i in range(0, len(seq), 60) ),
+    "ragged lines":     lambda seq: seq[:50] + "\n" + seq[50:170] + "\n" + seq[170:] + "\n",
+    "blank lines":      lambda seq: seq[:60] + "\n\n" + seq[60:] + "\n",
+    "trailing spaces":  lambda seq: "".join( seq[i : i + 60] + "  \n" for i in range(0, len(seq), 60) ),
+    "tabs":             lambda seq: "".join( "\t" + seq[i : i + 60] + "\n" for i in range(0, len(seq), 60) ),
+    "blank with space": lambda seq: seq[:60] + "\n \n" + seq[60:] + "\n",
+}
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_with_and_without_index(tmp_path, layout):
+    rng  = random.Random(24)
+    seqs = [ "".join(rng.choices("ACGT", k=length)) for length in (200, 61) ]
+
+    path = tmp_path / "seqs.fasta"
+    path.write_text("".join( f">seq{i}\n" + LAYOUTS[layout](seq) for i, seq in enumerate(seqs) ))
+
+    # The first read scans the file (saving an index, if every record is regular), and the
+    # second uses the index if there is one - both give the bases, without any whitespace
+    for _ in range(2):
+        assert [ str(Seq(reader)) for reader in read_all(str(path)) ] == seqs
+    assert (tmp_path / "seqs.fasta.fai").exists() == (layout == "regular")
+
+
+def test_unwritable_index(tmp_path, monkeypatch):
+    import Sequence._fastaIndex as fasta_index
+
+    seq      = "ACGT" * 50
+    filename = write_fasta(tmp_path / "seq.fasta", [seq], 60)
+
+    # If the index can't be saved, the file is just scanned again each time
+    monkeypatch.setattr(fasta_index, "fai_filename", lambda filename: str(tmp_path / "missing" / "seq.fai"))
+    for _ in range(2):
+        assert [ str(Seq(reader)) for reader in read_all(filename) ] == [ seq ]
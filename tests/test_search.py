@@ -0,0 +1,95 @@
+import random
+
+import pytest
+
+from Sequence import Seq, read_first, search
+from Sequence.align import align
+
+
+def random_seq(rng, length):
+    return "".join(rng.choices("ACGT", k=length))
+
+
+def mutate(rng, seq, rate):
+    """
+    Add random substitutions, deletions and insertions to a sequence.
+    """
+    out = []
+    for base in seq:
+        x = rng.random()
+        if x < rate * 0.6:
+            out.append(rng.choice("ACGT"))
+        elif x < rate * 0.8:
+            pass
+        elif x < rate:
+            out += [ base, rng.choice("ACGT") ]
+        else:
+            out.append(base)
+    return "".join(out)
+
+
+def check_hit(hit, query, target):
+    # The alignment covers the reported ranges, with the query reverse complemented for '-' hits
+    query = Seq(query[hit.query_start : hit.query_end])
+    if hit.strand == "-":
+        query = ~query
+
+    aligned_query, aligned_target = hit.alignment
+    assert str(aligned_query).replace("-", "")  == str(query)
+    assert str(aligned_target).replace("-", "") == target[hit.target_start : hit.target_end]
+
+
+@pytest.fixture(scope="module")
+def planted(tmp_path_factory):
+    rng    = random.Random(22)
+    target = random_seq(rng, 20000)
+    query  = random_seq(rng, 300)
+
+    # Plant the query and its reverse complement, one across the end of a 5000-base window
+    target = target[:4900] + query + target[5200 : 14000] + str(~Seq(query)) + target[14300:]
+
+    path = tmp_path_factory.mktemp("search") / "target.fasta"
+    path.write_text(">target\n" + "".join( target[i : i + 70] + "\n" for i in range(0, len(target), 70) ))
+    return query, target, read_first(str(path))
+
+
+@pytest.mark.parametrize("window_size", [ 1000, 5000, 2 ** 20 ])
+def test_planted_hits(planted, window_size):
+    query, target, reader = planted
+
+    hits = search(query, reader, window_size=window_size)
+    assert [ (h.strand, h.target_start, h.target_end, h.query_start, h.query_end, h.score) for h in hits[:2] ] == [
+        ("+",  4900,  5200, 0, 300, 600),
+        ("-", 14000, 14300, 0, 300, 600),
+    ]
+    for hit in hits:
+        check_hit(hit, query, target)
+
+    # Searching one strand only finds the hit on that strand
+    assert [ h.target_start for h in search(query, reader, strand="-", window_size=window_size)[:1] ] == [ 14000 ]
+
+
+def test_mutated_hits():
+    rng = random.Random(3)
+    for trial in range(10):
+        target = random_seq(rng, 3000)
+        start  = rng.randrange(2500)
+        query  = mutate(rng, target[start : start + 400], 0.08)
+
+        # The seeded search never beats (and comes close to) the full local alignment
+        hits = search(query, target, strand="+")
+        best = align(query, target, True, (2, -3), -5, score_only=True)
+        assert hits and best - 10 <= hits[0].score <= best
+        assert abs(hits[0].target_start - start) < 30
+        check_hit(hits[0], query, target)
+
+
+def test_no_hits():
+    assert search("ACGTACGTACGTAAAA", "T" * 100) == []
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        search("ACG", "ACGTACGT")
+    with pytest.raises(ValueError):
+        search("ACGTACGTACGT", "ACGTACGT", strand="x")
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from Sequence import PackedSeq, Seq
+from Sequence._constants import base_to_bin, bin_to_dna
+
+
+GAP = ord('-')
+
+# The original set-algebra operators, one pair of bases at a time
+REFERENCE_OPS = {
+    "&": lambda x, y: bin_to_dna[base_to_bin[x] &  base_to_bin[y]],
+    "|": lambda x, y: bin_to_dna[base_to_bin[x] |  base_to_bin[y]],
+    "-": lambda x, y: bin_to_dna[base_to_bin[x] & ~base_to_bin[y]],
+    "^": lambda x, y: x if x == y or y == GAP else (y if x == GAP else GAP),
+}
+
+OPS = {
+    "&": lambda x, y: x & y,
+    "|": lambda x, y: x | y,
+    "-": lambda x, y: x - y,
+    "^": lambda x, y: x ^ y,
+}
+
+
+@pytest.mark.parametrize("name", sorted(OPS))
+def test_set_ops_match_reference(name):
+    rng = random.Random(2)
+    for _ in range(50):
+        seq1 = Seq("".join(rng.choices("ACGTRYSWKMBDHVN-", k=rng.randint(0, 60))))
+        seq2 = Seq("".join(rng.choices("ACGTRYSWKMBDHVN-", k=rng.randint(0, 60))))
+
+        expected = Seq([ REFERENCE_OPS[name](x, y) for x, y in zip(seq1, seq2) ])
+        assert OPS[name](seq1, seq2) == expected
+        assert OPS[name](seq1, seq2.view()) == expected
+
+
+@pytest.mark.parametrize("name", ["&", "|", "-"])
+def test_set_ops_reject_invalid_bases(name):
+    with pytest.raises(KeyError):
+        OPS[name](Seq("ACXT"), Seq("ACGT"))
+
+
+def test_contains_other_sequence_types():
+    seq = Seq('ACGTACGT')
+    assert 'GTA' in seq
+    assert Seq('TAC') in seq
+    assert seq.view(2, 5) in seq
+    assert PackedSeq('AC') in seq
+    assert PackedSeq('AA') not in seq
+    assert 'GTA' in seq.view(1)
+
+
+
+### Complements ###
+
+def reference_complement(seq, lookup=bin_to_dna):
+    """
+    Complement a sequence one base at a time, like the original ~ did.
+    """
+    return Seq([ lookup[((base_to_bin[b] >> 2) & 0b0011) | ((base_to_bin[b] << 2) & 0b1100)] for b in seq ])
+
+
+def test_reverse_complement_matches_reference():
+    from Sequence._constants import bin_to_rna
+
+    rng = random.Random(3)
+    for length in (0, 1, 2, 17, 500):
+        seq = Seq("".join(rng.choices("ACGTRYSWKMBDHVN-", k=length)))
+        assert ~seq == reference_complement(seq[::-1])
+        assert seq.complement() == reference_complement(seq)
+        assert seq % ~seq
+
+        # RNA sequences complement to RNA bases
+        rna = Seq(str(seq).replace("T", "U"), rna=True)
+        assert ~rna == reference_complement(rna[::-1], bin_to_rna)
+        assert seq.complement(rna=True) == reference_complement(seq, bin_to_rna)
+        assert (~rna)._is_rna and not (~seq)._is_rna
+
+
+def test_complement_rejects_invalid_bases():
+    with pytest.raises(KeyError):
+        ~Seq("ACXT")
+    with pytest.raises(KeyError):
+        Seq("acgt").complement()
+
+
+def test_reader_reverse_complement(tmp_path):
+    from Sequence import read_first
+
+    rng = random.Random(4)
+    seq = "".join(rng.choices("ACGTN", k=333))
+    fasta = tmp_path / "seq.fasta"
+    fasta.write_text(">seq\n" + "\n".join( seq[i : i + 50] for i in range(0, len(seq), 50) ) + "\n")
+    reader = read_first(str(fasta))
+
+    for window_size in (1, 7, 100, 1000):
+        assert "".join( str(block) for block in reader.as_DNA(complement=True, window_size=window_size) ) == str(~Seq(seq))
+        assert "".join( str(block) for block in reader.as_RNA(complement=True, window_size=window_size) ) == str(~Seq(seq)).replace("T", "U")
+        assert "".join( str(block) for block in reader.as_RNA(window_size=window_size) ) == seq.replace("T", "U")
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from Sequence import Seq, SeqView, read_first
+from Sequence._sequence import _byte_array
+
+
+def test_strided_view_is_copied():
+    view = Seq('ACGTACGT').view(step=2)
+    assert str(view) == 'AGAG'
+
+    rna = Seq('ACGUACGU', rna=True).view(step=2)
+    assert str(rna) == 'AGAG' and rna._is_rna
+
+
+def test_scan_windows_are_copies():
+    seq = Seq('ACGTACGT')
+    windows = list(seq.scan(4))
+    seq += 'GG'
+    assert [ str(window) for window in windows ] == ['ACGT', 'ACGT']
+
+    blocks = list(seq.as_DNA(window_size=3))
+    seq += 'T'
+    assert [ str(block) for block in blocks ] == ['ACG', 'TAC', 'GTG', 'G']
+
+
+def test_scan_views_hold_the_buffer():
+    seq = Seq('ACGTACGT')
+    windows = list(seq.scan(4, views=True))
+    assert all( isinstance(window, SeqView) for window in windows )
+    with pytest.raises(BufferError):
+        seq += 'GG'
+
+
+def test_view_of_view():
+    view = Seq('ACGTACGTAC').view(1, 9)
+    assert str(view.view(2, 5)) == 'TAC'
+    assert str(view.view(step=3)) == 'CAT'
+    assert [ str(window) for window in view.scan(3) ] == ['CGT', 'ACG', 'TA']
+    assert all( isinstance(window, SeqView) for window in view.scan(3, views=True) )
+
+
+def test_scan_views_share_the_parent_buffer():
+    seq = Seq('ACGTACGT')
+    window = next(seq.scan(4, views=True))
+    assert np.shares_memory(_byte_array(window), _byte_array(seq))
+
+    # Writing to the view copies it first, so the parent is unchanged
+    window[0] = ord('T')
+    window.append(ord('G'))
+    assert str(window) == 'TCGTG'
+    assert str(seq) == 'ACGTACGT'
+    assert not np.shares_memory(_byte_array(window), _byte_array(seq))
+
+
+def test_as_DNA_views():
+    seq    = Seq('ACGTACGTA')
+    blocks = list(seq.as_DNA(window_size=4, views=True))
+    assert all( isinstance(block, SeqView) for block in blocks )
+    assert [ str(block) for block in blocks ] == ['ACGT', 'ACGT', 'A']
+    assert list(Seq().as_DNA()) == []
+
+
+def test_reader_views(tmp_path):
+    fasta = tmp_path / "seq.fasta"
+    fasta.write_text(">seq\nACGTA\nCGTAC\nGT\n")
+    reader = read_first(str(fasta))
+
+    blocks = list(reader.as_DNA(window_size=4, views=True))
+    assert all( isinstance(block, SeqView) for block in blocks )
+    assert "".join( str(block) for block in blocks ) == "ACGTACGTACGT"
+
+    # Complemented windows are new sequences either way
+    assert "".join( str(block) for block in reader.as_DNA(True, window_size=4, views=True) ) == "ACGTACGTACGT"
@@ -0,0 +1,99 @@
+import itertools
+import random
+
+import pytest
+
+from Sequence import Seq, read_all, read_first
+from Sequence._constants import base_to_bin, codon_table
+from Sequence._transform import translate_buffer, translate_frames
+
+
+IUPAC = "ACGTURYSWKMBDHVN-"
+
+
+def reference_translate(seq):
+    """
+    Translate one codon at a time, like the original dict lookup did.
+    """
+    rna = str(seq).replace("T", "U")
+    return "".join( codon_table.get(rna[i : i + 3], "?") for i in range(0, (len(rna) // 3) * 3, 3) )
+
+
+def reference_ambiguous(codon):
+    """
+    Translate a codon with IUPAC codes, if every codon it could stand for gives the same amino acid.
+    """
+    options = [ [ b for b in "ACGU" if base_to_bin[ord(b)] & base_to_bin[ord(c)] ] for c in codon ]
+    aminos  = { codon_table["".join(bases)] for bases in itertools.product(*options) }
+    return aminos.pop() if len(aminos) == 1 and all(options) else "?"
+
+
+def random_seq(rng, length, alphabet="ACGT"):
+    return "".join(rng.choices(alphabet, k=length))
+
+
+def test_translate_matches_reference():
+    rng = random.Random(5)
+    for length in list(range(8)) + [ 300, 301, 302 ]:
+        for alphabet in ("ACGT", IUPAC):
+            seq = random_seq(rng, length, alphabet)
+            assert translate_buffer(Seq(seq)) == reference_translate(seq)
+            assert str(Seq(seq).translate()) == reference_translate(seq)
+            assert str(Seq(seq.replace("T", "U"), rna=True).translate()) == reference_translate(seq)
+
+
+def test_ambiguous_codons():
+    for codon in map("".join, itertools.product("ACGTRYN-", repeat=3)):
+        expected = reference_ambiguous(codon.replace("T", "U"))
+        assert translate_buffer(codon, ambiguous=True) == expected
+
+        # Without ambiguity, only plain codons are translated
+        assert translate_buffer(codon) == (expected if set(codon) <= set("ACGT") else "?")
+
+
+def test_translate_frames():
+    rng = random.Random(6)
+    for length in (0, 1, 2, 3, 4, 5, 100, 101):
+        seq = random_seq(rng, length, "ACGTN")
+        assert translate_frames(Seq(seq)) == [ reference_translate(seq[offset:]) for offset in range(3) ]
+        assert [ str(p) for p in Seq(seq).translate_frames() ] == translate_frames(Seq(seq))
+
+
+def test_translate_offsets():
+    assert translate_buffer("AATGGCC", offset=1) == "MA"
+    assert translate_buffer("AATGGCC", offset=5) == ""
+
+
+
+### Reading Frames of a File ###
+
+@pytest.mark.parametrize("block_size", [3, 6, 30, 3000])
+def test_reader_translate_frames(tmp_path, block_size):
+    rng  = random.Random(block_size)
+    seqs = [ random_seq(rng, length, "ACGTN") for length in (0, 2, 3, 61, 100, 301) ]
+
+    path = tmp_path / "seqs.fasta"
+    path.write_text("".join( f">seq{i}\n" + "".join( seq[j : j + 7] + "\n" for j in range(0, len(seq), 7) ) for i, seq in enumerate(seqs) ))
+
+    for reader, seq in zip(read_all(str(path)), seqs):
+        for frame in (1, 2, 3, -1, -2, -3):
+            strand   = seq if frame > 0 else str(~Seq(seq))
+            expected = reference_translate(strand[abs(frame) - 1 :])
+
+            # Blocks are whole codons, so joining them gives the translation of the whole frame
+            chunks = list(reader.translate(frame, block_size=block_size, as_chunks=True))
+            assert "".join(chunks) == expected
+            assert all( len(chunk) == block_size // 3 for chunk in chunks[:-1] )
+
+            # One amino acid at a time, with None for codons that can't be translated
+            aminos = list(reader.translate(frame, block_size=block_size))
+            assert aminos == [ None if a == "?" else a for a in expected ]
+
+
+def test_reader_translate_block_size(tmp_path):
+    path = tmp_path / "seq.fasta"
+    path.write_text(">seq\nATGGCCTAA\n")
+    reader = read_first(str(path))
+
+    with pytest.raises(AssertionError):
+        list(reader.translate(block_size=10))
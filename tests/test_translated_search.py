@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from Sequence import Seq, read_first, translated_search
+from Sequence._constants import codon_table
+from Sequence._search import search_table
+
+
+# One codon for each amino acid
+CODONS = { amino: codon.replace("U", "T") for codon, amino in sorted(codon_table.items()) }
+
+
+def reference_hits(query, target, min_score, table):
+    """
+    Score the query against every position of every translated frame, one amino acid at a time.
+    """
+    m, hits = len(query), []
+    for complement in (False, True):
+        strand = str(~Seq(target)) if complement else target
+        for offset in range(3):
+            protein = str(Seq(strand[offset:]).translate())
+            for i in range(len(protein) - m + 1):
+                score = sum( table[ord(q), ord(p)] for q, p in zip(query, protein[i:]) )
+                start = offset + 3 * i
+                if score >= min_score:
+                    if complement:
+                        hits.append(( score, -(offset + 1), len(target) - start - 3 * m ))
+                    else:
+                        hits.append(( score, offset + 1, start ))
+    return sorted(hits, key=lambda hit: (-hit[0], hit[2], hit[1]))
+
+
+def check_peptide(hit, target):
+    bases = Seq(target[hit.start : hit.end])
+    assert str((bases if hit.strand == "+" else ~bases).translate()) == hit.peptide
+
+
+@pytest.mark.parametrize("window_size", [ 50, 1000, 2 ** 20 ])
+def test_matches_reference(window_size):
+    rng    = random.Random(23)
+    target = "".join(rng.choices("ACGT", k=3000))
+    table  = search_table("blosum62")
+
+    for query, min_score in [ ("MKVL", None), ("WCHW", 15), ("PEPTIDE", 20) ]:
+        hits = translated_search(query, target, min_score=min_score, window_size=window_size)
+
+        if min_score is None:
+            min_score = sum( table[ord(a), ord(a)] for a in query ) / 2
+        assert [ (h.score, h.frame, h.start) for h in hits ] == reference_hits(query, target, min_score, table)
+
+        for hit in hits:
+            check_peptide(hit, target)
+
+
+@pytest.mark.parametrize("frame", [ -3, -2, -1, 1, 2, 3 ])
+def test_planted_hit(tmp_path, frame):
+    rng     = random.Random(frame)
+    protein = "MKVLWHCYFEDRAGWW"
+    coding  = "".join( CODONS[amino] for amino in protein )
+
+    # Plant the coding sequence on the strand and frame given
+    target = "".join(rng.choices("ACGT", k=5000))
+    start  = 1500 + abs(frame) - 1
+    target = target[:start] + (coding if frame > 0 else str(~Seq(coding))) + target[start + len(coding) :]
+
+    path = tmp_path / "target.fasta"
+    path.write_text(">target\n" + "".join( target[i : i + 60] + "\n" for i in range(0, len(target), 60) ))
+
+    hit = translated_search(protein, read_first(str(path)), max_hits=1, window_size=1000)[0]
+    assert (hit.frame, hit.strand, hit.start, hit.end, hit.peptide) == (
+        frame if frame > 0 else -((len(target) - start - len(coding)) % 3 + 1),
+        "+" if frame > 0 else "-", start, start + len(coding), protein,
+    )
+
+
+def test_max_hits():
+    rng    = random.Random(4)
+    target = "".join(rng.choices("ACGT", k=2000))
+    hits   = translated_search("MKVL", target, min_score=0)
+    assert translated_search("MKVL", target, min_score=0, max_hits=5) == hits[:5]
+
+
+@pytest.mark.parametrize("query", [ "", "MKXJ" ])
+def test_invalid_queries(query):
+    with pytest.raises(ValueError):
+        translated_search(query, "ACGTACGT")